@@ -0,0 +1,66 @@
+"""Compare chunkers on a corpus: chunk counts, token sizes and retrieval hit rate at k.
+
+Queries are sentences sampled from the corpus; a query is a hit when one of the
+top-k chunks contains the whole sentence, so slicers that cut sentences in half
+are penalised the way real retrieval is.
+
+    python bench/chunking.py docs/ --queries 200 --k 5
+"""
+import os
+import re
+import sys
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunking import STRATEGIES, chunk_text, get_token_counter  # noqa: E402
+from ingest_bulk import expand_paths  # noqa: E402
+
+
+def _norm(s: str) -> str:
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=["."])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    import main_graph as mg
+    docs = {}
+    for root in args.paths:
+        for p in expand_paths(root) if os.path.isdir(root) else [root]:
+            with open(p, "r", encoding="utf-8", errors="ignore") as f:
+                docs[p] = f.read()
+    sentences = [s for txt in docs.values() for s in re.split(r"(?<=[.!?])\s+", txt)
+                 if len(s.split()) >= 6 and "\n" not in s.strip()]
+    random.Random(args.seed).shuffle(sentences)
+    queries = sentences[:args.queries]
+    if not queries:
+        print("no usable sentences in corpus")
+        sys.exit(2)
+    qv = mg._encode(queries)
+    count = get_token_counter()
+
+    print(f"{len(docs)} files, {sum(len(t) for t in docs.values())} chars, {len(queries)} queries, k={args.k}")
+    print(f"{'strategy':<10} {'chunks':>7} {'avg_tok':>8} {'max_tok':>8} {'hit@k':>6}")
+    for strategy in STRATEGIES:
+        chunks = [c for txt in docs.values() for c in chunk_text(txt, strategy)]
+        toks = [count(c) for c in chunks]
+        cv = mg._encode(chunks)
+        scores = qv @ cv.T
+        k = min(args.k, len(chunks))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        normed = [_norm(c) for c in chunks]
+        hits = sum(any(_norm(qs) in normed[j] for j in row) for qs, row in zip(queries, top))
+        print(f"{strategy:<10} {len(chunks):>7} {np.mean(toks):>8.1f} {max(toks):>8} {hits / len(queries):>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
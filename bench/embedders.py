@@ -0,0 +1,65 @@
+"""Embedding backends: load time, single-query latency and batch throughput.
+
+Runs each backend in --backends over synthetic chat-sized texts, then checks the
+candidates against the first backend (cosine and nearest-neighbour agreement).
+The ONNX backend needs an export first: ``python embedders.py export``.
+
+    python bench/embedders.py --backends sentence-transformers,onnx --texts 512
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedders import check_equivalence, get_embedder  # noqa: E402
+
+WORDS = ("invoice budget roof repair dentist grocery meeting reminder password storage unit electricity "
+         "holiday flight hotel school pickup insurance renewal tax return garden plumber birthday gift").split()
+
+
+def _texts(n: int, rng: np.random.Generator) -> list:
+    return [" ".join(rng.choice(WORDS, size=int(rng.integers(6, 60)))) for _ in range(n)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default="sentence-transformers,onnx")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    texts = _texts(args.texts, rng)
+    queries = _texts(args.queries, rng)
+    print(f"{'backend':<22} {'load_s':>7} {'q.p50_ms':>9} {'q.p95_ms':>9} {'texts/s':>8}")
+    loaded = []
+    for backend in args.backends.split(","):
+        t0 = time.perf_counter()
+        try:
+            e = get_embedder(backend, remote=False)
+        except Exception as ex:
+            print(f"{backend:<22} unavailable: {ex}")
+            continue
+        load = time.perf_counter() - t0
+        e.encode(queries[:2])  # first-call allocation
+        ms = []
+        for qtext in queries:
+            t0 = time.perf_counter()
+            e.encode([qtext])
+            ms.append((time.perf_counter() - t0) * 1000.0)
+        t0 = time.perf_counter()
+        e.encode(texts, batch_size=args.batch)
+        tput = len(texts) / (time.perf_counter() - t0)
+        print(f"{backend:<22} {load:>7.1f} {np.percentile(ms, 50):>9.2f} {np.percentile(ms, 95):>9.2f} {tput:>8.0f}")
+        loaded.append((backend, e))
+    for backend, e in loaded[1:]:
+        print(f"{backend} vs {loaded[0][0]}: {check_equivalence(loaded[0][1], e, texts[:200])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Dense vs hybrid (dense + BM25, RRF) hit rate at k on a corpus.
+
+Two query sets are drawn from the corpus: whole sentences (paraphrase-like) and
+keyword queries made of each sentence's two rarest tokens (names, numbers,
+codewords). A query hits when a top-k chunk contains its source sentence.
+
+    python bench/retrieval.py docs/ --queries 200 --k 5
+"""
+import os
+import re
+import sys
+import random
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest_bulk import expand_paths  # noqa: E402
+from lexical_index import BM25Index, tokenize  # noqa: E402
+
+
+def _norm(s: str) -> str:
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=["."])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    from qdrant_client import QdrantClient
+    import main_graph as mg
+    mg.q = QdrantClient(":memory:")
+    mg._lexical = BM25Index()
+    docs = {}
+    for root in args.paths:
+        for p in expand_paths(root) if os.path.isdir(root) else [root]:
+            with open(p, "r", encoding="utf-8", errors="ignore") as f:
+                docs[p] = f.read()
+    mg.ingest_batch([(txt, f"file:{os.path.abspath(p)}", None) for p, txt in docs.items()])
+
+    df = Counter(t for txt in docs.values() for t in set(tokenize(txt)))
+    sentences = [s for txt in docs.values() for s in re.split(r"(?<=[.!?])\s+", txt)
+                 if len(s.split()) >= 6 and "\n" not in s.strip()]
+    random.Random(args.seed).shuffle(sentences)
+    sentences = sentences[:args.queries]
+    keyword = [" ".join(sorted(set(tokenize(s)), key=lambda t: df[t])[:2]) for s in sentences]
+
+    print(f"{len(docs)} files, {len(mg._lexical)} chunks, {len(sentences)} queries, k={args.k}")
+    print(f"{'mode':<8} {'sentence@k':>11} {'keyword@k':>10}")
+    for mode in ("dense", "hybrid"):
+        os.environ["HYBRID_RETRIEVAL"] = "true" if mode == "hybrid" else "false"
+        rates = []
+        for queries in (sentences, keyword):
+            hits = 0
+            for qtext, sent in zip(queries, sentences):
+                got = mg.topk(qtext, k=args.k)
+                hits += any(_norm(sent) in _norm(h["text"]) for h in got)
+            rates.append(hits / max(len(queries), 1))
+        print(f"{mode:<8} {rates[0]:>11.2f} {rates[1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
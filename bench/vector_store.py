@@ -0,0 +1,75 @@
+"""NumpyStore vs the in-memory Qdrant client: build time and search latency.
+
+Random unit vectors (dim 384 by default, like bge-small) with a thread_id
+payload; each size is searched unfiltered and with a thread filter matching
+about 10% of points. Qdrant's local client upserts point by point in Python,
+so sizes above --qdrant-max are skipped for it.
+
+    python bench/vector_store.py --sizes 10000,100000,1000000 --queries 200
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import NumpyStore, Point, QdrantStore  # noqa: E402
+
+
+def _build(store, vecs: np.ndarray, batch: int = 4096) -> float:
+    t0 = time.perf_counter()
+    for i in range(0, len(vecs), batch):
+        store.upsert([Point(id=f"00000000-0000-0000-0000-{j:012d}", vector=vecs[j].tolist(),
+                            payload={"chunk": "", "thread_id": f"t{j % 10}"})
+                      for j in range(i, min(i + batch, len(vecs)))])
+    return time.perf_counter() - t0
+
+
+def _latency(store, queries: np.ndarray, k: int, filt=None) -> str:
+    ms = []
+    for v in queries:
+        t0 = time.perf_counter()
+        store.search(v.tolist(), k, filt)
+        ms.append((time.perf_counter() - t0) * 1000.0)
+    return f"{np.percentile(ms, 50):>8.2f} {np.percentile(ms, 95):>8.2f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    parser.add_argument("--qdrant-max", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    print(f"{'backend':<8} {'n':>8} {'build_s':>8} {'p50_ms':>8} {'p95_ms':>8} {'f.p50':>8} {'f.p95':>8}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        vecs = rng.normal(size=(n, args.dim)).astype(np.float32)
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            stores = [("numpy", NumpyStore(tmp, args.dim, args.dtype))]
+            if n <= args.qdrant_max:
+                from qdrant_client import QdrantClient
+                qs = QdrantStore(QdrantClient(":memory:"), "bench")
+                qs.ensure(args.dim)
+                stores.append(("qdrant", qs))
+            for name, store in stores:
+                build = _build(store, vecs)
+                plain = _latency(store, queries, args.k)
+                filtered = _latency(store, queries, args.k, {"thread_id": "t3", "include_shared": False})
+                print(f"{name:<8} {n:>8} {build:>8.1f} {plain} {filtered}")
+                store.close()
+            if n > args.qdrant_max:
+                print(f"{'qdrant':<8} {n:>8} skipped (--qdrant-max {args.qdrant_max})")
+
+
+if __name__ == "__main__":
+    main()
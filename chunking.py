@@ -0,0 +1,257 @@
+import os
+import re
+import json
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+STRATEGIES = ("fixed", "sentence", "paragraph", "markdown")
+FIXED_CHARS = 1200
+MAX_BLOCK_CHARS = 1 << 16  # bounds memory for newline-free input
+
+_SENT_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_APPROX_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def approx_tokens(text: str) -> int:
+    """Cheap tokenizer-free estimate: words plus punctuation marks."""
+    return len(_APPROX_RE.findall(text))
+
+
+# The tokenizer picked on first use is written here and reused after, since chunk
+# boundaries (and so the content-derived point IDs) depend on it
+TOKENIZER_RECORD = os.path.join(".jarvis", "chunk_tokenizer.json")
+
+
+def _local_tokenizer(name: str):
+    """``tokenizers.Tokenizer`` from a file, a directory or the local HF cache; never the network."""
+    from tokenizers import Tokenizer
+    path = name
+    if os.path.isdir(path):
+        path = os.path.join(path, "tokenizer.json")
+    if not os.path.isfile(path):
+        try:
+            from huggingface_hub import try_to_load_from_cache
+            cached = try_to_load_from_cache(name, "tokenizer.json")
+        except Exception:  # not a repo id, or no huggingface_hub
+            cached = None
+        path = cached if isinstance(cached, str) else ""
+    return Tokenizer.from_file(path) if path else None
+
+
+def _auto_candidates() -> List[str]:
+    # The embedder's own tokenizer: the ONNX export's copy, then the sentence-transformers download
+    return [os.getenv("ONNX_MODEL_DIR", os.path.join(".jarvis", "onnx", "bge-small-int8")), "BAAI/bge-small-en-v1.5"]
+
+
+def _read_record(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return str(json.load(f).get("tokenizer") or "")
+    except (OSError, ValueError):
+        return ""
+
+
+def _write_record(path: str, name: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"tokenizer": name}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Chunk tokenizer record not written: {e}")
+
+
+@lru_cache(maxsize=1)
+def _resolve() -> Tuple[str, Callable[[str], int]]:
+    record = os.getenv("CHUNK_TOKENIZER_RECORD", TOKENIZER_RECORD)
+    recorded = _read_record(record)
+    name = os.getenv("CHUNK_TOKENIZER", "auto").strip() or "auto"
+    if name == "auto" and recorded:
+        name = recorded
+    if name == "auto":
+        name = next((c for c in _auto_candidates() if _local_tokenizer(c) is not None), "approx")
+    elif recorded and name != recorded:
+        print(f"⚠️ CHUNK_TOKENIZER changed from {recorded} to {name}: new chunks (and their IDs) will differ "
+              "from stored ones; re-sync or migrate to re-chunk")
+    if name == "approx":
+        count: Callable[[str], int] = approx_tokens
+    else:
+        tok = _local_tokenizer(name)
+        if tok is None:
+            raise RuntimeError(f"Chunk tokenizer {name!r} is not available locally (chunks were sized with it); "
+                               "restore it or set CHUNK_TOKENIZER explicitly")
+        count = lambda t: len(tok.encode(t, add_special_tokens=False).ids)  # noqa: E731
+    if name != recorded:
+        _write_record(record, name)
+    return name, count
+
+
+def get_token_counter() -> Callable[[str], int]:
+    """Token counter for chunk sizes, built from local files only.
+
+    CHUNK_TOKENIZER names a tokenizer.json, a directory holding one, a model in the
+    local HF cache, or ``approx``. Left at ``auto``, the choice recorded on first use
+    is reused; the first run takes the embedder's tokenizer if it is on disk and the
+    estimate otherwise. A recorded tokenizer that has gone missing is an error, not
+    a silent switch to another one.
+    """
+    return _resolve()[1]
+
+
+def chunk_tokenizer() -> str:
+    return _resolve()[0]
+
+
+def strategy_for(src: str) -> str:
+    """Pick a chunker per source type; CHUNKER=<strategy> forces one everywhere."""
+    forced = os.getenv("CHUNKER", "auto").strip().lower()
+    if forced in STRATEGIES:
+        return forced
+    s = src.lower()
+    if s.startswith("file:"):
+        return "markdown" if s.endswith((".md", ".markdown")) else "paragraph"
+    return "sentence"
+
+
+def _fixed(lines: Iterable[str], size: int) -> Iterator[str]:
+    buf = ""
+    for line in lines:
+        buf += line
+        while len(buf) >= size:
+            yield buf[:size]
+            buf = buf[size:]
+    if buf:
+        yield buf
+
+
+def _blocks(lines: Iterable[str], markdown: bool) -> Iterator[Tuple[str, bool]]:
+    """Yield (paragraph, starts_new_section) from a stream of lines.
+
+    In markdown mode headings start a new section and fenced code is never split
+    (unless it exceeds MAX_BLOCK_CHARS).
+    """
+    buf: List[str] = []
+    size = 0
+    in_fence = False
+    section = False
+    for line in lines:
+        if size > MAX_BLOCK_CHARS:
+            yield "".join(buf).strip(), section
+            buf, size, section = [], 0, False
+        stripped = line.strip()
+        if markdown and stripped.startswith("```"):
+            in_fence = not in_fence
+        if markdown and not in_fence and _HEADING_RE.match(stripped):
+            if buf:
+                yield "".join(buf).strip(), section
+            buf, size, section = [line], len(line), True
+        elif not stripped and not in_fence:
+            if buf:
+                yield "".join(buf).strip(), section
+            buf, size, section = [], 0, False
+        else:
+            buf.append(line)
+            size += len(line)
+    if buf:
+        yield "".join(buf).strip(), section
+
+
+def _split_long(text: str, max_tokens: int, count: Callable[[str], int]) -> Iterator[str]:
+    """Break an oversized unit on sentence boundaries, then on word windows."""
+    for sent in _SENT_RE.split(text):
+        if count(sent) <= max_tokens:
+            yield sent
+            continue
+        words: List[str] = []
+        n = 0
+        for w in sent.split():
+            k = count(w)
+            if words and n + k > max_tokens:
+                yield " ".join(words)
+                words, n = [], 0
+            words.append(w)
+            n += k
+        if words:
+            yield " ".join(words)
+
+
+def _pack(units: Iterable[Tuple[str, bool]], max_tokens: int, overlap: int,
+          count: Callable[[str], int], joiner: str) -> Iterator[str]:
+    """Greedily pack units up to ``max_tokens``, carrying ``overlap`` tokens of trailing units forward."""
+    # Pieces of a split unit are rejoined with spaces; whole units with ``joiner``
+    def _fit() -> Iterator[Tuple[str, int, bool, str]]:
+        for text, brk in units:
+            if not text:
+                continue
+            n = count(text)
+            if n <= max_tokens:
+                yield text, n, brk, joiner
+                continue
+            for i, part in enumerate(_split_long(text, max_tokens, count)):
+                yield part, count(part), brk and i == 0, joiner if i == 0 else " "
+
+    def _join(parts: List[Tuple[str, int, str]]) -> str:
+        return parts[0][0] + "".join(sep + t for t, _, sep in parts[1:])
+
+    cur: List[Tuple[str, int, str]] = []
+    cur_tok = 0
+    fresh = False
+    for text, n, brk, sep in _fit():
+        if cur and (brk or cur_tok + n > max_tokens):
+            if fresh:
+                yield _join(cur)
+            carry: List[Tuple[str, int, str]] = []
+            ct = 0
+            if not brk:
+                for item in reversed(cur):
+                    if ct + item[1] > overlap:
+                        break
+                    carry.insert(0, item)
+                    ct += item[1]
+            while carry and ct + n > max_tokens:
+                ct -= carry.pop(0)[1]
+            cur, cur_tok, fresh = carry, ct, False
+        cur.append((text, n, sep))
+        cur_tok += n
+        fresh = True
+    if cur and fresh:
+        yield _join(cur)
+
+
+def chunk_lines(lines: Iterable[str], strategy: str = "paragraph", max_tokens: Optional[int] = None,
+                overlap_tokens: Optional[int] = None, count: Optional[Callable[[str], int]] = None) -> Iterator[str]:
+    """Streaming chunker over an iterable of lines (a file object works).
+
+    ``fixed`` reproduces the legacy 1200-character slicer; the other strategies
+    cut on sentence, paragraph or markdown-section boundaries, size chunks in
+    tokenizer tokens (CHUNK_MAX_TOKENS) and overlap neighbours by
+    CHUNK_OVERLAP_TOKENS.
+    """
+    if strategy == "fixed":
+        yield from _fixed(lines, FIXED_CHARS)
+        return
+    max_tokens = max_tokens or int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+    overlap = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32")) if overlap_tokens is None else overlap_tokens
+    count = count or get_token_counter()
+    blocks = _blocks(lines, markdown=(strategy == "markdown"))
+    if strategy == "sentence":
+        units: Iterable[Tuple[str, bool]] = (
+            (s.strip(), brk and i == 0) for b, brk in blocks for i, s in enumerate(_SENT_RE.split(b))
+        )
+        yield from _pack(units, max_tokens, overlap, count, " ")
+    else:
+        yield from _pack(blocks, max_tokens, overlap, count, "\n\n")
+
+
+def chunk_text(text: str, strategy: str = "paragraph", **kw) -> List[str]:
+    return list(chunk_lines(text.splitlines(True), strategy, **kw))
+
+
+def iter_file_chunks(path: str, strategy: Optional[str] = None, **kw) -> Iterator[str]:
+    """Yield chunks while reading the file line by line; strategy defaults to the file's type."""
+    strategy = strategy or strategy_for(f"file:{os.path.abspath(path)}")
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        # Bounded readline keeps a single enormous line from being loaded whole
+        yield from chunk_lines(iter(lambda: f.readline(MAX_BLOCK_CHARS), ""), strategy, **kw)
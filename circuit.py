@@ -0,0 +1,281 @@
+import time
+import random
+import asyncio
+import threading
+import contextlib
+import contextvars
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+# Absolute time.monotonic() by which the current graph run must be done (None: no limit)
+DEADLINE: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("DEADLINE", default=None)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound everything called inside (retries, waits, request timeouts) to ``seconds`` from now.
+
+    A nested deadline can only shorten the one already in force.
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    at = time.monotonic() + seconds
+    outer = DEADLINE.get()
+    token = DEADLINE.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        DEADLINE.reset(token)
+
+
+def remaining() -> Optional[float]:
+    at = DEADLINE.get()
+    return None if at is None else at - time.monotonic()
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a rolling time window.
+
+    Closed: calls go through and their outcomes are kept for ``window`` seconds.
+    Once at least ``min_calls`` outcomes are in the window and the failure share
+    reaches ``error_rate``, it opens and rejects calls for ``cooldown`` seconds.
+    Then it is half-open: up to ``probes`` calls go through; a success closes it,
+    a failure opens it for another cooldown.
+    """
+
+    def __init__(self, window: float = 60.0, min_calls: int = 10, error_rate: float = 0.5,
+                 cooldown: float = 30.0, probes: int = 1):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.probes = probes
+        self._lock = threading.Lock()
+        self._events: "deque[Tuple[float, bool]]" = deque()
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._in_flight = 0
+        self._stats = {"opens": 0, "rejected": 0}
+
+    def _trim(self, now: float) -> None:
+        while self._events and self._events[0][0] < now - self.window:
+            self._events.popleft()
+
+    def _open(self, now: float) -> None:
+        self._state = "open"
+        self._opened_at = now
+        self._in_flight = 0
+        self._stats["opens"] += 1
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "open" and now - self._opened_at >= self.cooldown:
+                self._state = "half_open"
+            if self._state == "half_open":
+                if self._in_flight >= self.probes:
+                    self._stats["rejected"] += 1
+                    return False
+                self._in_flight += 1
+                return True
+            if self._state == "open":
+                self._stats["rejected"] += 1
+                return False
+            return True
+
+    def record(self, ok: Optional[bool]) -> None:
+        """Outcome of an allowed call; None releases it without one (e.g. cancelled)."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "half_open":
+                self._in_flight = max(0, self._in_flight - 1)
+                if ok is True:
+                    self._state = "closed"
+                    self._events.clear()
+                elif ok is False:
+                    self._open(now)
+                return
+            if ok is None or self._state == "open":
+                return
+            self._events.append((now, ok))
+            self._trim(now)
+            n = len(self._events)
+            failed = sum(1 for _, good in self._events if not good)
+            if n >= self.min_calls and failed / n >= self.error_rate:
+                self._open(now)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return self._state
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            self._trim(time.monotonic())
+            n = len(self._events)
+            failed = sum(1 for _, good in self._events if not good)
+            return {**self._stats, "state": state, "calls_in_window": n,
+                    "error_rate": round(failed / n, 3) if n else 0.0,
+                    "open_for_sec": round(max(0.0, self.cooldown - (time.monotonic() - self._opened_at)), 1)
+                    if state == "open" else 0.0}
+
+
+def _status(e: BaseException) -> Optional[int]:
+    st = getattr(e, "status_code", None)
+    if st is None:
+        st = getattr(getattr(e, "response", None), "status_code", None)
+    return st if isinstance(st, int) else None
+
+
+def classify(e: BaseException) -> str:
+    """Error class for retry rules: rate_limit, timeout, connection, server, client or unknown."""
+    st = _status(e)
+    name = type(e).__name__
+    if st == 429 or name == "RateLimitError":
+        # An exhausted quota will not come back within a retry
+        return "client" if getattr(e, "code", None) == "insufficient_quota" else "rate_limit"
+    if st == 408 or "Timeout" in name or isinstance(e, TimeoutError):
+        return "timeout"
+    if "Connect" in name or isinstance(e, ConnectionError):
+        return "connection"
+    if st is not None and (st >= 500 or st == 409):
+        return "server"
+    if st is not None and 400 <= st < 500:
+        return "client"
+    return "unknown"
+
+
+def retry_after(e: BaseException) -> Optional[float]:
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after") is not None:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass  # an HTTP date: fall back to backoff
+    return None
+
+
+class RetryPolicy:
+    """Retries per error class: ``rules`` maps class -> (retries, base backoff seconds).
+
+    Backoff is exponential with jitter; a 429 waits what Retry-After asks for
+    (up to ``max_wait``). Client errors (bad request, auth, quota) and unknown
+    exceptions are not retried, and no wait may run past the deadline. Neither
+    counts as a failure for the circuit breaker: only outage-like errors do.
+    """
+
+    RULES = {"rate_limit": (3, 1.0), "server": (2, 0.5), "timeout": (1, 0.25), "connection": (2, 0.25),
+             "client": (0, 0.0), "unknown": (0, 0.0)}
+
+    def __init__(self, rules: Optional[Dict[str, Tuple[int, float]]] = None, max_wait: float = 20.0):
+        self.rules = {**self.RULES, **(rules or {})}
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"retries": 0, "gave_up": 0, "deadline_exceeded": 0, "errors": {}}
+
+    def wait(self, e: BaseException, attempt: int) -> Optional[float]:
+        """Seconds to wait before retry ``attempt + 1`` (None: give up)."""
+        kind = classify(e)
+        with self._lock:
+            self._stats["errors"][kind] = self._stats["errors"].get(kind, 0) + 1
+        retries, base = self.rules.get(kind, (0, 0.0))
+        left = remaining()
+        delay = None
+        if attempt < retries:
+            delay = retry_after(e) if kind == "rate_limit" else None
+            if delay is None:
+                delay = base * (2 ** attempt) * (0.5 + random.random())
+            delay = min(delay, self.max_wait)
+            if left is not None and delay >= left:
+                delay = None
+        with self._lock:
+            self._stats["retries" if delay is not None else "gave_up"] += 1
+        return delay
+
+    def note_deadline(self) -> None:
+        with self._lock:
+            self._stats["deadline_exceeded"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "errors": dict(self._stats["errors"])}
+
+
+def _counts_as_failure(e: BaseException) -> bool:
+    # A rejected request still means the service is up, and an unknown exception is
+    # more likely a bug on our side than an outage
+    return classify(e) not in ("client", "unknown")
+
+
+def _timeout(default: Optional[float], policy: RetryPolicy) -> Optional[float]:
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        policy.note_deadline()
+        raise DeadlineExceeded("graph run deadline exceeded")
+    return left if default is None else min(default, left)
+
+
+def call(fn: Callable[[Optional[float]], Any], breaker: CircuitBreaker, policy: RetryPolicy,
+         timeout: Optional[float] = None, sleep: Callable[[float], None] = time.sleep) -> Any:
+    """Run ``fn(timeout)`` under the breaker and retry policy; the timeout shrinks to fit the deadline."""
+    attempt = 0
+    while True:
+        t = _timeout(timeout, policy)
+        if not breaker.allow():
+            raise CircuitOpenError("LLM circuit open")
+        try:
+            out = fn(t)
+        except BaseException as e:
+            if not isinstance(e, Exception):
+                breaker.record(None)
+                raise
+            breaker.record(not _counts_as_failure(e))
+            delay = policy.wait(e, attempt)
+            if delay is None:
+                raise
+            sleep(delay)
+            attempt += 1
+            continue
+        breaker.record(True)
+        return out
+
+
+async def acall(fn: Callable[[Optional[float]], Awaitable[Any]], breaker: CircuitBreaker, policy: RetryPolicy,
+                timeout: Optional[float] = None) -> Any:
+    """``call`` for coroutines; a cancelled attempt releases its breaker slot without an outcome."""
+    attempt = 0
+    while True:
+        t = _timeout(timeout, policy)
+        if not breaker.allow():
+            raise CircuitOpenError("LLM circuit open")
+        try:
+            out = await fn(t)
+        except BaseException as e:
+            if not isinstance(e, Exception):
+                breaker.record(None)
+                raise
+            breaker.record(not _counts_as_failure(e))
+            delay = policy.wait(e, attempt)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        breaker.record(True)
+        return out
@@ -0,0 +1,97 @@
+import re
+import math
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_WORD = re.compile(r"\w+")
+
+
+class TokenCounter:
+    """Token counts with the model's tokenizer (tiktoken), or ~4 characters per token without it."""
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        self.model = model.split(":", 1)[1] if ":" in model else model
+        self._enc: Any = None
+        try:
+            import tiktoken
+            try:
+                self._enc = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self._enc = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            self._enc = None
+        self.exact = self._enc is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._enc is not None:
+            return len(self._enc.encode(text, disallowed_special=()))
+        return max(1, math.ceil(len(text) / 4))
+
+    def truncate(self, text: str, n: int) -> str:
+        if n <= 0:
+            return ""
+        if self._enc is not None:
+            ids = self._enc.encode(text, disallowed_special=())
+            return text if len(ids) <= n else self._enc.decode(ids[:n])
+        return text[:n * 4]
+
+
+def _bag(text: str) -> Tuple[Counter, float]:
+    c = Counter(w.lower() for w in _WORD.findall(text))
+    return c, math.sqrt(sum(v * v for v in c.values())) or 1.0
+
+
+def _cos(a: Tuple[Counter, float], b: Tuple[Counter, float]) -> float:
+    small, big = (a[0], b[0]) if len(a[0]) < len(b[0]) else (b[0], a[0])
+    return sum(v * big.get(w, 0) for w, v in small.items()) / (a[1] * b[1])
+
+
+def pack(hits: List[Any], budget: int, counter: TokenCounter, lam: float = 0.7, dup_threshold: float = 0.9,
+         sep: str = "\n---\n", similarity: Optional[Callable[[str, str], float]] = None) -> Tuple[str, Dict[str, Any]]:
+    """Join retrieval hits into a context block of at most ``budget`` tokens.
+
+    Hits (in relevance order) are picked MMR-style: each step takes the hit with the
+    best ``lam * relevance - (1 - lam) * max similarity to what is already picked``,
+    where relevance is by rank and similarity is word-count cosine. Hits at least
+    ``dup_threshold`` similar to a picked one are dropped as near-duplicates. Hits
+    that no longer fit are skipped; a first hit larger than the whole budget is cut.
+    """
+    texts = [str(h.get("text", "")) if isinstance(h, dict) else str(h) for h in hits]
+    texts = [t for t in texts if t.strip()]
+    bags = [_bag(t) for t in texts]
+    sim = (lambda i, j: similarity(texts[i], texts[j])) if similarity else (lambda i, j: _cos(bags[i], bags[j]))
+    n = len(texts)
+    rel = [1.0 - i / max(n, 1) for i in range(n)]
+    left = list(range(n))
+    chosen: List[int] = []
+    out: List[str] = []
+    used = dups = skipped = truncated = 0
+    sep_tokens = counter.count(sep)
+    while left:
+        best, best_score, best_sim = left[0], -math.inf, 0.0
+        for i in left:
+            s = max((sim(i, j) for j in chosen), default=0.0)
+            score = lam * rel[i] - (1.0 - lam) * s
+            if score > best_score:
+                best, best_score, best_sim = i, score, s
+        left.remove(best)
+        if best_sim >= dup_threshold:
+            dups += 1
+            continue
+        cost = counter.count(texts[best]) + (sep_tokens if out else 0)
+        if used + cost > budget:
+            if not out and budget > 0:
+                out.append(counter.truncate(texts[best], budget))
+                used = counter.count(out[0])
+                chosen.append(best)
+                truncated += 1
+            else:
+                skipped += 1
+            continue
+        out.append(texts[best])
+        chosen.append(best)
+        used += cost
+    return sep.join(out), {"hits": n, "kept": len(out), "duplicates": dups, "skipped": skipped,
+                           "truncated": truncated, "context_tokens": used}
@@ -0,0 +1,145 @@
+import os
+import copy
+import zlib
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class DocStore:
+    """Compressed raw chunk text in SQLite, keyed by point ID.
+
+    Vector payloads keep only a ``doc`` reference and small metadata; retrieval
+    decompresses just the final hits. Bodies are zlib by default; with
+    DOC_STORE_CODEC=zstd (and ``zstandard`` installed) they use zstd, with a
+    shared dictionary once ``train_dictionary`` has run, which is what makes
+    short chat-sized chunks compress well.
+
+    Rows are kept per ``scope`` (the physical collection or vector directory they
+    belong to), so one file can serve several collections and clearing one of them
+    leaves the others alone; ``scoped`` gives a view of the same file for another.
+    """
+
+    def __init__(self, path: str, codec: Optional[str] = None, level: int = 6, scope: str = ""):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.level = level
+        self.scope = scope
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            cols = [r[1] for r in self._db.execute("PRAGMA table_info(docs)")]
+            if cols and "scope" not in cols:
+                # Pre-scope layout: its rows go to the first scope that opens the file
+                self._db.execute("ALTER TABLE docs RENAME TO docs_unscoped")
+            self._db.execute("CREATE TABLE IF NOT EXISTS docs (scope TEXT NOT NULL, id TEXT NOT NULL, codec TEXT, "
+                             "raw INTEGER, body BLOB, PRIMARY KEY (scope, id))")
+            if cols and "scope" not in cols:
+                self._db.execute("INSERT OR IGNORE INTO docs SELECT ?, id, codec, raw, body FROM docs_unscoped", (scope,))
+                self._db.execute("DROP TABLE docs_unscoped")
+            self._db.execute("CREATE TABLE IF NOT EXISTS dicts (id INTEGER PRIMARY KEY, data BLOB)")
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        codec = (codec or os.getenv("DOC_STORE_CODEC", "zlib")).strip().lower()
+        self._zstd = None
+        if codec == "zstd":
+            try:
+                import zstandard
+                self._zstd = zstandard
+            except ImportError:
+                print("DocStore: zstandard not installed; using zlib")
+        self._dicts: Dict[int, object] = {}
+        self._dict_id: Optional[int] = None
+        if self._zstd is not None:
+            for did, data in self._db.execute("SELECT id, data FROM dicts ORDER BY id"):
+                self._dicts[did] = self._zstd.ZstdCompressionDict(data)
+                self._dict_id = did
+
+    def scoped(self, scope: str) -> "DocStore":
+        """The same file (connection, codec, dictionaries) seen through another scope."""
+        view = copy.copy(self)
+        view.scope = scope
+        return view
+
+    # codecs
+
+    def _compress(self, text: str) -> tuple:
+        raw = text.encode("utf-8")
+        if self._zstd is None:
+            return "zlib", zlib.compress(raw, self.level)
+        if self._dict_id is not None:
+            c = self._zstd.ZstdCompressor(level=self.level, dict_data=self._dicts[self._dict_id])
+            return f"zstd:{self._dict_id}", c.compress(raw)
+        return "zstd", self._zstd.ZstdCompressor(level=self.level).compress(raw)
+
+    def _decompress(self, codec: str, body: bytes) -> str:
+        if codec == "zlib":
+            return zlib.decompress(body).decode("utf-8")
+        if self._zstd is None:
+            import zstandard
+            self._zstd = zstandard
+        did = int(codec.split(":", 1)[1]) if ":" in codec else None
+        if did is not None and did not in self._dicts:
+            row = self._db.execute("SELECT data FROM dicts WHERE id=?", (did,)).fetchone()
+            self._dicts[did] = self._zstd.ZstdCompressionDict(row[0])
+        d = self._zstd.ZstdDecompressor(dict_data=self._dicts[did]) if did is not None else self._zstd.ZstdDecompressor()
+        return d.decompress(body).decode("utf-8")
+
+    def train_dictionary(self, samples: Optional[List[str]] = None, size: int = 64 * 1024) -> Optional[int]:
+        """Train a zstd dictionary from ``samples`` (default: up to 2000 stored docs); new writes use it."""
+        if self._zstd is None:
+            return None
+        if samples is None:
+            ids = [r[0] for r in self._db.execute("SELECT id FROM docs ORDER BY RANDOM() LIMIT 2000")]
+            samples = list(self.get_many(ids).values())
+        d = self._zstd.train_dictionary(size, [s.encode("utf-8") for s in samples])
+        with self._lock:
+            cur = self._db.execute("INSERT INTO dicts (data) VALUES (?)", (d.as_bytes(),))
+            self._dict_id = int(cur.lastrowid)  # type: ignore[arg-type]
+            self._dicts[self._dict_id] = d
+        return self._dict_id
+
+    # storage
+
+    def put_many(self, docs: Dict[str, str]) -> None:
+        rows = [(self.scope, pid, *self._compress(text), len(text.encode("utf-8"))) for pid, text in docs.items()]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO docs (scope, id, codec, body, raw) VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, str]:
+        ids = [str(i) for i in ids]
+        out: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                part = ids[i:i + 500]
+                q = f"SELECT id, codec, body FROM docs WHERE scope=? AND id IN ({','.join('?' * len(part))})"
+                rows = self._db.execute(q, [self.scope, *part]).fetchall()
+                for pid, codec, body in rows:
+                    out[pid] = self._decompress(codec, body)
+        return out
+
+    def delete_many(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM docs WHERE scope=? AND id=?", [(self.scope, str(i)) for i in ids])
+            self._db.execute("COMMIT")
+
+    def clear(self) -> None:
+        """Drop this scope's rows only."""
+        with self._lock:
+            self._db.execute("DELETE FROM docs WHERE scope=?", (self.scope,))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            n, raw, stored = self._db.execute("SELECT COUNT(*), COALESCE(SUM(raw), 0), COALESCE(SUM(LENGTH(body)), 0) "
+                                              "FROM docs WHERE scope=?", (self.scope,)).fetchone()
+        return {"scope": self.scope, "docs": n, "raw_bytes": raw, "stored_bytes": stored,
+                "ratio": round(raw / stored, 2) if stored else 0.0,
+                "codec": "zstd" if self._zstd is not None else "zlib", "dictionary": self._dict_id}
@@ -0,0 +1,197 @@
+import os
+import re
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, the disk tier is then single-process only
+    fcntl = None
+
+
+@contextmanager
+def _flock(path: str, exclusive: bool):
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def cache_key(model: str, text: str) -> str:
+    """Content address for an embedding: hash of model name and whitespace-normalized text."""
+    norm = re.sub(r"\s+", " ", text).strip()
+    return hashlib.sha1(f"{model}\x00{norm}".encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """Append-only float32 matrix on disk, read back through a memory map.
+
+    Layout under ``path``: ``vectors.f32`` (row-major float32) and ``keys.txt``
+    (one hex key per line, line number == row). Survives restarts. Several
+    processes may share a directory: appends hold an exclusive ``flock`` on
+    ``.lock`` and reloads a shared one, so row i of both files stays key i.
+    """
+
+    def __init__(self, path: str, dim: int):
+        self.dim = dim
+        os.makedirs(path, exist_ok=True)
+        self._vec_path = os.path.join(path, "vectors.f32")
+        self._key_path = os.path.join(path, "keys.txt")
+        self._lock_path = os.path.join(path, ".lock")
+        self._rows: Dict[str, int] = {}
+        self._n = 0  # rows loaded so far
+        self._key_off = 0  # bytes of keys.txt loaded so far
+        self._mm: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        with _flock(self._lock_path, exclusive=False):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _load(self) -> None:
+        """Pick up rows appended since the last load, by this or another process. Caller holds the flock."""
+        if not os.path.exists(self._key_path) or not os.path.exists(self._vec_path):
+            return
+        n_vec = os.path.getsize(self._vec_path) // (4 * self.dim)
+        with open(self._key_path, "rb") as f:
+            f.seek(self._key_off)
+            for line in f:
+                if not line.endswith(b"\n") or self._n >= n_vec:
+                    break  # torn write; ignore keys without a vector
+                self._rows.setdefault(line.decode("utf-8").strip(), self._n)
+                self._n += 1
+                self._key_off += len(line)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        row = self._rows.get(key)
+        with self._lock:
+            if row is None:
+                # Another process may have appended it since we last looked
+                if not os.path.exists(self._key_path) or os.path.getsize(self._key_path) == self._key_off:
+                    return None
+                with _flock(self._lock_path, exclusive=False):
+                    self._load()
+                row = self._rows.get(key)
+                if row is None:
+                    return None
+            if self._mm is None or self._mm.shape[0] <= row:
+                self._mm = np.memmap(self._vec_path, dtype=np.float32, mode="r", shape=(self._n, self.dim))
+            return np.array(self._mm[row])
+
+    def put_many(self, keys: Sequence[str], vecs: np.ndarray) -> None:
+        with self._lock, _flock(self._lock_path, exclusive=True):
+            self._load()
+            fresh = [(k, v) for k, v in zip(keys, vecs) if k not in self._rows]
+            if not fresh:
+                return
+            # Drop a torn tail left by a writer that died mid-append before adding rows after it
+            for p, size in ((self._vec_path, self._n * 4 * self.dim), (self._key_path, self._key_off)):
+                if os.path.exists(p) and os.path.getsize(p) > size:
+                    os.truncate(p, size)
+            blob = "".join(k + "\n" for k, _ in fresh).encode("utf-8")
+            with open(self._vec_path, "ab") as f:
+                f.write(np.asarray([v for _, v in fresh], dtype=np.float32).tobytes())
+            with open(self._key_path, "ab") as f:
+                f.write(blob)
+            for k, _ in fresh:
+                self._rows[k] = self._n
+                self._n += 1
+            self._key_off += len(blob)
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: in-memory LRU bounded by bytes, optional on-disk tier."""
+
+    def __init__(self, model: str, max_bytes: int = 64 * 1024 * 1024, disk_path: Optional[str] = None,
+                 dim: Optional[int] = None):
+        self.model = model
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        # Open the disk tier eagerly when the dimension is known so restarts hit it immediately
+        self._disk: Optional[DiskTier] = DiskTier(disk_path, dim) if disk_path and dim else None
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"hits": 0, "disk_hits": 0, "misses": 0, "encoded": 0, "encode_ms": 0.0}
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return
+            self._lru[key] = vec
+            self._bytes += vec.nbytes
+            while self._bytes > self.max_bytes and self._lru:
+                _, old = self._lru.popitem(last=False)
+                self._bytes -= old.nbytes
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self._stats["hits"] += 1
+                return vec
+        if self._disk is not None:
+            vec = self._disk.get(key)
+            if vec is not None:
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                self._remember(key, vec)
+                return vec
+        return None
+
+    def encode(self, texts: List[str], encoder: Callable[[List[str]], Any]) -> np.ndarray:
+        """Return embeddings for ``texts``, calling ``encoder`` only for uncached strings."""
+        keys = [cache_key(self.model, t) for t in texts]
+        out: List[Optional[np.ndarray]] = [self._lookup(k) for k in keys]
+        todo: Dict[str, List[int]] = {}
+        for i, v in enumerate(out):
+            if v is None:
+                todo.setdefault(keys[i], []).append(i)
+        if todo:
+            idx = [rows[0] for rows in todo.values()]
+            t0 = time.time()
+            vecs = np.asarray(encoder([texts[i] for i in idx]), dtype=np.float32)
+            with self._lock:
+                self._stats["misses"] += len(todo)
+                self._stats["encode_ms"] += (time.time() - t0) * 1000.0
+                self._stats["encoded"] += len(idx)
+            if self.disk_path and self._disk is None:
+                self._disk = DiskTier(self.disk_path, vecs.shape[1])
+            fresh_keys = list(todo.keys())
+            for key, row in zip(fresh_keys, vecs):
+                # Own copy: a row view would keep the whole batch matrix alive past its eviction
+                vec = row.copy()
+                self._remember(key, vec)
+                for i in todo[key]:
+                    out[i] = vec
+            if self._disk is not None:
+                self._disk.put_many(fresh_keys, vecs)
+        return np.stack(out) if out else np.zeros((0, 0), dtype=np.float32)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            st = dict(self._stats)
+            st["mem_entries"] = len(self._lru)
+            st["mem_bytes"] = self._bytes
+        hits = st["hits"] + st["disk_hits"]
+        total = hits + st["misses"]
+        st["hit_rate"] = round(hits / total, 3) if total else 0.0
+        per_item = st["encode_ms"] / st["encoded"] if st["encoded"] else 0.0
+        st["encode_ms_saved_est"] = round(hits * per_item, 1)
+        st["encode_ms"] = round(st["encode_ms"], 1)
+        st["disk_entries"] = len(self._disk) if self._disk is not None else 0
+        return st
@@ -0,0 +1,217 @@
+"""Embedding sidecar: one process owns the model, web workers encode over a Unix socket.
+
+    python embed_server.py --socket /tmp/jarvis-embed.sock      # EMBED_BACKEND picks the model runtime
+    EMBED_SOCKET=/tmp/jarvis-embed.sock python web_jarvis.py    # workers use it when it answers
+
+Wire format (network byte order, vectors little-endian float32):
+    request  := u32 n | u8 flags | n * (u32 len | utf-8 bytes)       flags reserved; vectors are always unit norm
+    response := u8 status | u32 n | u32 dim | u16 name_len | name | n*dim float32
+    error    := u8 status=1 | u32 len | utf-8 message
+A request with n = 0 is a handshake and returns just the model name and dim.
+"""
+import os
+import sys
+import socket
+import time
+import struct
+import argparse
+import threading
+import socketserver
+from typing import Any, List, Optional
+
+import numpy as np
+
+from microbatch import MicroBatcher
+
+DEFAULT_SOCKET = os.path.join("/tmp", "jarvis-embed.sock")
+MAX_TEXTS = 4096
+MAX_TEXT_BYTES = 1 << 20
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        part = sock.recv(n - len(buf))
+        if not part:
+            raise ConnectionError("embedding socket closed")
+        buf += part
+    return bytes(buf)
+
+
+def encode_request(texts: List[str], normalize: bool = True) -> bytes:
+    parts = [struct.pack("!IB", len(texts), int(normalize))]
+    for t in texts:
+        raw = t.encode("utf-8")
+        parts.append(struct.pack("!I", len(raw)))
+        parts.append(raw)
+    return b"".join(parts)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "EmbedServer"
+
+    def handle(self) -> None:
+        sock = self.request
+        while True:
+            try:
+                n, _flags = struct.unpack("!IB", _recv_exact(sock, 5))
+            except ConnectionError:
+                return
+            try:
+                if n > MAX_TEXTS:
+                    raise ValueError(f"too many texts ({n} > {MAX_TEXTS})")
+                texts = []
+                for _ in range(n):
+                    (ln,) = struct.unpack("!I", _recv_exact(sock, 4))
+                    if ln > MAX_TEXT_BYTES:
+                        raise ValueError(f"text too long ({ln} bytes)")
+                    texts.append(_recv_exact(sock, ln).decode("utf-8"))
+                vecs = self.server.encode(texts) if texts else np.zeros((0, self.server.dim), dtype=np.float32)
+                name = self.server.name.encode("utf-8")
+                sock.sendall(struct.pack("!BIIH", 0, len(texts), self.server.dim, len(name)) + name
+                             + np.ascontiguousarray(vecs, dtype="<f4").tobytes())
+            except (ValueError, UnicodeDecodeError) as e:
+                msg = str(e).encode("utf-8")
+                sock.sendall(struct.pack("!BI", 1, len(msg)) + msg)
+                return  # the stream may be out of sync; make the client reconnect
+            except ConnectionError:
+                return
+            except Exception as e:
+                msg = str(e).encode("utf-8")
+                sock.sendall(struct.pack("!BI", 1, len(msg)) + msg)
+
+
+class EmbedServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves ``embedder`` on ``path``; concurrent requests share batches via MicroBatcher."""
+
+    daemon_threads = True
+    # Every worker thread of every app process keeps its own connection; they all connect at boot
+    request_queue_size = 128
+
+    def __init__(self, path: str, embedder: Any, max_batch: int = 64, max_wait_ms: float = 3.0):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.embedder = embedder
+        self.name = str(getattr(embedder, "name", "unknown"))
+        self.dim = int(embedder.get_sentence_embedding_dimension())
+        self._batcher = MicroBatcher(lambda xs: embedder.encode(xs, normalize_embeddings=True), max_batch, max_wait_ms)
+        super().__init__(path, _Handler)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self._batcher.encode(texts)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)  # type: ignore[arg-type]
+        except OSError:
+            pass
+
+
+class RemoteEmbedder:
+    """Embedder interface backed by the sidecar; one persistent connection per thread."""
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self.name, self._dim = self._handshake()
+
+    def _conn(self) -> socket.socket:
+        s = getattr(self._local, "sock", None)
+        if s is None:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            s.settimeout(self.timeout)
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    s.connect(self.path)
+                    break
+                except BlockingIOError:
+                    # Listen backlog full (a burst of new clients): retry until the server accepts
+                    if time.monotonic() >= deadline:
+                        s.close()
+                        raise
+                    time.sleep(0.01)
+            self._local.sock = s
+        return s
+
+    def _drop(self) -> None:
+        s = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if s is not None:
+            try:
+                s.close()
+            except OSError:
+                pass
+
+    def _call(self, texts: List[str], normalize: bool = True) -> tuple:
+        for attempt in (0, 1):
+            try:
+                s = self._conn()
+                s.sendall(encode_request(texts, normalize))
+                status = _recv_exact(s, 1)[0]
+                if status:
+                    (ln,) = struct.unpack("!I", _recv_exact(s, 4))
+                    msg = _recv_exact(s, ln).decode("utf-8", "replace")
+                    self._drop()
+                    raise RuntimeError(f"embed server: {msg}")
+                n, dim, ln = struct.unpack("!IIH", _recv_exact(s, 10))
+                name = _recv_exact(s, ln).decode("utf-8")
+                vecs = np.frombuffer(_recv_exact(s, n * dim * 4), dtype="<f4").reshape(n, dim)
+                return name, dim, vecs.astype(np.float32)
+            except (OSError, ConnectionError):
+                # Stale keep-alive connection (server restarted): reconnect once
+                self._drop()
+                if attempt:
+                    raise
+        raise ConnectionError("unreachable")
+
+    def _handshake(self) -> tuple:
+        name, dim, _ = self._call([])
+        return name, dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dim
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = True, **kw: Any) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self._dim), dtype=np.float32)
+        return self._call(list(texts), normalize_embeddings)[2]
+
+
+def connect(path: Optional[str] = None) -> Optional[RemoteEmbedder]:
+    """RemoteEmbedder for EMBED_SOCKET if the sidecar answers, else None."""
+    path = path if path is not None else os.getenv("EMBED_SOCKET", "").strip()
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return RemoteEmbedder(path, float(os.getenv("EMBED_SOCKET_TIMEOUT", "30")))
+    except Exception as e:
+        print(f"Embedding sidecar at {path} unavailable ({e}); loading the model in-process")
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve embeddings over a Unix socket")
+    parser.add_argument("--socket", default=os.getenv("EMBED_SOCKET", DEFAULT_SOCKET))
+    parser.add_argument("--backend", default=None, help="sentence-transformers | onnx (default: EMBED_BACKEND)")
+    parser.add_argument("--max-batch", type=int, default=int(os.getenv("EMBED_BATCH_MAX", "64")))
+    parser.add_argument("--max-wait-ms", type=float, default=float(os.getenv("EMBED_BATCH_WAIT_MS", "3")))
+    args = parser.parse_args()
+    from embedders import get_embedder
+    server = EmbedServer(args.socket, get_embedder(args.backend, remote=False),
+                         args.max_batch, args.max_wait_ms)
+    os.chmod(args.socket, 0o660)
+    print(f"Embedding {server.name} (dim {server.dim}) on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Embedding backends behind one interface.
+
+Every backend exposes ``name`` (used in cache keys), ``get_sentence_embedding_dimension()``
+and ``encode(texts, normalize_embeddings=True)`` returning a float32 matrix, which is
+the subset of SentenceTransformer the rest of the code relies on. EMBED_BACKEND picks
+``sentence-transformers`` (default) or ``onnx``; with EMBED_SOCKET set, the shared
+sidecar in embed_server.py is used instead when it answers.
+
+    python embedders.py export --out .jarvis/onnx/bge-small-int8   # one-off, needs torch
+"""
+import os
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"
+DEFAULT_ONNX_DIR = os.path.join(".jarvis", "onnx", "bge-small-int8")
+
+
+class SentenceTransformerEmbedder:
+    """The original torch backend."""
+
+    def __init__(self, model: str = DEFAULT_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.name = model
+        self._m = SentenceTransformer(model)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self._m.get_sentence_embedding_dimension())
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = True, batch_size: int = 32, **kw: Any) -> np.ndarray:
+        return np.asarray(self._m.encode(texts, normalize_embeddings=normalize_embeddings, batch_size=batch_size, **kw),
+                          dtype=np.float32)
+
+
+class OnnxEmbedder:
+    """ONNX Runtime on CPU over an (int8-quantized) export of the same model; no torch at runtime.
+
+    ``model_dir`` holds ``model.onnx`` (or ``model_int8.onnx``) and ``tokenizer.json``
+    as written by ``export_onnx``. Pooling is the CLS token, as bge models are trained.
+    """
+
+    def __init__(self, model_dir: str = DEFAULT_ONNX_DIR, max_length: int = 512, threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        path = os.path.join(model_dir, "model_int8.onnx")
+        if not os.path.exists(path):
+            path = os.path.join(model_dir, "model.onnx")
+        meta = {}
+        if os.path.exists(os.path.join(model_dir, "jarvis_export.json")):
+            with open(os.path.join(model_dir, "jarvis_export.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        self.name = f"{meta.get('model', os.path.basename(model_dir))}+onnx{'-int8' if path.endswith('_int8.onnx') else ''}"
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self._sess = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self._inputs = [i.name for i in self._sess.get_inputs()]
+        self._tok = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tok.enable_truncation(max_length=max_length)
+        self._tok.enable_padding(pad_id=self._tok.token_to_id("[PAD]") or 0)
+        self._dim = int(meta.get("dim") or self._sess.get_outputs()[0].shape[-1])
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dim
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = True, batch_size: int = 32, **kw: Any) -> np.ndarray:
+        out = np.zeros((len(texts), self._dim), dtype=np.float32)
+        # Length-sorted batches keep padding (and wasted FLOPs) small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for s in range(0, len(order), batch_size):
+            idx = order[s:s + batch_size]
+            enc = self._tok.encode_batch([texts[i] for i in idx])
+            feed = {
+                "input_ids": np.array([e.ids for e in enc], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in enc], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in enc], dtype=np.int64),
+            }
+            hidden = self._sess.run(None, {k: v for k, v in feed.items() if k in self._inputs})[0]
+            out[idx] = hidden[:, 0]
+        if normalize_embeddings:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out
+
+
+def get_embedder(backend: Optional[str] = None, model: str = DEFAULT_MODEL, remote: bool = True) -> Any:
+    """Embedder for EMBED_BACKEND (``sentence-transformers`` | ``onnx``).
+
+    With ``remote`` (the default) an answering EMBED_SOCKET sidecar wins, so workers share its model.
+    """
+    if remote:
+        from embed_server import connect
+        shared = connect()
+        if shared is not None:
+            return shared
+    backend = (backend or os.getenv("EMBED_BACKEND", "sentence-transformers")).strip().lower()
+    if backend == "onnx":
+        threads = int(os.getenv("ONNX_THREADS", "0")) or None
+        return OnnxEmbedder(os.getenv("ONNX_MODEL_DIR", DEFAULT_ONNX_DIR), threads=threads)
+    if backend in ("sentence-transformers", "st", "torch"):
+        return SentenceTransformerEmbedder(model)
+    raise ValueError(f"unknown EMBED_BACKEND {backend!r}")
+
+
+def check_equivalence(reference: Any, candidate: Any, texts: List[str], min_cosine: float = 0.98) -> Dict[str, Any]:
+    """Compare two embedders on ``texts``: per-text cosine and nearest-neighbour agreement."""
+    a = reference.encode(texts, normalize_embeddings=True)
+    b = candidate.encode(texts, normalize_embeddings=True)
+    cos = np.sum(a * b, axis=1)
+    # Same neighbour for each text (excluding itself) under both embeddings
+    sa, sb = a @ a.T, b @ b.T
+    np.fill_diagonal(sa, -np.inf); np.fill_diagonal(sb, -np.inf)
+    agree = float(np.mean(sa.argmax(axis=1) == sb.argmax(axis=1))) if len(texts) > 1 else 1.0
+    return {"texts": len(texts), "min_cosine": round(float(cos.min()), 4), "mean_cosine": round(float(cos.mean()), 4),
+            "neighbour_agreement": round(agree, 3), "ok": bool(cos.min() >= min_cosine)}
+
+
+def export_onnx(model: str = DEFAULT_MODEL, out_dir: str = DEFAULT_ONNX_DIR, quantize: bool = True,
+                opset: int = 14) -> Dict[str, Any]:
+    """Export ``model`` to ONNX (and an int8 dynamic-quantized copy) plus its tokenizer."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    os.makedirs(out_dir, exist_ok=True)
+    tok = AutoTokenizer.from_pretrained(model)
+    net = AutoModel.from_pretrained(model).eval()
+    enc = tok(["export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in enc]
+    fp32 = os.path.join(out_dir, "model.onnx")
+    axes = {n: {0: "batch", 1: "seq"} for n in names + ["last_hidden_state"]}
+    with torch.no_grad():
+        torch.onnx.export(net, tuple(enc[n] for n in names), fp32, input_names=names,
+                          output_names=["last_hidden_state"], dynamic_axes=axes, opset_version=opset)
+    tok.save_pretrained(out_dir)
+    out: Dict[str, Any] = {"model": model, "dim": int(net.config.hidden_size), "onnx": fp32}
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8 = os.path.join(out_dir, "model_int8.onnx")
+        quantize_dynamic(fp32, int8, weight_type=QuantType.QInt8)
+        out["onnx_int8"] = int8
+    with open(os.path.join(out_dir, "jarvis_export.json"), "w", encoding="utf-8") as f:
+        json.dump(out, f)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embedding backend utilities")
+    sub = parser.add_subparsers(dest="cmd")
+    p = sub.add_parser("export", help="export the model to ONNX and quantize it to int8")
+    p.add_argument("--model", default=DEFAULT_MODEL)
+    p.add_argument("--out", default=DEFAULT_ONNX_DIR)
+    p.add_argument("--no-quantize", action="store_true")
+    p = sub.add_parser("check", help="compare the ONNX backend against sentence-transformers")
+    p.add_argument("--texts", default=None, help="file with one sample text per line")
+    args = parser.parse_args()
+    if args.cmd == "export":
+        out = export_onnx(args.model, args.out, quantize=not args.no_quantize)
+    elif args.cmd == "check":
+        texts = [l.strip() for l in open(args.texts, encoding="utf-8") if l.strip()] if args.texts else [
+            "Pay the electricity bill before Friday.", "Remind me to call mum on Sunday.",
+            "What did we decide about the roof repair budget?", "Gate code for the storage unit is 5521-9087.",
+            "Summarise last week's grocery spending.", "Schedule a dentist appointment next month.",
+        ]
+        out = check_equivalence(get_embedder("sentence-transformers", remote=False), get_embedder("onnx", remote=False), texts)
+    else:
+        parser.print_help()
+        sys.exit(2)
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+MONTH_SEC = 30 * 24 * 3600.0
+
+
+class Hedger:
+    """Hedged requests: a second identical call once the first is slower than usual.
+
+    The hedge delay is the ``percentile`` of recent successful call latencies
+    (no hedging until ``min_samples`` are in). Whichever call succeeds first wins
+    and the other is cancelled. Hedges are capped at ``max_rate`` of calls and,
+    with a ``budget_usd``, to what the budget leaves over the projected monthly
+    spend without hedging: a hedge rate r costs roughly (1 + r) times that, so
+    r <= budget / projection - 1. Spend is estimated from token usage at
+    ``price_in`` / ``price_out`` USD per million tokens, since process start.
+    """
+
+    def __init__(self, percentile: float = 0.9, min_samples: int = 20, max_rate: float = 0.1,
+                 budget_usd: Optional[float] = None, price_in: float = 0.15, price_out: float = 0.60,
+                 window: int = 200, min_delay: float = 0.05):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_rate = max_rate
+        self.budget_usd = budget_usd
+        self.price_in = price_in
+        self.price_out = price_out
+        self.min_delay = min_delay
+        self._lock = threading.Lock()
+        self._lat: "deque[float]" = deque(maxlen=window)
+        self._recent: "deque[bool]" = deque(maxlen=window)
+        self._t0 = time.time()
+        self._spend = {"primary": 0.0, "hedge": 0.0}
+        self._stats = {"calls": 0, "hedges_fired": 0, "hedge_wins": 0, "primary_wins": 0,
+                       "suppressed_rate": 0, "suppressed_budget": 0}
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._lat.append(seconds)
+
+    def delay(self) -> Optional[float]:
+        with self._lock:
+            if len(self._lat) < self.min_samples:
+                return None
+            lat = sorted(self._lat)
+        return max(self.min_delay, lat[min(len(lat) - 1, int(self.percentile * len(lat)))])
+
+    def charge(self, usage: Any, hedged: bool = False) -> None:
+        """Add a call's cost; a hedged call also pays (about) as much again for the other request."""
+        if usage is None:
+            return
+        cost = (getattr(usage, "prompt_tokens", 0) or 0) * self.price_in / 1e6 \
+            + (getattr(usage, "completion_tokens", 0) or 0) * self.price_out / 1e6
+        with self._lock:
+            self._spend["primary"] += cost
+            if hedged:
+                self._spend["hedge"] += cost
+
+    def _projected(self) -> float:
+        # At least an hour of history, so a burst at boot does not read as a monthly rate
+        elapsed = max(time.time() - self._t0, 3600.0)
+        return self._spend["primary"] / elapsed * MONTH_SEC
+
+    def _rate_cap(self) -> float:
+        if not self.budget_usd:
+            return self.max_rate
+        projected = self._projected()
+        if projected <= 0:
+            return self.max_rate
+        return max(0.0, min(self.max_rate, self.budget_usd / projected - 1.0))
+
+    def _admit(self) -> bool:
+        with self._lock:
+            cap = self._rate_cap()
+            fired = sum(self._recent) + 1
+            if fired / (len(self._recent) + 1) <= cap:
+                return True
+            self._stats["suppressed_budget" if cap < self.max_rate else "suppressed_rate"] += 1
+            return False
+
+    async def run(self, make_call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of the first call to succeed, and whether a hedge was fired."""
+        delay = self.delay()
+        started = {}
+        first = asyncio.ensure_future(make_call())
+        started[first] = time.monotonic()
+        tasks = [first]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({first}, timeout=delay)
+                if not done and self._admit():
+                    second = asyncio.ensure_future(make_call())
+                    started[second] = time.monotonic()
+                    tasks.append(second)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.index):
+                    if task.exception() is None:
+                        self._finish(len(tasks) > 1, task is not first, time.monotonic() - started[task])
+                        return task.result(), len(tasks) > 1
+            self._finish(len(tasks) > 1, False, None)
+            raise first.exception()  # type: ignore[misc]
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _finish(self, fired: bool, hedge_won: bool, seconds: Optional[float]) -> None:
+        with self._lock:
+            self._stats["calls"] += 1
+            self._recent.append(fired)
+            if fired:
+                self._stats["hedges_fired"] += 1
+            if seconds is not None:
+                if fired:
+                    self._stats["hedge_wins" if hedge_won else "primary_wins"] += 1
+                self._lat.append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        d = self.delay()
+        with self._lock:
+            st = dict(self._stats)
+            st["hedge_rate"] = round(sum(self._recent) / len(self._recent), 3) if self._recent else 0.0
+            st["rate_cap"] = round(self._rate_cap(), 3)
+            st["delay_ms"] = round(d * 1000.0, 1) if d is not None else None
+            st["spend_usd"] = round(self._spend["primary"] + self._spend["hedge"], 6)
+            st["hedge_spend_usd"] = round(self._spend["hedge"], 6)
+            st["projected_monthly_usd"] = round(self._projected(), 2)
+            st["budget_usd"] = self.budget_usd
+        return st
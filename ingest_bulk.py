@@ -0,0 +1,88 @@
+import os
+import glob
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from chunking import iter_file_chunks
+
+DEFAULT_EXTS = ".md,.markdown,.txt,.rst,.csv,.json,.log"
+
+
+def expand_paths(path: str, pattern: Optional[str] = None) -> List[str]:
+    """Resolve a directory (walked recursively, filtered by extension or ``pattern``) or a glob."""
+    if os.path.isdir(path):
+        if pattern:
+            found = glob.glob(os.path.join(path, pattern), recursive=True)
+        else:
+            exts = tuple(e.strip().lower() for e in os.getenv("INGEST_BULK_EXTS", DEFAULT_EXTS).split(",") if e.strip())
+            found = [os.path.join(root, f) for root, _, files in os.walk(path)
+                     for f in files if f.lower().endswith(exts)]
+    else:
+        found = glob.glob(path, recursive=True)
+    return sorted(p for p in found if os.path.isfile(p))
+
+
+def read_file_chunks(path: str) -> Tuple[str, List[str], int]:
+    """Process-pool worker: read and chunk one file. Kept import-light for spawn."""
+    return path, list(iter_file_chunks(path)), os.path.getsize(path)
+
+
+def ingest_paths(paths: List[str], workers: Optional[int] = None, batch_size: int = 128,
+                 upsert_workers: int = 4) -> Dict[str, Any]:
+    """Bulk-ingest many files.
+
+    Reading and chunking fan out over a process pool; chunks from all files are
+    funnelled into one batched embedding stage in this process, and the resulting
+    point batches are upserted by a small thread pool while the next batch encodes.
+    """
+    import main_graph as mg
+    mg._ensure_retrieval_ready()
+    t0 = time.time()
+    st: Dict[str, Any] = {"files": 0, "chunks": 0, "new_chunks": 0, "bytes": 0, "errors": []}
+    buf: List[Tuple[str, str, Optional[Dict[str, Any]]]] = []
+    inflight: List[Future] = []
+
+    def _drain(limit: int) -> None:
+        while len(inflight) > limit:
+            inflight.pop(0).result()
+
+    def _flush(up: ThreadPoolExecutor) -> None:
+        pts = mg._prepare_points(buf)
+        buf.clear()
+        if pts:
+            st["new_chunks"] += len(pts)
+            inflight.append(up.submit(mg._write_points, pts))
+            _drain(upsert_workers * 2)
+
+    workers = workers or max(1, min(8, (os.cpu_count() or 2) - 1))
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool, \
+            ThreadPoolExecutor(max_workers=upsert_workers) as up:
+        futs = [pool.submit(read_file_chunks, p) for p in paths]
+        for fut in as_completed(futs):
+            try:
+                path, chunks, size = fut.result()
+            except Exception as e:
+                st["errors"].append(str(e))
+                continue
+            src = f"file:{os.path.abspath(path)}"
+            st["files"] += 1
+            st["bytes"] += size
+            st["chunks"] += len(chunks)
+            for c in chunks:
+                buf.append((c, src, None))
+                if len(buf) >= batch_size:
+                    _flush(up)
+        if buf:
+            _flush(up)
+        _drain(0)
+    dt = max(time.time() - t0, 1e-9)
+    st.update({
+        "seconds": round(dt, 3),
+        "files_per_sec": round(st["files"] / dt, 2),
+        "chunks_per_sec": round(st["chunks"] / dt, 1),
+        "mb_per_sec": round(st["bytes"] / dt / 1e6, 3),
+    })
+    return st
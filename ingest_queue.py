@@ -0,0 +1,213 @@
+import os
+import queue
+import threading
+import time
+import atexit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Item = Tuple[str, str, Optional[Dict[str, Any]]]
+_STOP = object()  # queued by close() after the drain; the worker exits when it reaches it
+
+
+class IngestQueue:
+    """Bounded in-process ingest queue drained by a single background worker.
+
+    The worker coalesces whatever is pending (up to ``batch_max`` items) into one
+    ``sink`` call so encoding and upserts happen in batches, off the request path.
+    Policies when full: ``drop_oldest`` (default), ``drop_new`` or ``block``
+    (wait up to ``block_timeout`` seconds, then drop the new item).
+    """
+
+    def __init__(self, sink: Callable[[List[Item]], Any], maxsize: int = 1000, batch_max: int = 64,
+                 policy: str = "drop_oldest", block_timeout: float = 0.5):
+        self._sink = sink
+        self._q: "queue.Queue[Tuple[float, Item]]" = queue.Queue(maxsize=maxsize)
+        self._batch_max = max(1, batch_max)
+        self._policy = policy
+        self._block_timeout = block_timeout
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats: Dict[str, Any] = {
+            "enqueued": 0, "dropped": 0, "batches": 0, "ingested": 0, "errors": 0,
+            "max_depth": 0, "last_lag_ms": 0.0, "max_lag_ms": 0.0, "last_error": "",
+        }
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="ingest-worker", daemon=True)
+                self._worker.start()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def submit(self, txt: str, src: str = "adhoc", meta: Optional[Dict[str, Any]] = None) -> bool:
+        """Enqueue one text; returns False when it was dropped."""
+        if self._closed:
+            return False
+        self._start()
+        entry = (time.time(), (txt, src, meta))
+        try:
+            if self._policy == "block":
+                self._q.put(entry, timeout=self._block_timeout)
+            else:
+                self._q.put_nowait(entry)
+        except queue.Full:
+            if self._policy != "drop_oldest":
+                self._count("dropped")
+                return False
+            try:
+                self._q.get_nowait()
+                self._q.task_done()
+                self._count("dropped")
+            except queue.Empty:
+                pass
+            try:
+                self._q.put_nowait(entry)
+            except queue.Full:
+                self._count("dropped")
+                return False
+        depth = self._q.qsize()
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+            self._stats["max_depth"] = max(self._stats["max_depth"], depth)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._q.get()]
+            while len(batch) < self._batch_max and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            try:
+                if len(batch) > stop:
+                    self._ingest(batch[:-1] if stop else batch)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+            if stop:
+                return
+
+    def _ingest(self, batch: List[Tuple[float, Item]]) -> None:
+        try:
+            self._sink([item for _, item in batch])
+            self._count("ingested", len(batch))
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["errors"] += 1
+                self._stats["last_error"] = str(e)
+        lag_ms = (time.time() - batch[0][0]) * 1000.0
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["last_lag_ms"] = round(lag_ms, 1)
+            self._stats["max_lag_ms"] = round(max(self._stats["max_lag_ms"], lag_ms), 1)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued item has been handed to the sink."""
+        deadline = time.time() + timeout
+        while self._q.unfinished_tasks:
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 5.0) -> bool:
+        """Stop accepting new items, drain what is pending, then stop the worker and join it.
+
+        Returns False when that did not finish within ``timeout``. Items still queued
+        then are discarded (counted as ``dropped`` and reported); the batch already
+        in the sink is left to finish.
+        """
+        deadline = time.time() + timeout
+        self._closed = True
+        drained = self.flush(timeout)
+        if not drained:
+            left = 0
+            while True:
+                try:
+                    self._q.get_nowait()
+                except queue.Empty:
+                    break
+                self._q.task_done()
+                left += 1
+            if left:
+                self._count("dropped", left)
+                print(f"Ingest queue closed with {left} item(s) not ingested")
+        with self._lock:
+            worker = self._worker
+        if worker is not None and worker.is_alive():
+            try:
+                self._q.put_nowait(_STOP)
+            except queue.Full:
+                pass
+            worker.join(max(0.0, deadline - time.time()))
+            drained = drained and not worker.is_alive()
+        return drained
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the worker to exit after ``close``; True when it has."""
+        with self._lock:
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+        return worker is None or not worker.is_alive()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            out = dict(self._stats)
+        out["depth"] = self._q.qsize()
+        out["policy"] = self._policy
+        return out
+
+
+_default: Optional[IngestQueue] = None
+_default_lock = threading.Lock()
+
+
+def _sink(items: List[Item]) -> Any:
+    # Lazy import: main_graph imports this module
+    from main_graph import ingest_batch
+    return ingest_batch(items)
+
+
+def get_queue() -> IngestQueue:
+    """Process-wide queue configured from env; flushed on interpreter shutdown."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = IngestQueue(
+                _sink,
+                maxsize=int(os.getenv("INGEST_QUEUE_MAX", "1000")),
+                batch_max=int(os.getenv("INGEST_BATCH_MAX", "64")),
+                policy=os.getenv("INGEST_DROP_POLICY", "drop_oldest"),
+                block_timeout=float(os.getenv("INGEST_BLOCK_TIMEOUT_SEC", "0.5")),
+            )
+            atexit.register(shutdown)
+        return _default
+
+
+def submit(txt: str, src: str = "adhoc", meta: Optional[Dict[str, Any]] = None) -> bool:
+    return get_queue().submit(txt, src, meta)
+
+
+def shutdown(timeout: Optional[float] = None) -> bool:
+    """Drain the queue and stop its worker at shutdown; safe to call more than once."""
+    if _default is None:
+        return True
+    if timeout is None:
+        timeout = float(os.getenv("INGEST_FLUSH_TIMEOUT_SEC", "5"))
+    ok = _default.close(timeout)
+    # A daemon worker frozen mid-batch (e.g. inside an import) when the interpreter
+    # finalizes can deadlock it, so let the batch in flight finish first
+    _default.join(float(os.getenv("INGEST_EXIT_WAIT_SEC", "60")))
+    return ok
+
+
+def stats() -> Dict[str, Any]:
+    return _default.stats() if _default is not None else {"depth": 0, "enqueued": 0}
@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from chunking import iter_file_chunks
+from ingest_bulk import expand_paths
+
+MANIFEST_DIR = os.getenv("INGEST_MANIFEST_DIR", os.path.join(".jarvis", "manifests"))
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def manifest_path_for(root: str) -> str:
+    key = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(MANIFEST_DIR, f"{key}.json")
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}}
+
+
+def save_manifest(path: str, manifest: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def sync_directory(root: str, pattern: Optional[str] = None, manifest_path: Optional[str] = None,
+                   dry_run: bool = False) -> Dict[str, Any]:
+    """Bring vector memory in line with a directory, doing work proportional to the diff.
+
+    The manifest records (size, mtime, sha256, point IDs) per file. Files whose
+    size and mtime are unchanged are skipped without reading; touched files are
+    re-hashed; changed files are re-ingested (unchanged chunks keep their
+    deterministic IDs and are not re-embedded) and their stale points deleted;
+    files that disappeared have all their points deleted.
+    """
+    import main_graph as mg
+    t0 = time.time()
+    manifest_path = manifest_path or manifest_path_for(root)
+    manifest = load_manifest(manifest_path)
+    old: Dict[str, Dict[str, Any]] = manifest.get("files", {})
+    new: Dict[str, Dict[str, Any]] = {}
+    st: Dict[str, Any] = {"scanned": 0, "unchanged": 0, "added": 0, "changed": 0, "removed": 0,
+                          "new_chunks": 0, "deleted_points": 0, "errors": []}
+
+    for path in expand_paths(root, pattern):
+        path = os.path.abspath(path)
+        st["scanned"] += 1
+        try:
+            s = os.stat(path)
+            prev = old.get(path)
+            if prev and prev["size"] == s.st_size and prev["mtime"] == s.st_mtime:
+                new[path] = prev; st["unchanged"] += 1
+                continue
+            digest = _file_hash(path)
+            if prev and prev["sha256"] == digest:
+                new[path] = {**prev, "mtime": s.st_mtime}; st["unchanged"] += 1
+                continue
+            st["changed" if prev else "added"] += 1
+            if dry_run:
+                new[path] = prev or {}
+                continue
+            src = f"file:{path}"
+            ids: List[str] = []
+            def _chunks() -> Iterator[str]:
+                for c in iter_file_chunks(path):
+                    ids.append(mg.point_id(src, c))
+                    yield c
+            res = mg.ingest_stream(_chunks(), src=src)
+            st["new_chunks"] += res["new_chunks"]
+            if prev:
+                keep = set(ids)
+                st["deleted_points"] += mg.delete_points([i for i in prev.get("ids", []) if i not in keep])
+            new[path] = {"size": s.st_size, "mtime": s.st_mtime, "sha256": digest, "ids": ids}
+        except Exception as e:
+            st["errors"].append(f"{path}: {e}")
+            if path in old:
+                new[path] = old[path]
+
+    for path, prev in old.items():
+        if path not in new:
+            st["removed"] += 1
+            if not dry_run:
+                st["deleted_points"] += mg.delete_points(prev.get("ids", []))
+
+    if not dry_run:
+        save_manifest(manifest_path, {"root": os.path.abspath(root), "synced_at": time.time(), "files": new})
+    st["seconds"] = round(time.time() - t0, 3)
+    st["dry_run"] = dry_run
+    return st
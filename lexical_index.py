@@ -0,0 +1,132 @@
+import os
+import re
+import gzip
+import json
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+(?:[-_.@/]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; joined forms like ``4417-1234`` are kept alongside their parts."""
+    out: List[str] = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        out.append(tok)
+        if not tok.isalnum():
+            out.extend(p for p in re.split(r"[-_.@/]", tok) if p)
+    return out
+
+
+def rrf_merge(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Reciprocal rank fusion of several ranked ID lists."""
+    scores: Dict[str, float] = {}
+    for ranked in rankings:
+        for rank, pid in enumerate(ranked):
+            scores[pid] = scores.get(pid, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+class BM25Index:
+    """In-process BM25 inverted index keyed by point ID.
+
+    Stores term frequencies (not raw text) plus a little filterable metadata, and
+    persists to a gzipped JSON file so startup only rebuilds postings in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[str, Tuple[int, Dict[str, int], Dict[str, Any]]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_len = 0
+        self._lock = threading.RLock()
+        self.dirty = False
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, pid: str, text: str, meta: Optional[Dict[str, Any]] = None) -> None:
+        tf: Dict[str, int] = {}
+        for t in tokenize(text):
+            tf[t] = tf.get(t, 0) + 1
+        with self._lock:
+            self._remove(pid)
+            self._index(pid, sum(tf.values()), tf, meta or {})
+            self.dirty = True
+
+    def _index(self, pid: str, n: int, tf: Dict[str, int], meta: Dict[str, Any]) -> None:
+        self._docs[pid] = (n, tf, meta)
+        self._total_len += n
+        for t, c in tf.items():
+            self._postings.setdefault(t, {})[pid] = c
+
+    def _remove(self, pid: str) -> bool:
+        doc = self._docs.pop(pid, None)
+        if doc is None:
+            return False
+        n, tf, _ = doc
+        self._total_len -= n
+        for t in tf:
+            plist = self._postings.get(t)
+            if plist is not None:
+                plist.pop(pid, None)
+                if not plist:
+                    del self._postings[t]
+        return True
+
+    def remove(self, pid: str) -> None:
+        with self._lock:
+            if self._remove(pid):
+                self.dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._docs.clear(); self._postings.clear(); self._total_len = 0
+            self.dirty = True
+
+    def search(self, query: str, k: int = 10,
+               filt: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Tuple[str, float]]:
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            avg = self._total_len / n_docs
+            scores: Dict[str, float] = {}
+            for t in set(tokenize(query)):
+                plist = self._postings.get(t)
+                if not plist:
+                    continue
+                idf = math.log(1.0 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+                for pid, c in plist.items():
+                    dl = self._docs[pid][0]
+                    scores[pid] = scores.get(pid, 0.0) + idf * c * (self.k1 + 1) / (c + self.k1 * (1 - self.b + self.b * dl / avg))
+            if filt is not None:
+                scores = {pid: s for pid, s in scores.items() if filt(self._docs[pid][2])}
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            data = {pid: [n, tf, meta] for pid, (n, tf, meta) in self._docs.items()}
+            self.dirty = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "docs": data}, f)
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> None:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            self._docs.clear(); self._postings.clear(); self._total_len = 0
+            for pid, (n, tf, meta) in data.get("docs", {}).items():
+                self._index(pid, n, tf, meta)
+            self.dirty = False
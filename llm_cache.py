@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+def exact_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """LLM JSON responses in SQLite, matched exactly or by goal similarity.
+
+    The exact level is keyed on model + full prompt. The semantic level compares
+    the goal's embedding with cached goals of the same model, kind (``plan`` /
+    ``decide``) and context ``fingerprint``, so a paraphrased question only reuses
+    an answer that was produced from the same retrieved context. Entries expire
+    after ``ttl`` seconds; beyond ``max_entries`` the least recently used go.
+    """
+
+    def __init__(self, path: str = ":memory:", ttl: float = 900.0, max_entries: int = 5000, threshold: float = 0.95):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, model TEXT, kind TEXT, "
+                         "fingerprint TEXT, vec BLOB, response TEXT, created REAL, last_used REAL, latency_ms REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_scope ON entries (model, kind, fingerprint)")
+        self._db.commit()
+        self._stats: Dict[str, Any] = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "expired": 0,
+                                       "evictions": 0, "saved_ms": 0.0}
+
+    def _hit(self, key: str, latency_ms: float, level: str) -> None:
+        self._db.execute("UPDATE entries SET last_used=? WHERE key=?", (time.time(), key))
+        self._db.commit()
+        self._stats[f"{level}_hits"] += 1
+        self._stats["saved_ms"] += latency_ms or 0.0
+
+    def get_exact(self, model: str, prompt: str) -> Optional[Dict[str, Any]]:
+        key = exact_key(model, prompt)
+        with self._lock:
+            row = self._db.execute("SELECT response, created, latency_ms FROM entries WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] > self.ttl:
+                self._db.execute("DELETE FROM entries WHERE key=?", (key,))
+                self._db.commit()
+                self._stats["expired"] += 1
+                return None
+            self._hit(key, row[2], "exact")
+        return json.loads(row[0])
+
+    def get_semantic(self, model: str, kind: str, fingerprint: str, vec: Any) -> Optional[Dict[str, Any]]:
+        v = np.asarray(vec, dtype=np.float32)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, vec, response, latency_ms FROM entries WHERE model=? AND kind=? AND fingerprint=? "
+                "AND created>=? AND vec IS NOT NULL", (model, kind, fingerprint, time.time() - self.ttl)).fetchall()
+            best, best_sim = None, self.threshold
+            for row in rows:
+                u = np.frombuffer(row[1], dtype=np.float32)
+                if u.shape != v.shape:
+                    continue
+                sim = float(u @ v / max(float(np.linalg.norm(u) * np.linalg.norm(v)), 1e-12))
+                if sim >= best_sim:
+                    best, best_sim = row, sim
+            if best is None:
+                return None
+            self._hit(best[0], best[3], "semantic")
+        return json.loads(best[2])
+
+    def miss(self) -> None:
+        with self._lock:
+            self._stats["misses"] += 1
+
+    def put(self, model: str, prompt: str, response: Dict[str, Any], kind: str = "", fingerprint: str = "",
+            vec: Any = None, latency_ms: float = 0.0) -> None:
+        blob = None if vec is None else np.asarray(vec, dtype=np.float32).tobytes()
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             (exact_key(model, prompt), model, kind, fingerprint, blob, json.dumps(response),
+                              now, now, latency_ms))
+            n = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if n > self.max_entries:
+                # Expired rows go first, then the least recently used
+                cur = self._db.execute("DELETE FROM entries WHERE created<?", (now - self.ttl,))
+                over = n - cur.rowcount - self.max_entries
+                if over > 0:
+                    self._db.execute("DELETE FROM entries WHERE key IN "
+                                     "(SELECT key FROM entries ORDER BY last_used LIMIT ?)", (over,))
+                self._stats["evictions"] += n - self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            st = dict(self._stats)
+            st["entries"] = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        hits = st["exact_hits"] + st["semantic_hits"]
+        st["hit_rate"] = round(hits / (hits + st["misses"]), 3) if hits + st["misses"] else 0.0
+        st["saved_ms"] = round(st["saved_ms"], 1)
+        return st
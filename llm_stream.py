@@ -0,0 +1,78 @@
+import re
+from typing import Optional
+
+_TYPE = re.compile(r'"type"\s*:\s*"([A-Za-z_]+)"')
+_ACTION = re.compile(r'"(tool|patch_yaml)"\s*:')
+_ANSWER = re.compile(r'"answer"\s*:\s*"')
+_ESC = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _partial_string(s: str) -> str:
+    """Decode a JSON string body up to its closing quote or, if unfinished, up to the last whole char."""
+    out = []
+    i = 0
+    while i < len(s):
+        ch = s[i]
+        if ch == '"':
+            break
+        if ch != "\\":
+            out.append(ch)
+            i += 1
+            continue
+        if i + 1 >= len(s):
+            break
+        esc = s[i + 1]
+        if esc == "u":
+            if i + 6 > len(s):
+                break
+            try:
+                out.append(chr(int(s[i + 2:i + 6], 16)))
+            except ValueError:
+                pass
+            i += 6
+            continue
+        out.append(_ESC.get(esc, esc))
+        i += 2
+    return "".join(out)
+
+
+class DecisionStream:
+    """Incremental view of a streamed DECIDE completion.
+
+    ``feed`` takes each text delta and returns the FINAL answer decoded so far
+    (None while there is nothing displayable). ACT / SELF_UPGRADE decisions never
+    produce partial text; ``kind`` reports the decision type as soon as the
+    ``"type"`` field reveals it. A reply that is not a JSON object is shown as it
+    arrives, since ``_parse_llm_json`` turns it into a FINAL answer anyway. Routing
+    still goes by the parse of the complete text, never by the partial view.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.kind: Optional[str] = None
+        self._shown = ""
+
+    def feed(self, delta: str) -> Optional[str]:
+        self.text += delta
+        body = self.text.lstrip()
+        if not body:
+            return None
+        if not body.startswith("{"):
+            self.kind = "FINAL"
+            return self._emit(body.rstrip())
+        if self.kind is None:
+            m = _TYPE.search(body)
+            if m:
+                self.kind = m.group(1).upper()
+        if self.kind not in (None, "FINAL") or (self.kind is None and _ACTION.search(body)):
+            return None
+        m = _ANSWER.search(body)
+        if not m:
+            return None
+        return self._emit(_partial_string(body[m.end():]))
+
+    def _emit(self, text: str) -> Optional[str]:
+        if not text or text == self._shown:
+            return None
+        self._shown = text
+        return text
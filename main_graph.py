@@ -1,9 +1,24 @@
-import os, json, uuid, yaml, subprocess, importlib.util, pathlib, time, random
-from typing import TypedDict, List, Dict, Any, Optional
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
+import os, json, uuid, hashlib, yaml, subprocess, importlib.util, pathlib, time, atexit, threading, weakref
+import contextvars
+from typing import TypedDict, List, Dict, Any, Optional, Tuple, Iterable, Callable
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.runnables import RunnableLambda
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from embed_cache import EmbeddingCache
+from lexical_index import BM25Index, rrf_merge
+from query_cache import QueryCache, query_key
+from chunking import chunk_text, strategy_for, chunk_tokenizer
+from vector_store import Point, QdrantStore, NumpyStore, payload_predicate
+from doc_store import DocStore
+from microbatch import MicroBatcher
+from context_pack import TokenCounter, pack
+from llm_cache import LLMCache
+from llm_stream import DecisionStream
+import circuit
+from circuit import CircuitBreaker, CircuitOpenError, RetryPolicy
+from hedge import Hedger
 
 MODEL=os.getenv("MODEL","openai:gpt-4o-mini")
 M = yaml.safe_load(open("manifesto.yaml"))
@@ -16,97 +31,571 @@ class State(TypedDict):
 
 # Retrieval setup
 
-# For Heroku, use in-memory Qdrant client; lazy init to avoid boot timeouts
-q: QdrantClient | None = None
+# For Heroku, use in-memory Qdrant client; lazy init to avoid boot timeouts.
+# QDRANT_PATH keeps an embedded on-disk collection instead; QDRANT_SNAPSHOT seeds an empty one.
+# VECTOR_BACKEND=numpy swaps Qdrant for the memory-mapped NumpyStore in vector_store.py.
+q: Any = None
 emb: Any | None = None
 COLL="jarvis"
+EMBED_MODEL="BAAI/bge-small-en-v1.5"
+_embed_cache: EmbeddingCache | None = None
+_lexical: BM25Index | None = None
+_lexical_saved_at = 0.0
+_store: QdrantStore | NumpyStore | None = None
+# Raw chunk text lives here (compressed) when data_policy.compress_raw_text / DOC_STORE is on
+_doc_store: DocStore | None = None
+_ready_lock = threading.RLock()
+STORE_STATS: Dict[str, Any] = {"backend": None, "retrieval_ready_ms": None, "snapshot_load_ms": None,
+                               "snapshot_points": 0, "snapshot_error": ""}
+# Concurrent encodes (one thread per chat/API request) are coalesced here before hitting emb
+EMBED_MICROBATCH = os.getenv("EMBED_MICROBATCH", "true").lower() == "true"
+_batcher = MicroBatcher(lambda xs: _encode_raw(xs), int(os.getenv("EMBED_BATCH_MAX", "32")),
+                        float(os.getenv("EMBED_BATCH_WAIT_MS", "3")))
+_search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+# Repeat retrievals are served from here until the next write bumps the generation
+_query_cache = QueryCache(int(os.getenv("QUERY_CACHE_MAX", "1024")), float(os.getenv("QUERY_CACHE_TTL_SEC", "300")))
+
+def _doc_store_enabled() -> bool:
+    policy = ((M.get("guardrails") or {}).get("data_policy") or {})
+    return os.getenv("DOC_STORE", str(policy.get("compress_raw_text", False))).lower() == "true"
 
 def _ensure_retrieval_ready() -> None:
-    global q, emb
-    if q is None:
+    with _ready_lock:
+        _init_retrieval()
+
+def _ensure_embedder() -> None:
+    global emb
+    with _ready_lock:
+        if emb is None:
+            # Lazy import to avoid torch dependency during lightweight tests; EMBED_BACKEND picks the runtime
+            from embedders import get_embedder
+            emb = get_embedder(model=EMBED_MODEL)
+
+def _init_retrieval() -> None:
+    global q, emb, _embed_cache, _lexical, _store, _doc_store
+    t0 = time.time()
+    backend = os.getenv("VECTOR_BACKEND", "qdrant").strip().lower()
+    if q is None and backend != "numpy":
+        from qdrant_client import QdrantClient
         qdrant_url = os.getenv("QDRANT_URL", "").strip()
         qdrant_key = os.getenv("QDRANT_API_KEY", "").strip()
+        qdrant_path = os.getenv("QDRANT_PATH", "").strip()
         if qdrant_url:
             q = QdrantClient(url=qdrant_url, api_key=qdrant_key or None, prefer_grpc=False)
+            STORE_STATS["backend"] = "url"
+        elif qdrant_path:
+            os.makedirs(qdrant_path, exist_ok=True)
+            q = QdrantClient(path=qdrant_path)
+            STORE_STATS["backend"] = "path"
         else:
             q = QdrantClient(":memory:")
-    if emb is None:
-        # Lazy import to avoid torch dependency during lightweight tests
-        from sentence_transformers import SentenceTransformer
-        emb = SentenceTransformer("BAAI/bge-small-en-v1.5")
+            STORE_STATS["backend"] = "memory"
+    _ensure_embedder()
+    if _embed_cache is None:
+        # Keyed on the embedder name so vectors from different backends never mix
+        name = getattr(emb, "name", EMBED_MODEL)
+        disk = os.getenv("EMBED_CACHE_DIR", "").strip()
+        _embed_cache = EmbeddingCache(
+            name,
+            max_bytes=int(float(os.getenv("EMBED_CACHE_MB", "64")) * 1024 * 1024),
+            disk_path=os.path.join(disk, name.replace("/", "__")) if disk else None,
+            dim=emb.get_sentence_embedding_dimension(),  # type: ignore[union-attr]
+        )
+    if _lexical is None:
+        _lexical = BM25Index(os.getenv("LEXICAL_INDEX_PATH", os.path.join(".jarvis", "bm25.json.gz")))
+        atexit.register(_save_lexical, True)
+    dim = emb.get_sentence_embedding_dimension()  # type: ignore[union-attr]
+    if backend == "numpy":
+        if isinstance(_store, NumpyStore):
+            return
+        path = os.getenv("NUMPY_STORE_PATH", os.path.join(".jarvis", "vectors")).strip()
+        _store = NumpyStore(None if path in ("", ":memory:") else path, dim,
+                            os.getenv("NUMPY_STORE_DTYPE", "float32").strip())
+        STORE_STATS["backend"] = "numpy"
+        persistent = _store.path is not None
+    else:
+        if isinstance(_store, QdrantStore) and _store.client is q:
+            return
+        _store = QdrantStore(q, COLL)
+        persistent = bool(os.getenv("QDRANT_URL", "").strip() or os.getenv("QDRANT_PATH", "").strip())
+    created = _store.ensure(dim)
+    if _doc_store is None and _doc_store_enabled():
+        # An in-memory collection is private to this process and gone on restart, so its texts are
+        # too; in the shared file they would pile up as orphans and other processes could delete them
+        path = os.getenv("DOC_STORE_PATH", os.path.join(".jarvis", "docs.sqlite3")) if persistent else ":memory:"
+        _doc_store = DocStore(path, scope=_doc_scope(_store))
+    elif _doc_store is not None:
+        _doc_store = _doc_store.scoped(_doc_scope(_store))
+    if created:
+        # A brand-new collection means any persisted lexical entries are stale
+        if len(_lexical):  # type: ignore[arg-type]
+            _lexical.clear()  # type: ignore[union-attr]
+        if _doc_store is not None:
+            _doc_store.clear()
+        _query_cache.bump()
+    _load_boot_snapshot()
+    if STORE_STATS["retrieval_ready_ms"] is None:
+        STORE_STATS["retrieval_ready_ms"] = round((time.time() - t0) * 1000.0, 1)
+
+def _doc_scope(store: Any) -> str:
+    """Doc store scope of a vector store: its physical collection (alias target) or directory."""
+    if isinstance(store, QdrantStore):
+        return store.resolve()
+    return os.path.basename(os.path.realpath(store.path)) if store.path else ":memory:"
+
+def _load_boot_snapshot() -> None:
+    """Warm start: import QDRANT_SNAPSHOT when the collection is empty instead of re-embedding."""
+    snap = os.getenv("QDRANT_SNAPSHOT", "").strip()
+    if not snap or not os.path.exists(snap):
+        return
     try:
-        have=[c.name for c in q.get_collections().collections]  # type: ignore[attr-defined]
-        if COLL not in have:
-            q.recreate_collection(
-                COLL,
-                vectors_config=VectorParams(
-                    size=emb.get_sentence_embedding_dimension(),  # type: ignore[union-attr]
-                    distance=Distance.COSINE,
-                ),
-            )
+        if _store.count():  # type: ignore[union-attr]
+            return
+        from memory_admin import import_snapshot
+        t0 = time.time()
+        STORE_STATS["snapshot_points"] = import_snapshot(snap)["imported"]
+        STORE_STATS["snapshot_load_ms"] = round((time.time() - t0) * 1000.0, 1)
     except Exception as e:
-        print(f"Creating collection: {e}")
-        q.recreate_collection(  # type: ignore[union-attr]
-            COLL,
-            vectors_config=VectorParams(
-                size=emb.get_sentence_embedding_dimension(),  # type: ignore[union-attr]
-                distance=Distance.COSINE,
-            ),
-        )
+        STORE_STATS["snapshot_error"] = str(e)
+        print(f"Loading snapshot {snap}: {e}")
+
+def _encode_raw(texts: List[str]):
+    return emb.encode(texts, normalize_embeddings=True)  # type: ignore[union-attr]
+
+def _encode(texts: List[str]):
+    """Normalized embeddings for texts, served from the content-addressed cache when possible.
+
+    Cache misses go through the micro-batcher, so concurrent single-query calls share one encode.
+    """
+    _ensure_retrieval_ready()
+    return _embed_cache.encode(texts, _batcher.encode if EMBED_MICROBATCH else _encode_raw)  # type: ignore[union-attr]
+
+def embed_cache_stats() -> Dict[str, Any]:
+    return _embed_cache.stats() if _embed_cache is not None else {}
+
+def embed_batch_stats() -> Dict[str, Any]:
+    return {"enabled": EMBED_MICROBATCH, **_batcher.stats()}
+
+def query_cache_stats() -> Dict[str, Any]:
+    return _query_cache.stats()
+
+def storage_stats() -> Dict[str, Any]:
+    st = dict(STORE_STATS)
+    try:
+        st["chunk_tokenizer"] = chunk_tokenizer()
+    except Exception as e:
+        st["chunk_tokenizer"] = f"error: {e}"
+    if _doc_store is not None:
+        st["doc_store"] = _doc_store.stats()
+    return st
+
+_POINT_NS = uuid.UUID("6f1c1f0e-5b0a-4c55-9d59-4a7c9b1e2f10")
+
+def point_id(src: str, chunk: str, meta: Optional[Dict[str, Any]] = None) -> str:
+    """Deterministic point ID: hash of source (plus thread, when scoped) and chunk text."""
+    thread = str((meta or {}).get("thread_id", ""))
+    return str(uuid.uuid5(_POINT_NS, f"{src}\x00{thread}\x00{chunk}"))
+
+def _existing_ids(ids: List[str]) -> set:
+    if not ids:
+        return set()
+    have = _store.retrieve(ids, with_payload=False)  # type: ignore[union-attr]
+    return {str(p.id) for p in have}
+
+def _chunk_text(txt: str, src: str = "adhoc") -> List[str]:
+    return chunk_text(txt, strategy_for(src))
+
+def _prepare_points(records: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> List[Point]:
+    """Embed one batch of (chunk, source, meta) records into points with a single encode.
 
-def ingest(txt: str, src: str = "adhoc", meta: Optional[Dict[str, Any]] = None) -> None:
+    Point IDs are content-derived, so chunks already in the collection are skipped
+    before encoding.
+    """
     _ensure_retrieval_ready()
-    chunks=[txt[i:i+1200] for i in range(0,len(txt),1200)]
-    vecs=emb.encode(chunks, normalize_embeddings=True)  # type: ignore[union-attr]
-    pts=[]
-    for i in range(len(chunks)):
-        payload = {"chunk": chunks[i], "source": src}
+    fresh: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    for c, src, meta in records:
+        payload: Dict[str, Any] = {"chunk": c, "source": src}
         if meta:
             # Shallow merge of metadata
             payload.update(meta)
-        pts.append(PointStruct(id=str(uuid.uuid4()), vector=vecs[i].tolist(), payload=payload))
-    q.upsert(collection_name=COLL, points=pts)  # type: ignore[union-attr]
+        payload.setdefault("ts", time.time())
+        fresh.setdefault(point_id(src, c, meta), (c, payload))
+    for pid in _existing_ids(list(fresh)):
+        fresh.pop(pid, None)
+    if not fresh:
+        return []
+    ids = list(fresh)
+    vecs=_encode([fresh[pid][0] for pid in ids])
+    return [Point(id=pid, vector=vecs[i].tolist(), payload=fresh[pid][1]) for i, pid in enumerate(ids)]
 
-def topk(qry: str, k: int = 5):
+def _save_lexical(force: bool = False) -> None:
+    global _lexical_saved_at
+    if _lexical is None or not _lexical.dirty:
+        return
+    if force or time.time() - _lexical_saved_at >= float(os.getenv("LEXICAL_SAVE_SEC", "30")):
+        _lexical_saved_at = time.time()
+        try:
+            _lexical.save()
+        except Exception as e:
+            print(f"Lexical index save failed: {e}")
+
+def _index_lexical(pid: str, payload: Dict[str, Any], text: Optional[str] = None) -> None:
+    # Only the fields retrieval filters on are mirrored into the lexical index
+    meta = {k: payload[k] for k in ("source", "thread_id", "ts") if k in payload}
+    _lexical.add(pid, payload.get("chunk", "") if text is None else text, meta)  # type: ignore[union-attr]
+
+def _doc_texts(items: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, str]:
+    """Chunk text for (point ID, payload) pairs: inline when present, else from the doc store."""
+    out = {pid: pl["chunk"] for pid, pl in items if "chunk" in pl}
+    need = [pid for pid, pl in items if "chunk" not in pl]
+    if need and _doc_store is not None:
+        out.update(_doc_store.get_many(need))
+    return out
+
+def _hydrate(points: List[Any]) -> List[Any]:
+    """Put ``chunk`` back into payloads that only reference the doc store (exports, archiving)."""
+    texts = _doc_texts([(str(p.id), p.payload or {}) for p in points])
+    for p in points:
+        if "chunk" not in (p.payload or {}) and str(p.id) in texts:
+            p.payload = {**(p.payload or {}), "chunk": texts[str(p.id)]}
+    return points
+
+def _write_points(pts: List[Point], store: Any = None) -> None:
+    """Upsert points and keep the BM25 index (and doc store) in step with the collection.
+
+    With ``store`` (a migration target) the points go there and the serving
+    lexical index and query cache are left alone.
+    """
+    if not pts:
+        return
+    texts = _doc_texts([(str(p.id), p.payload or {}) for p in pts])
+    if _doc_store is not None:
+        (_doc_store if store is None else _doc_store.scoped(_doc_scope(store))).put_many(texts)
+        pts = [Point(id=p.id, vector=p.vector,
+                     payload={**{k: v for k, v in (p.payload or {}).items() if k != "chunk"},
+                              "doc": str(p.id), "chunk_chars": len(texts.get(str(p.id), ""))})
+               for p in pts]
+    if store is not None:
+        store.upsert(pts)
+        return
+    _store.upsert(pts)  # type: ignore[union-attr]
+    for p in pts:
+        _index_lexical(str(p.id), p.payload or {}, texts.get(str(p.id), ""))
+    _query_cache.bump()
+    _save_lexical()
+
+def _upsert_chunks(records: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> int:
+    """Embed and upsert one batch of records; returns the number of newly written points."""
+    pts = _prepare_points(records)
+    _write_points(pts)
+    return len(pts)
+
+def delete_points(ids: List[str], batch: int = 256) -> int:
+    """Remove points by ID (used by sync and compaction)."""
+    if not ids:
+        return 0
+    _ensure_retrieval_ready()
+    for i in range(0, len(ids), batch):
+        _store.delete(ids[i:i+batch])  # type: ignore[union-attr]
+    for pid in ids:
+        _lexical.remove(str(pid))  # type: ignore[union-attr]
+    if _doc_store is not None:
+        _doc_store.delete_many(ids)
+    _query_cache.bump()
+    _save_lexical()
+    return len(ids)
+
+def ingest_batch(items: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> int:
+    """Chunk many (text, source, meta) items and write them as a single batch."""
+    return _upsert_chunks([(c, src, meta) for txt, src, meta in items for c in _chunk_text(txt, src)])
+
+def ingest(txt: str, src: str = "adhoc", meta: Optional[Dict[str, Any]] = None) -> int:
+    return ingest_batch([(txt, src, meta)])
+
+def ingest_stream(chunks: Iterable[str], src: str = "adhoc", meta: Optional[Dict[str, Any]] = None,
+                  batch_size: int = 64, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Embed and upsert an iterable of chunks in fixed-size batches.
+
+    Only one batch is held at a time, so peak memory does not depend on input size.
+    ``on_progress`` receives the running totals after every batch.
+    """
+    t0 = time.time()
+    stats: Dict[str, Any] = {"chunks": 0, "new_chunks": 0, "bytes": 0, "batches": 0}
+    def _flush(buf: List[str]) -> None:
+        stats["new_chunks"] += _upsert_chunks([(c, src, meta) for c in buf])
+        stats["batches"] += 1
+        dt = max(time.time() - t0, 1e-9)
+        stats["seconds"] = round(dt, 3)
+        stats["chunks_per_sec"] = round(stats["chunks"] / dt, 1)
+        stats["mb_per_sec"] = round(stats["bytes"] / dt / 1e6, 3)
+        if on_progress:
+            on_progress(dict(stats))
+    buf: List[str] = []
+    for c in chunks:
+        buf.append(c)
+        stats["chunks"] += 1
+        stats["bytes"] += len(c.encode("utf-8"))
+        if len(buf) >= batch_size:
+            _flush(buf); buf = []
+    if buf or not stats["batches"]:
+        _flush(buf)
+    return stats
+
+def ingest_async(txt: str, src: str = "adhoc", meta: Optional[Dict[str, Any]] = None) -> bool:
+    """Hand text to the background ingest queue; inline ingest when INGEST_ASYNC=false."""
+    if os.getenv("INGEST_ASYNC", "true").lower() != "true":
+        ingest(txt, src, meta)
+        return True
+    import ingest_queue
+    return ingest_queue.submit(txt, src, meta)
+
+def topk(qry: str, k: int = 5, thread_id: Optional[str] = None, source: Optional[str] = None,
+         since: Optional[float] = None, until: Optional[float] = None, include_shared: bool = True,
+         include_cold: bool = False):
+    """Hybrid retrieval: dense search and BM25 run in parallel, merged by reciprocal rank fusion.
+
+    HYBRID_RETRIEVAL=false (or an empty lexical index) falls back to dense-only
+    search, in which case scores are cosine similarities rather than RRF scores.
+    ``thread_id``/``source``/``since``/``until`` restrict both searches to matching
+    payloads (indexed fields, so cost follows the match set, not the collection).
+    The vector backend is VECTOR_BACKEND: ``qdrant`` (default) or ``numpy``.
+    Results are cached per (query, k, filters) until the next write or delete.
+    ``include_cold`` also scans the archive tier (see tiering.py) and fuses its hits in.
+    """
     _ensure_retrieval_ready()
-    v=emb.encode([qry], normalize_embeddings=True)[0].tolist()  # type: ignore[union-attr]
-    hits=q.search(collection_name=COLL, query_vector=v, limit=k)  # type: ignore[union-attr]
-    return [{"text":h.payload["chunk"],"score":float(h.score)} for h in hits]
+    filt = dict(thread_id=thread_id, source=source, since=since, until=until, include_shared=include_shared)
+    key = query_key(qry, k, cold=include_cold or None, **filt)
+    hit = _query_cache.get(key)
+    if hit is not None:
+        return hit
+    gen = _query_cache.generation
+    res = _search(qry, k, filt, include_cold)
+    _query_cache.put(key, res, gen)
+    return res
+
+def _search(qry: str, k: int, filt: Dict[str, Any], include_cold: bool = False) -> List[Dict[str, Any]]:
+    hybrid = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true" and len(_lexical)  # type: ignore[arg-type]
+    n = max(k * 4, 20) if hybrid else k
+    lex = _search_pool.submit(_lexical.search, qry, n, payload_predicate(**filt)) if hybrid else None  # type: ignore[union-attr]
+    v=_encode([qry])[0].tolist()
+    hits=_store.search(v, n, filt)  # type: ignore[union-attr]
+    if include_cold:
+        # Cold scores are cosine like the hot ones, so both tiers share the dense ranking
+        from tiering import cold_store
+        hits = sorted(list(hits) + cold_store().search(v, n, filt), key=lambda h: h.score, reverse=True)[:n]
+    if lex is None:
+        fused = [(str(h.id), float(h.score)) for h in hits[:k]]
+    else:
+        fused = rrf_merge([[str(h.id) for h in hits], [pid for pid, _ in lex.result()]])[:k]
+    payloads = {str(h.id): h.payload or {} for h in hits}
+    missing = [pid for pid, _ in fused if pid not in payloads]
+    if missing:
+        for p in _store.retrieve(missing):  # type: ignore[union-attr]
+            payloads[str(p.id)] = p.payload or {}
+    # Only the final k texts are fetched and decompressed
+    texts = _doc_texts([(pid, payloads[pid]) for pid, _ in fused if pid in payloads])
+    return [{"text":texts[pid],"score":score} for pid, score in fused if pid in texts]
 
 # LLM shim (OpenAI SDK JSON)
 
-def _get_openai_client():
-    # Simple, robust proxy handling: rely on standard env, avoid passing kwargs to clients
-    from openai import OpenAI
+# One OpenAI client per process (and one async client per event loop) so keep-alive connections and
+# TLS sessions are reused; LLM_TIMEOUT_SEC / LLM_CONNECT_TIMEOUT_SEC / LLM_MAX_CONNECTIONS tune the pool
+_openai_client: Any = None
+_aopenai_clients: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+LLM_SYSTEM = "You are Jarvis, a Christ-pattern mentor-builder. Use ONLY provided context and obey manifesto guardrails."
+
+def _http_options() -> Dict[str, Any]:
+    import httpx
+    # Simple, robust proxy handling: rely on standard env
     proxy = os.getenv("OPENAI_PROXY") or os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY")
     if proxy:
         os.environ.setdefault("HTTPS_PROXY", proxy)
         os.environ.setdefault("HTTP_PROXY", proxy)
-    return OpenAI()
+    n = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    return {
+        "timeout": httpx.Timeout(float(os.getenv("LLM_TIMEOUT_SEC", "30")),
+                                 connect=float(os.getenv("LLM_CONNECT_TIMEOUT_SEC", "5"))),
+        "limits": httpx.Limits(max_connections=n, max_keepalive_connections=n,
+                               keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_SEC", "60"))),
+        "proxy": proxy or None,
+    }
+
+def _get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        with _client_lock:
+            if _openai_client is None:
+                import httpx
+                from openai import OpenAI
+                # Retries are ours (call_llm_json), so the SDK's own are off
+                _openai_client = OpenAI(http_client=httpx.Client(**_http_options()), max_retries=0)
+    return _openai_client
+
+def _get_async_openai_client():
+    import asyncio
+    loop = asyncio.get_running_loop()
+    cli = _aopenai_clients.get(loop)
+    if cli is None:
+        import httpx
+        from openai import AsyncOpenAI
+        # An async connection pool belongs to the loop that opened it
+        cli = _aopenai_clients[loop] = AsyncOpenAI(http_client=httpx.AsyncClient(**_http_options()), max_retries=0)
+    return cli
+
+def _llm_request(prompt: str) -> Dict[str, Any]:
+    return {"model": MODEL.split(":",1)[1] if ":" in MODEL else MODEL,
+            "messages": [{"role":"system","content": LLM_SYSTEM}, {"role":"user","content": prompt}],
+            "temperature": 0.2}
+
+def _parse_llm_json(txt: str) -> Dict[str, Any]:
+    txt = txt.strip()
+    try:
+        return json.loads(txt)
+    except Exception:
+        return {"type":"FINAL","answer": txt}
+
+# Outage handling (circuit.py): error-rate breaker, per-error-class retries, and the graph run's deadline.
+# LLM_CIRCUIT_OPEN=true still forces the breaker open by hand.
+_breaker = CircuitBreaker(window=float(os.getenv("LLM_CB_WINDOW_SEC", "60")),
+                          min_calls=int(os.getenv("LLM_CB_MIN_CALLS", "10")),
+                          error_rate=float(os.getenv("LLM_CB_ERROR_RATE", "0.5")),
+                          cooldown=float(os.getenv("LLM_CB_COOLDOWN_SEC", "30")),
+                          probes=int(os.getenv("LLM_CB_PROBES", "1")))
+_retry = RetryPolicy(max_wait=float(os.getenv("LLM_RETRY_MAX_WAIT_SEC", "20")))
+_LLM_UNAVAILABLE = {"type":"FINAL","answer":"LLM temporarily unavailable; please try again shortly.","error":True}
+
+def _circuit_forced_open() -> bool:
+    return os.getenv("LLM_CIRCUIT_OPEN", "false").lower() == "true"
+
+def llm_circuit_stats() -> Dict[str, Any]:
+    st = _breaker.stats()
+    if _circuit_forced_open():
+        st["state"] = "forced_open"
+    return {**st, "retry": _retry.stats()}
+
+def _timeout_kw(t: Optional[float]) -> Dict[str, Any]:
+    # None would mean "no timeout" to the SDK; leave the client's default in place instead
+    return {} if t is None else {"timeout": t}
+
+def _llm_failed(e: Exception) -> Dict[str, Any]:
+    if isinstance(e, CircuitOpenError):
+        return dict(_LLM_UNAVAILABLE)
+    return {"type":"FINAL","answer": f"LLM error: {e}","error":True}
+
+def _guarded(send: Callable[[Optional[float]], Dict[str, Any]]) -> Dict[str,Any]:
+    if _circuit_forced_open():
+        return dict(_LLM_UNAVAILABLE)
+    try:
+        return circuit.call(send, _breaker, _retry)
+    except Exception as e:
+        return _llm_failed(e)
+
+async def _aguarded(send: Callable[[Optional[float]], Any]) -> Dict[str,Any]:
+    if _circuit_forced_open():
+        return dict(_LLM_UNAVAILABLE)
+    try:
+        return await circuit.acall(send, _breaker, _retry)
+    except Exception as e:
+        return _llm_failed(e)
+
+# Hedged requests (hedge.py), opt-in with LLM_HEDGE=true: a second identical completion once the
+# first runs past the recent p90, capped in rate and by the manifesto's monthly budget
+_hedger = Hedger(percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9")),
+                 min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+                 max_rate=float(os.getenv("LLM_HEDGE_MAX_RATE", "0.1")),
+                 budget_usd=float(M.get("guardrails", {}).get("max_monthly_cost_usd") or 0) or None,
+                 price_in=float(os.getenv("LLM_PRICE_IN_PER_MTOK", "0.15")),
+                 price_out=float(os.getenv("LLM_PRICE_OUT_PER_MTOK", "0.60")))
+_hedge_loop: Any = None
+
+def _hedging() -> bool:
+    return os.getenv("LLM_HEDGE", "false").lower() == "true"
+
+def llm_hedge_stats() -> Dict[str, Any]:
+    return {"enabled": _hedging(), **_hedger.stats()}
+
+def _get_hedge_loop():
+    global _hedge_loop
+    import asyncio
+    with _client_lock:
+        if _hedge_loop is None:
+            _hedge_loop = asyncio.new_event_loop()
+            threading.Thread(target=_hedge_loop.run_forever, name="llm-hedge", daemon=True).start()
+    return _hedge_loop
+
+async def _with_deadline(at: Optional[float], coro: Any) -> Any:
+    if at is not None:
+        circuit.DEADLINE.set(at)
+    return await coro
 
 def call_llm_json(prompt: str) -> Dict[str,Any]:
-    # bounded retries with jitter; simple circuit breaker via env flag
-    if os.getenv("LLM_CIRCUIT_OPEN", "false").lower() == "true":
-        return {"type":"FINAL","answer":"LLM temporarily unavailable; please try again shortly."}
-    last_err = None
-    for attempt in range(3):
+    if _hedging():
+        import asyncio
+        # Cancelling the slower request takes tasks, so the hedged path runs on a private event loop
+        return asyncio.run_coroutine_threadsafe(_with_deadline(circuit.DEADLINE.get(), acall_llm_json(prompt)),
+                                                _get_hedge_loop()).result()
+    def send(t):
+        t0 = time.monotonic()
+        rsp = _get_openai_client().chat.completions.create(**_llm_request(prompt), **_timeout_kw(t))
+        _hedger.observe(time.monotonic() - t0)
+        _hedger.charge(getattr(rsp, "usage", None))
+        return _parse_llm_json(rsp.choices[0].message.content or "")
+    return _guarded(send)
+
+async def acall_llm_json(prompt: str) -> Dict[str,Any]:
+    """``call_llm_json`` for event loops: waiting on the completion holds no thread."""
+    async def send(t):
+        cli = _get_async_openai_client()
+        req = {**_llm_request(prompt), **_timeout_kw(t)}
+        if _hedging():
+            rsp, hedged = await _hedger.run(lambda: cli.chat.completions.create(**req))
+        else:
+            t0 = time.monotonic()
+            rsp, hedged = await cli.chat.completions.create(**req), False
+            _hedger.observe(time.monotonic() - t0)
+        _hedger.charge(getattr(rsp, "usage", None), hedged)
+        return _parse_llm_json(rsp.choices[0].message.content or "")
+    return await _aguarded(send)
+
+# Set by a caller (web_jarvis's Telegram streamer) to get the FINAL answer while DECIDE is still generating
+STREAM_CALLBACK: "contextvars.ContextVar[Optional[Callable[[str], None]]]" = contextvars.ContextVar(
+    "STREAM_CALLBACK", default=None)
+
+def _on_delta(ds: DecisionStream, delta: Optional[str], on_text: Callable[[str], None]) -> None:
+    if not delta:
+        return
+    txt = ds.feed(delta)
+    if txt is not None:
         try:
-            cli = _get_openai_client()
-            rsp = cli.chat.completions.create(
-                model=MODEL.split(":",1)[1] if ":" in MODEL else MODEL,
-                messages=[
-                    {"role":"system","content": "You are Jarvis, a Christ-pattern mentor-builder. Use ONLY provided context and obey manifesto guardrails."},
-                    {"role":"user","content": prompt}],
-                temperature=0.2)
-            txt = rsp.choices[0].message.content.strip()
-            try:
-                return json.loads(txt)
-            except:
-                return {"type":"FINAL","answer": txt}
+            on_text(txt)
         except Exception as e:
-            last_err = e
-            time.sleep(0.5 + random.random())
-    return {"type":"FINAL","answer": f"LLM error: {last_err}"}
+            print(f"Stream callback: {e}")
+
+def call_llm_json_stream(prompt: str, on_text: Callable[[str], None]) -> Dict[str,Any]:
+    """``call_llm_json`` with ``stream=True``: ``on_text`` gets the FINAL answer decoded so far.
+
+    The returned decision is parsed from the complete text, as in ``call_llm_json``,
+    so ACT / SELF_UPGRADE are routed exactly as before (and never shown).
+    """
+    def send(t):
+        ds = DecisionStream()
+        for chunk in _get_openai_client().chat.completions.create(**_llm_request(prompt), stream=True, **_timeout_kw(t)):
+            if chunk.choices:
+                _on_delta(ds, chunk.choices[0].delta.content, on_text)
+        return _parse_llm_json(ds.text)
+    return _guarded(send)
+
+async def acall_llm_json_stream(prompt: str, on_text: Callable[[str], None]) -> Dict[str,Any]:
+    async def send(t):
+        ds = DecisionStream()
+        stream = await _get_async_openai_client().chat.completions.create(**_llm_request(prompt), stream=True,
+                                                                          **_timeout_kw(t))
+        async for chunk in stream:
+            if chunk.choices:
+                _on_delta(ds, chunk.choices[0].delta.content, on_text)
+        return _parse_llm_json(ds.text)
+    return await _aguarded(send)
 
 def load_tool(modname:str):
     module_stub = modname.split(".", 1)[0]
@@ -132,17 +621,84 @@ def mentor_header():
     return ("Teacher-counsel to a servant-king: act only to increase freedom, truth, and mercy; "
             "cite sources; if unsure, stop and ask for light.\n")
 
+def _plan_prompt(state: State) -> str:
+    return mentor_header()+f"Plan JSON for GOAL:\n{state['goal']}\nReturn JSON: {{'steps':[...]}}"
+
+# Response cache (llm_cache.py): exact on the prompt, semantic on the goal within the same context
+_llm_cache: LLMCache | None = None
+
+def _get_llm_cache() -> Optional[LLMCache]:
+    global _llm_cache
+    if _llm_cache is None and os.getenv("LLM_CACHE", "true").lower() == "true":
+        _llm_cache = LLMCache(os.getenv("LLM_CACHE_PATH", os.path.join(".jarvis", "llm_cache.sqlite3")),
+                              ttl=float(os.getenv("LLM_CACHE_TTL_SEC", "900")),
+                              max_entries=int(os.getenv("LLM_CACHE_MAX", "5000")),
+                              threshold=float(os.getenv("LLM_CACHE_SIM", "0.95")))
+    return _llm_cache
+
+def llm_cache_stats() -> Dict[str, Any]:
+    return _llm_cache.stats() if _llm_cache is not None else {}
+
+def _llm_cache_get(kind: str, prompt: str, goal: str, fingerprint: str) -> Tuple[Optional[Dict[str, Any]], Any]:
+    """Cached response (or None) plus the goal embedding to store with a fresh one."""
+    cache = _get_llm_cache()
+    if cache is None:
+        return None, None
+    hit = cache.get_exact(MODEL, prompt)
+    if hit is not None:
+        return hit, None
+    vec = None
+    if os.getenv("DISABLE_RETRIEVAL", "false").lower() != "true":
+        try:
+            vec = _encode([goal])[0]
+            hit = cache.get_semantic(MODEL, kind, fingerprint, vec)
+        except Exception as e:
+            print(f"LLM cache lookup: {e}")
+    if hit is None:
+        cache.miss()
+    return hit, vec
+
+def _llm_cache_put(kind: str, prompt: str, fingerprint: str, vec: Any, out: Dict[str, Any], t0: float) -> None:
+    # Only plans and final answers: actions must run every time, and failures must not stick
+    cache = _get_llm_cache()
+    if cache is None or not isinstance(out, dict) or out.get("error"):
+        return
+    if kind == "decide" and str(out.get("type", "")).upper() != "FINAL":
+        return
+    cache.put(MODEL, prompt, out, kind, fingerprint, vec, (time.time() - t0) * 1000.0)
+
 def plan_node(state: State) -> State:
-    prompt = mentor_header()+f"Plan JSON for GOAL:\n{state['goal']}\nReturn JSON: {{'steps':[...]}}"
-    plan = call_llm_json(prompt)
+    prompt = _plan_prompt(state)
+    plan, vec = _llm_cache_get("plan", prompt, state["goal"], "")
+    if plan is None:
+        t0 = time.time()
+        plan = call_llm_json(prompt)
+        _llm_cache_put("plan", prompt, "", vec, plan, t0)
     return {**state, "decision": {"type":"PLAN","plan":plan}}
 
-def retrieve_node(state: State) -> State:
+async def aplan_node(state: State) -> State:
+    import asyncio
+    prompt = _plan_prompt(state)
+    plan, vec = await asyncio.to_thread(_llm_cache_get, "plan", prompt, state["goal"], "")
+    if plan is None:
+        t0 = time.time()
+        plan = await acall_llm_json(prompt)
+        _llm_cache_put("plan", prompt, "", vec, plan, t0)
+    return {**state, "decision": {"type":"PLAN","plan":plan}}
+
+def retrieve_node(state: State, config: Optional[Dict[str, Any]] = None) -> State:
     # Allow disabling retrieval in tests/CI to avoid heavy deps
     if os.getenv("DISABLE_RETRIEVAL", "false").lower() == "true":
         return {**state, "context": []}
     qtext = state["goal"]
-    hits = topk(qtext, k=5)
+    # Scope to the conversation's own history (plus thread-less shared memory)
+    thread = None
+    if os.getenv("RETRIEVE_THREAD_SCOPED", "true").lower() == "true":
+        thread = ((config or {}).get("configurable") or {}).get("thread_id")
+    cold = os.getenv("RETRIEVE_INCLUDE_COLD", "false").lower() == "true"
+    # Over-fetch (about 3x what fits in CONTEXT_TOKEN_BUDGET) so the context packer can drop
+    # near-duplicates and still fill its budget; it trims the rest
+    hits = topk(qtext, k=int(os.getenv("RETRIEVE_K", "15")), thread_id=thread, include_cold=cold)
     return {**state, "context": hits}
 
 PROMPT = """{header}
@@ -160,31 +716,74 @@ Decide ONE; return STRICT JSON:
 * SELF_UPGRADE{{"patch_yaml":"<yaml fragment>"}}
 """
 
+# The manifesto is loaded once, so everything around {ctx} and {goal} is rendered (and counted) once too
+_PROMPT_HEAD, _PROMPT_TAIL = PROMPT.split("{ctx}")
+_PROMPT_HEAD = _PROMPT_HEAD.format(
+    header=mentor_header(),
+    mission=M.get("mission", ""),
+    principles=", ".join([str(x) for x in M.get("principles", [])]),
+    guardrails=str(M.get("guardrails", {})),
+)
+_PROMPT_TAIL = _PROMPT_TAIL.replace("{allowed_tools}", ", ".join(
+    [f'"{t}"' for t in M.get("guardrails", {}).get("allowed_actions", []) if "." in t])).replace("{{", "{").replace("}}", "}")
+_tokens = TokenCounter(MODEL)
+_PROMPT_STATIC_TOKENS = _tokens.count(_PROMPT_HEAD) + _tokens.count(_PROMPT_TAIL.replace("{goal}", ""))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+PROMPT_STATS: Dict[str, Any] = {"calls": 0, "static_tokens": _PROMPT_STATIC_TOKENS, "exact_tokenizer": _tokens.exact,
+                                "budget": CONTEXT_TOKEN_BUDGET, "last": {}, "duplicates_dropped": 0, "hits_skipped": 0}
+_prompt_totals: "deque[int]" = deque(maxlen=512)
+
+def _record_prompt(st: Dict[str, Any]) -> None:
+    PROMPT_STATS["calls"] += 1
+    PROMPT_STATS["last"] = st
+    PROMPT_STATS["duplicates_dropped"] += st.get("duplicates", 0)
+    PROMPT_STATS["hits_skipped"] += st.get("skipped", 0)
+    _prompt_totals.append(st["prompt_tokens"])
+
+def prompt_stats() -> Dict[str, Any]:
+    tot = sorted(_prompt_totals)
+    pct = lambda q: tot[min(len(tot) - 1, int(q * len(tot)))] if tot else 0  # noqa: E731
+    return {**PROMPT_STATS, "prompt_tokens_p50": pct(0.5), "prompt_tokens_p95": pct(0.95)}
+
+def build_prompt(goal: str, context: List[Any]) -> Tuple[str, Dict[str, Any]]:
+    """DECIDE prompt: static manifesto part plus the context packed into CONTEXT_TOKEN_BUDGET tokens."""
+    ctx, st = pack(context, CONTEXT_TOKEN_BUDGET, _tokens)
+    tail = _PROMPT_TAIL.replace("{goal}", goal)
+    st["prompt_tokens"] = _PROMPT_STATIC_TOKENS + st["context_tokens"] + _tokens.count(goal)
+    st["fingerprint"] = hashlib.sha1(ctx.encode("utf-8")).hexdigest()
+    return _PROMPT_HEAD + ctx + tail, st
+
 def decide_node(state: State) -> State:
-    # Be robust to mixed types in context payloads
-    ctx = "\n---\n".join([
-        str(h.get("text", "")) if isinstance(h, dict) else str(h)
-        for h in state.get("context", [])
-    ])
-    allowed_tools = ", ".join([f'"{t}"' for t in M.get("guardrails", {}).get("allowed_actions", []) if "." in t])
-    p = PROMPT.format(
-        header=mentor_header(),
-        mission=M.get("mission", ""),
-        principles=", ".join([str(x) for x in M.get("principles", [])]),
-        guardrails=str(M.get("guardrails", {})),
-        ctx=ctx, goal=state["goal"], allowed_tools=allowed_tools
-    )
-    decision = call_llm_json(p)
+    p, st = build_prompt(state["goal"], state.get("context", []))
+    _record_prompt(st)
+    decision, vec = _llm_cache_get("decide", p, state["goal"], st["fingerprint"])
+    if decision is None:
+        t0 = time.time()
+        on_text = STREAM_CALLBACK.get()
+        decision = call_llm_json_stream(p, on_text) if on_text else call_llm_json(p)
+        _llm_cache_put("decide", p, st["fingerprint"], vec, decision, t0)
+    return {**state, "decision": decision}
+
+async def adecide_node(state: State) -> State:
+    import asyncio
+    p, st = build_prompt(state["goal"], state.get("context", []))
+    _record_prompt(st)
+    decision, vec = await asyncio.to_thread(_llm_cache_get, "decide", p, state["goal"], st["fingerprint"])
+    if decision is None:
+        t0 = time.time()
+        on_text = STREAM_CALLBACK.get()
+        decision = await (acall_llm_json_stream(p, on_text) if on_text else acall_llm_json(p))
+        _llm_cache_put("decide", p, st["fingerprint"], vec, decision, t0)
     return {**state, "decision": decision}
 
 def act_node(state: State) -> State:
     d = state["decision"]; mod = load_tool(d["tool"]); res = mod.run(d.get("args",{}))
-    ingest(json.dumps({"tool":d,"res":res}), "tool-log")
+    ingest_async(json.dumps({"tool":d,"res":res}), "tool-log")
     return {**state, "log": state["log"]+[{"tool":d,"res":res}]}
 
 def self_upgrade_node(state: State) -> State:
     d = state["decision"]; mod = load_tool("compose.apply"); res = mod.run({"patch": d["patch_yaml"]})
-    ingest(json.dumps({"upgrade":res}), "tool-log")
+    ingest_async(json.dumps({"upgrade":res}), "tool-log")
     return {**state, "log": state["log"]+[{"upgrade":res}]}
 
 def final_node(state: State) -> State:
@@ -200,9 +799,10 @@ def route_after_decide(state: State) -> str:
     return "FINAL"
 
 graph = StateGraph(State)
-graph.add_node("PLAN", plan_node)
+# app.invoke runs the sync nodes; app.ainvoke awaits the async LLM path instead of blocking a thread
+graph.add_node("PLAN", RunnableLambda(plan_node, afunc=aplan_node, name="PLAN"))
 graph.add_node("RETRIEVE", retrieve_node)
-graph.add_node("DECIDE", decide_node)
+graph.add_node("DECIDE", RunnableLambda(decide_node, afunc=adecide_node, name="DECIDE"))
 graph.add_node("ACT", act_node)
 graph.add_node("SELF_UPGRADE", self_upgrade_node)
 graph.add_node("FINAL", final_node)
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List
+
+import numpy as np
+from vector_store import Point
+
+
+def dedup(dry_run: bool = False, batch: int = 256) -> Dict[str, Any]:
+    """Collapse duplicate chunks onto their deterministic point IDs.
+
+    Points written before content-derived IDs carry random UUIDs; each one is
+    re-keyed to ``point_id(source, chunk)`` (reusing its stored vector, no
+    re-encoding) and every other copy of the same content is deleted.
+    """
+    import main_graph as mg
+    mg._ensure_retrieval_ready()
+    seen: set = set()
+    drop: List[Any] = []
+    scanned = rekeyed = 0
+    offset = None
+    while True:
+        pts, offset = mg._store.scroll(batch, offset, with_vectors=True)  # type: ignore[union-attr]
+        mg._hydrate(pts)
+        moves = []
+        for p in pts:
+            scanned += 1
+            pl = p.payload or {}
+            pid = mg.point_id(pl.get("source", "adhoc"), pl.get("chunk", ""), pl)
+            if str(p.id) == pid:
+                seen.add(pid)
+                continue
+            drop.append(p.id)
+            if pid not in seen:
+                seen.add(pid)
+                moves.append(Point(id=pid, vector=p.vector, payload=pl))
+        rekeyed += len(moves)
+        if moves and not dry_run:
+            mg._write_points(moves)
+        if offset is None:
+            break
+    if drop and not dry_run:
+        mg.delete_points(drop, batch=batch)
+    return {"scanned": scanned, "unique": len(seen), "rekeyed": rekeyed,
+            "deleted": len(drop), "dry_run": dry_run}
+
+
+def reindex_lexical(batch: int = 256) -> Dict[str, Any]:
+    """Rebuild the BM25 index from the collection (e.g. after pointing at an existing Qdrant)."""
+    import main_graph as mg
+    mg._ensure_retrieval_ready()
+    mg._lexical.clear()  # type: ignore[union-attr]
+    offset = None
+    n = 0
+    while True:
+        pts, offset = mg._store.scroll(batch, offset, with_vectors=False)  # type: ignore[union-attr]
+        for p in mg._hydrate(pts):
+            mg._index_lexical(str(p.id), p.payload or {})
+            n += 1
+        if offset is None:
+            break
+    mg._query_cache.bump()
+    mg._save_lexical(force=True)
+    return {"indexed": n}
+
+
+def export_snapshot(path: str, batch: int = 1024) -> Dict[str, Any]:
+    """Write the collection to one ``.npz``: point IDs, a float32 vector matrix and JSON payloads.
+
+    Importing it later restores memory without re-chunking or re-embedding.
+    """
+    import main_graph as mg
+    mg._ensure_retrieval_ready()
+    t0 = time.time()
+    ids: List[str] = []
+    vecs: List[Any] = []
+    payloads: List[Dict[str, Any]] = []
+    offset = None
+    while True:
+        pts, offset = mg._store.scroll(batch, offset, with_vectors=True)  # type: ignore[union-attr]
+        # Snapshots carry the raw text so they stand alone
+        for p in mg._hydrate(pts):
+            ids.append(str(p.id)); vecs.append(p.vector); payloads.append(p.payload or {})
+        if offset is None:
+            break
+    dim = mg.emb.get_sentence_embedding_dimension()  # type: ignore[union-attr]
+    meta = {"model": mg.EMBED_MODEL, "dim": dim, "count": len(ids), "created_at": time.time()}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez(
+        tmp,
+        ids=np.array(ids, dtype=str),
+        vectors=np.asarray(vecs, dtype=np.float32).reshape(len(ids), dim),
+        payloads=np.frombuffer(json.dumps(payloads).encode("utf-8"), dtype=np.uint8),
+        meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+    )
+    os.replace(tmp, path)
+    return {"exported": len(ids), "path": path, "bytes": os.path.getsize(path),
+            "seconds": round(time.time() - t0, 3)}
+
+
+def import_snapshot(path: str, batch: int = 1024, force: bool = False) -> Dict[str, Any]:
+    """Upsert every point from an ``export_snapshot`` file (vectors are reused as-is)."""
+    import main_graph as mg
+    mg._ensure_retrieval_ready()
+    t0 = time.time()
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(z["meta"].tobytes().decode("utf-8"))
+        dim = mg.emb.get_sentence_embedding_dimension()  # type: ignore[union-attr]
+        if meta.get("dim") != dim or (meta.get("model") != mg.EMBED_MODEL and not force):
+            raise ValueError(f"snapshot is {meta.get('model')}/{meta.get('dim')}, "
+                             f"collection expects {mg.EMBED_MODEL}/{dim}")
+        ids = z["ids"]
+        vecs = z["vectors"]
+        payloads = json.loads(z["payloads"].tobytes().decode("utf-8"))
+    for i in range(0, len(ids), batch):
+        mg._write_points([Point(id=str(ids[j]), vector=vecs[j].tolist(), payload=payloads[j])
+                          for j in range(i, min(i + batch, len(ids)))])
+    mg._save_lexical(force=True)
+    return {"imported": len(ids), "seconds": round(time.time() - t0, 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Jarvis vector memory maintenance")
+    sub = parser.add_subparsers(dest="cmd")
+    p = sub.add_parser("dedup", help="re-key legacy points to deterministic IDs and drop duplicates")
+    p.add_argument("--dry-run", action="store_true")
+    p.add_argument("--batch", type=int, default=256)
+    p = sub.add_parser("sync", help="incrementally sync a directory into memory")
+    p.add_argument("path")
+    p.add_argument("--pattern", default=None)
+    p.add_argument("--dry-run", action="store_true")
+    sub.add_parser("reindex-lexical", help="rebuild the BM25 index from the collection")
+    p = sub.add_parser("snapshot-export", help="write vectors and payloads to an .npz snapshot")
+    p.add_argument("path")
+    p = sub.add_parser("snapshot-import", help="load an .npz snapshot without re-embedding")
+    p.add_argument("path")
+    p.add_argument("--force", action="store_true", help="accept a snapshot from a different model name")
+    p = sub.add_parser("migrate", help="re-chunk/re-embed into a new versioned collection and swap the alias")
+    p.add_argument("--model", default=None, help="new embedding model (default: keep the current one)")
+    p.add_argument("--backend", default=None, help="embedding backend for --model (default: EMBED_BACKEND)")
+    p.add_argument("--version", type=int, default=None)
+    p.add_argument("--batch", type=int, default=256)
+    p.add_argument("--checkpoint", default=None)
+    p.add_argument("--no-swap", action="store_true", help="copy only; rerun without it to swap")
+    args = parser.parse_args()
+
+    if args.cmd == "dedup":
+        out = dedup(dry_run=args.dry_run, batch=args.batch)
+    elif args.cmd == "sync":
+        from ingest_sync import sync_directory
+        out = sync_directory(args.path, args.pattern, dry_run=args.dry_run)
+    elif args.cmd == "reindex-lexical":
+        out = reindex_lexical()
+    elif args.cmd == "snapshot-export":
+        out = export_snapshot(args.path)
+    elif args.cmd == "snapshot-import":
+        out = import_snapshot(args.path, force=args.force)
+    elif args.cmd == "migrate":
+        import migrate
+        out = migrate.migrate(args.model, args.backend, args.version, args.batch,
+                              args.checkpoint or migrate.CHECKPOINT, swap=not args.no_swap,
+                              on_progress=migrate.progress_line)
+    else:
+        parser.print_help()
+        sys.exit(2)
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Upper bounds of the batch-size histogram buckets; the last bucket is open-ended
+BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class MicroBatcher:
+    """Coalesces concurrent small encode calls into one batched call.
+
+    Callers submit texts and block on futures. A single worker thread takes the
+    first pending text, keeps collecting for up to ``max_wait_ms`` (or until
+    ``max_batch`` texts), runs ``encode_fn`` once and resolves every future with
+    its row. Calls already at ``max_batch`` skip the queue.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], Any], max_batch: int = 32, max_wait_ms: float = 3.0):
+        self.encode_fn = encode_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._q: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._hist = [0] * (len(BUCKETS) + 1)
+        self._stats: Dict[str, Any] = {"batches": 0, "items": 0, "direct": 0, "errors": 0,
+                                       "wait_ms": 0.0, "encode_ms": 0.0}
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        fut: Future = Future()
+        self._start()
+        self._q.put((text, fut))
+        return fut
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        if len(texts) >= self.max_batch:
+            with self._lock:
+                self._stats["direct"] += 1
+            return np.asarray(self.encode_fn(texts), dtype=np.float32)
+        futs = [self.submit(t) for t in texts]
+        return np.asarray([f.result() for f in futs], dtype=np.float32)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._q.get()]
+            t0 = time.perf_counter()
+            deadline = t0 + self.max_wait
+            while len(batch) < self.max_batch:
+                left = deadline - time.perf_counter()
+                try:
+                    batch.append(self._q.get(timeout=left) if left > 0 else self._q.get_nowait())
+                except queue.Empty:
+                    break
+            t1 = time.perf_counter()
+            try:
+                vecs = self.encode_fn([t for t, _ in batch])
+                if len(vecs) != len(batch):
+                    # A caller without a row would otherwise block in encode() forever
+                    raise ValueError(f"encode_fn returned {len(vecs)} rows for {len(batch)} texts")
+                for (_, fut), v in zip(batch, vecs):
+                    fut.set_result(v)
+                err = False
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                err = True
+            self._record(len(batch), t1 - t0, time.perf_counter() - t1, err)
+
+    def _record(self, n: int, waited: float, encoded: float, err: bool) -> None:
+        b = next((i for i, ub in enumerate(BUCKETS) if n <= ub), len(BUCKETS))
+        with self._lock:
+            self._hist[b] += 1
+            self._stats["batches"] += 1
+            self._stats["items"] += n
+            self._stats["errors"] += int(err)
+            self._stats["wait_ms"] += waited * 1000.0
+            self._stats["encode_ms"] += encoded * 1000.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            st = dict(self._stats)
+            hist = list(self._hist)
+        n = st["batches"]
+        wait, enc = st.pop("wait_ms"), st.pop("encode_ms")
+        labels = [f"le_{ub}" for ub in BUCKETS] + [f"gt_{BUCKETS[-1]}"]
+        st.update({
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "mean_batch": round(st["items"] / n, 2) if n else 0.0,
+            "mean_wait_ms": round(wait / n, 3) if n else 0.0,
+            "mean_encode_ms": round(enc / n, 3) if n else 0.0,
+            "batch_size_hist": dict(zip(labels, hist)),
+        })
+        return st
@@ -0,0 +1,241 @@
+import os
+import re
+import sys
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from vector_store import NumpyStore, Point, QdrantStore
+
+CHECKPOINT = os.getenv("MIGRATE_CHECKPOINT", os.path.join(".jarvis", "migrate.json"))
+PROGRESS: Dict[str, Any] = {}
+_SKIP = ("chunk", "doc", "chunk_chars")
+
+
+def _load(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(path: str, st: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(st, f)
+    os.replace(tmp, path)
+
+
+def current_version(store: Any) -> int:
+    """Version of the collection (Qdrant alias target) or directory (NumpyStore symlink) being served."""
+    if isinstance(store, QdrantStore):
+        m = re.search(r"_v(\d+)$", store.resolve())
+    else:
+        m = re.search(r"\.v(\d+)$", os.path.realpath(store.path)) if store.path else None
+    return int(m.group(1)) if m else 1
+
+
+def _base(store: NumpyStore) -> str:
+    """The symlinked directory name; after a swap the store itself is opened at ``<base>.vN``."""
+    return re.sub(r"\.v\d+$", "", store.path.rstrip(os.sep))  # type: ignore[union-attr]
+
+
+def _target(mg: Any, version: int, dim: int) -> Tuple[str, Any]:
+    store = mg._store
+    if isinstance(store, QdrantStore):
+        name = f"{store.collection}_v{version}"
+        return name, store.create_version(name, dim)
+    if not store.path:
+        return ":memory:", NumpyStore(None, dim, store.dtype.name)
+    path = f"{_base(store)}.v{version}"
+    return path, NumpyStore(path, dim, store.dtype.name)
+
+
+def _swap(mg: Any, name: str, target: Any) -> Optional[str]:
+    """Point serving at the new version; returns what it was serving before."""
+    store = mg._store
+    if isinstance(store, QdrantStore):
+        old_name = store.point_alias(name)
+        if mg._doc_store is not None:
+            mg._doc_store = mg._doc_store.scoped(name)
+        return old_name
+    old = os.path.realpath(store.path) if store.path else None
+    if store.path:
+        base = _base(store)
+        if os.path.isdir(base) and not os.path.islink(base):
+            # Legacy plain directory: park it as v1 so the name can become a symlink
+            old = f"{base}.v1"
+            os.rename(base, old)
+        tmp = f"{base}.swap"
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+        os.symlink(os.path.basename(name), tmp)
+        os.replace(tmp, base)  # atomic on POSIX
+    with mg._ready_lock:
+        store.close()
+        mg._store = target
+        if mg._doc_store is not None:
+            mg._doc_store = mg._doc_store.scoped(mg._doc_scope(target))
+    return old
+
+
+def _prune(mg: Any, target: Any, batch: int) -> int:
+    """Delete target points whose source is gone (forgotten while the copy ran); returns how many.
+
+    The target IDs the current source would produce are diffed against what the
+    target holds, so it does not matter which pass copied a point.
+    """
+    keep = set()
+    offset = None
+    while True:
+        pts, offset = mg._store.scroll(batch, offset, with_vectors=False)
+        keep.update(mg.point_id(src, c, meta) for c, src, meta in _rechunk(mg, pts))
+        if offset is None:
+            break
+    stale: List[str] = []
+    offset = None
+    while True:
+        pts, offset = target.scroll(batch, offset, with_vectors=False)
+        stale += [str(p.id) for p in pts if str(p.id) not in keep]
+        if offset is None:
+            break
+    for i in range(0, len(stale), batch):
+        target.delete(stale[i:i + batch])
+    if stale and mg._doc_store is not None:
+        mg._doc_store.scoped(mg._doc_scope(target)).delete_many(stale)
+    return len(stale)
+
+
+def _rechunk(mg: Any, points: List[Any]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """(chunk, source, meta) records from stored points under the current chunker.
+
+    Points are chunks, not documents, so re-chunking can split an old chunk but
+    never merges neighbours; re-sync files (memory_admin sync) for a full re-split.
+    """
+    out: List[Tuple[str, str, Dict[str, Any]]] = []
+    for p in mg._hydrate(points):
+        pl = p.payload or {}
+        text = pl.get("chunk", "")
+        if not text:
+            continue
+        src = pl.get("source", "adhoc")
+        meta = {k: v for k, v in pl.items() if k not in _SKIP}
+        for c in mg._chunk_text(text, src) or [text]:
+            out.append((c, src, meta))
+    return out
+
+
+def _copy(mg: Any, records: List[Tuple[str, str, Dict[str, Any]]], target: Any,
+          encode: Callable[[List[str]], Any]) -> int:
+    """Embed and write records missing from ``target``; existing IDs are skipped before encoding."""
+    fresh: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    for c, src, meta in records:
+        fresh.setdefault(mg.point_id(src, c, meta), (c, meta))
+    if not fresh:
+        return 0
+    have = {str(p.id) for p in target.retrieve(list(fresh), with_payload=False)}
+    ids = [pid for pid in fresh if pid not in have]
+    if not ids:
+        return 0
+    vecs = encode([fresh[pid][0] for pid in ids])
+    mg._write_points([Point(id=pid, vector=[float(x) for x in vecs[i]], payload={**fresh[pid][1], "chunk": fresh[pid][0]})
+                      for i, pid in enumerate(ids)], store=target)
+    return len(ids)
+
+
+def migrate(model: Optional[str] = None, backend: Optional[str] = None, version: Optional[int] = None,
+            batch: int = 256, checkpoint: str = CHECKPOINT, swap: bool = True, max_passes: int = 3,
+            on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Re-chunk and re-embed every point into a new versioned collection, then swap it in.
+
+    Serving keeps reading the current version (through the alias) the whole time.
+    Points are streamed by scroll in ``batch``-sized pages; after each page the
+    scroll offset goes to ``checkpoint``, so an interrupted run resumes where it
+    stopped (with the arguments it was started with). The first pass copies
+    everything; later passes only embed points written meanwhile, until a pass
+    finds nothing new. Points deleted from the source meanwhile are then deleted
+    from the target too (see ``_prune``). Then the alias (Qdrant) or directory
+    symlink (NumpyStore) is switched and the lexical index rebuilt.
+
+    ``model``/``backend`` pick a new embedder (the migrating process then serves
+    with it after the swap; other workers need EMBED_MODEL/EMBED_BACKEND updated
+    and a restart). Embedded Qdrant (``:memory:`` / QDRANT_PATH) is single-process,
+    so run it in the serving process, or against QDRANT_URL from the CLI.
+    """
+    import main_graph as mg
+    from memory_admin import reindex_lexical
+    mg._ensure_retrieval_ready()
+    st = _load(checkpoint)
+    if not st or st.get("status") == "done":
+        st = {"status": "copying", "version": version or current_version(mg._store) + 1, "model": model,
+              "backend": backend, "pass": 1, "offset": None, "scanned": 0, "written": 0, "pass_written": 0,
+              "started_at": time.time()}
+    if st["model"] is None and st["backend"] is None:
+        embedder = mg.emb
+        encode: Callable[[List[str]], Any] = mg._encode
+    else:
+        from embedders import get_embedder
+        embedder = get_embedder(st["backend"], model=st["model"] or mg.EMBED_MODEL, remote=False)
+        encode = lambda xs: embedder.encode(xs, normalize_embeddings=True)  # noqa: E731
+    dim = embedder.get_sentence_embedding_dimension()
+    name, target = _target(mg, st["version"], dim)
+    st["target"] = name
+    t0 = time.time()
+    scanned0 = st["scanned"]
+    PROGRESS.clear()
+    PROGRESS.update({"status": st["status"], "target": name})
+
+    while st["status"] == "copying":
+        total = mg._store.count()  # type: ignore[union-attr]
+        offset = st["offset"]
+        while True:
+            pts, offset = mg._store.scroll(batch, offset, with_vectors=False)  # type: ignore[union-attr]
+            n = _copy(mg, _rechunk(mg, pts), target, encode)
+            st["offset"] = offset
+            st["scanned"] += len(pts); st["written"] += n; st["pass_written"] += n
+            _save(checkpoint, st)
+            done = st["scanned"] - scanned0
+            rate = done / max(time.time() - t0, 1e-9)
+            in_pass = st["scanned"] if st["pass"] == 1 else None
+            PROGRESS.update({
+                "pass": st["pass"], "scanned": st["scanned"], "written": st["written"], "total": total,
+                "points_per_sec": round(rate, 1),
+                "percent": round(100.0 * min(in_pass / total, 1.0), 1) if in_pass is not None and total else None,
+                "eta_sec": round(max(total - in_pass, 0) / rate, 1) if in_pass is not None and rate else None,
+            })
+            if on_progress:
+                on_progress(dict(PROGRESS))
+            if offset is None:
+                break
+        # Catch-up: another pass picks up anything ingested while this one ran
+        if (st["pass"] > 1 and st["pass_written"] == 0) or st["pass"] >= max_passes:
+            st["status"] = "copied"
+        else:
+            st.update({"pass": st["pass"] + 1, "offset": None, "pass_written": 0})
+        _save(checkpoint, st)
+
+    pruned = _prune(mg, target, batch) if st["status"] == "copied" else 0
+    out: Dict[str, Any] = {"target": name, "version": st["version"], "scanned": st["scanned"],
+                           "written": st["written"], "passes": st["pass"], "pruned": pruned,
+                           "points": target.count(), "seconds": round(time.time() - t0, 3), "swapped": False}
+    if swap and st["status"] == "copied":
+        out["previous"] = _swap(mg, name, target)
+        if embedder is not mg.emb:
+            with mg._ready_lock:
+                mg.emb, mg.EMBED_MODEL, mg._embed_cache = embedder, st["model"] or mg.EMBED_MODEL, None
+        out["lexical"] = reindex_lexical(batch)
+        mg._query_cache.bump()
+        st["status"] = "done"
+        _save(checkpoint, st)
+        out["swapped"] = True
+    PROGRESS.update({"status": st["status"], **out})
+    return out
+
+
+def progress_line(p: Dict[str, Any]) -> None:
+    pct = f"{p['percent']:5.1f}%" if p.get("percent") is not None else " catch-up"
+    eta = f" eta {p['eta_sec']:.0f}s" if p.get("eta_sec") is not None else ""
+    print(f"pass {p['pass']} {pct} scanned {p['scanned']}/{p['total']} written {p['written']} "
+          f"({p['points_per_sec']}/s){eta}", file=sys.stderr)
@@ -0,0 +1,73 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+def query_key(query: str, k: int, **filters: Any) -> Tuple[Hashable, ...]:
+    """Cache key for a retrieval: case/whitespace-normalized query, k and the non-empty filters."""
+    norm = re.sub(r"\s+", " ", query).strip().lower()
+    return (norm, k, tuple(sorted((f, v) for f, v in filters.items() if v is not None)))
+
+
+class QueryCache:
+    """LRU of retrieval results tagged with the collection generation they were computed at.
+
+    Every write or delete calls ``bump()``; entries from an older generation (or
+    older than ``ttl`` seconds) are treated as misses, so a hit is always
+    consistent with the current collection.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self._lru: "OrderedDict[Hashable, Tuple[int, float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def bump(self) -> None:
+        with self._lock:
+            self.generation += 1
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            ent = self._lru.get(key)
+            if ent is not None:
+                gen, at, res = ent
+                if gen == self.generation and time.time() - at <= self.ttl:
+                    self._lru.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return [dict(h) for h in res]
+                del self._lru[key]
+                self._stats["stale"] += 1
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: Hashable, result: List[Dict[str, Any]], generation: Optional[int] = None) -> None:
+        """Store ``result``; pass the generation read before searching so a racing write wins."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            gen = self.generation if generation is None else generation
+            if gen != self.generation:
+                return
+            self._lru[key] = (gen, time.time(), [dict(h) for h in result])
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            st: Dict[str, Any] = dict(self._stats)
+            st["entries"] = len(self._lru)
+            st["generation"] = self.generation
+        total = st["hits"] + st["misses"]
+        st["hit_rate"] = round(st["hits"] / total, 3) if total else 0.0
+        return st
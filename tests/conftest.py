@@ -0,0 +1,68 @@
+import os
+import hashlib
+import tempfile
+
+import numpy as np
+import pytest
+
+# web_jarvis is reloaded by many tests; a boot warm-up thread would race their monkeypatching
+os.environ.setdefault("WARMUP_ON_BOOT", "false")
+# Tests stub the LLM per test; cached answers from an earlier test would bypass the stub
+os.environ.setdefault("LLM_CACHE", "false")
+# The chunker records its tokenizer choice; keep the suite's out of the working tree
+os.environ.setdefault("CHUNK_TOKENIZER_RECORD", os.path.join(tempfile.mkdtemp(), "chunk_tokenizer.json"))
+
+
+class FakeEmb:
+    """Tiny bag-of-words embedder so retrieval tests run without torch."""
+
+    def __init__(self, dim: int = 16):
+        self.dim = dim
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, normalize_embeddings=True, **kw):
+        self.calls += len(texts)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            for w in t.lower().split():
+                out[i, int(hashlib.md5(w.encode()).hexdigest(), 16) % self.dim] += 1.0
+            n = np.linalg.norm(out[i])
+            out[i] = out[i] / n if n else 1.0 / np.sqrt(self.dim)
+        return out
+
+
+@pytest.fixture
+def retrieval(monkeypatch):
+    """main_graph wired to a fresh in-memory Qdrant and the fake embedder."""
+    from qdrant_client import QdrantClient
+    import main_graph as mg
+    from lexical_index import BM25Index
+    from query_cache import QueryCache
+    from doc_store import DocStore
+    monkeypatch.setattr(mg, "q", QdrantClient(":memory:"))
+    monkeypatch.setattr(mg, "emb", FakeEmb())
+    monkeypatch.setattr(mg, "_embed_cache", None)
+    monkeypatch.setattr(mg, "_lexical", BM25Index())
+    monkeypatch.setattr(mg, "_query_cache", QueryCache())
+    monkeypatch.setattr(mg, "_store", None)
+    monkeypatch.setattr(mg, "_doc_store", DocStore(":memory:"))
+    return mg
+
+
+@pytest.fixture(autouse=True)
+def fresh_llm_breaker(monkeypatch):
+    """Unreachable-API failures in one test must not leave the LLM circuit open for the next."""
+    import main_graph as mg
+    from circuit import CircuitBreaker
+    monkeypatch.setattr(mg, "_breaker", CircuitBreaker())
+
+
+@pytest.fixture(autouse=True)
+def fresh_preflight(monkeypatch):
+    """Reloading web_jarvis reruns preflight; FATAL entries from one test would make the next exit."""
+    import preflight
+    monkeypatch.setattr(preflight, "FATAL", [])
+    monkeypatch.setattr(preflight, "WARN", [])
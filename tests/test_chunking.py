@@ -0,0 +1,66 @@
+from chunking import chunk_text, strategy_for, approx_tokens
+
+DOC = """# Title
+
+Intro paragraph. It has two sentences!
+
+## Section A
+""" + " ".join(f"Sentence number {i} is here." for i in range(60)) + """
+
+```
+code line
+
+more code
+```
+
+## Section B
+Short closing note.
+"""
+
+
+def test_chunks_respect_token_budget_and_sentence_boundaries():
+    for strategy in ("sentence", "paragraph", "markdown"):
+        chunks = chunk_text(DOC, strategy, max_tokens=50, overlap_tokens=8, count=approx_tokens)
+        assert chunks, strategy
+        for c in chunks:
+            assert approx_tokens(c) <= 50, (strategy, c)
+            assert not c.startswith("is here"), c  # never cut mid-sentence
+
+
+def test_markdown_sections_and_fences_stay_intact():
+    chunks = chunk_text(DOC, "markdown", max_tokens=50, overlap_tokens=8, count=approx_tokens)
+    assert any(c.startswith("## Section B") for c in chunks)
+    assert any("code line\n\nmore code" in c for c in chunks)
+
+
+def test_overlap_repeats_trailing_sentence():
+    chunks = chunk_text(DOC, "sentence", max_tokens=40, overlap_tokens=8, count=approx_tokens)
+    tail = chunks[1].rsplit(". ", 1)[-1]
+    assert chunks[2].startswith(tail.split(" is here")[0])
+
+
+def test_strategy_selection(monkeypatch):
+    monkeypatch.delenv("CHUNKER", raising=False)
+    assert strategy_for("file:/notes/a.md") == "markdown"
+    assert strategy_for("file:/notes/a.txt") == "paragraph"
+    assert strategy_for("chat") == "sentence"
+    monkeypatch.setenv("CHUNKER", "fixed")
+    assert strategy_for("file:/notes/a.md") == "fixed"
+
+
+def test_tokenizer_choice_is_recorded_and_never_switched_silently(tmp_path, monkeypatch):
+    import pytest
+    import chunking
+    record = tmp_path / "tok.json"
+    monkeypatch.setenv("CHUNK_TOKENIZER_RECORD", str(record))
+    monkeypatch.setenv("CHUNK_TOKENIZER", "auto")
+    monkeypatch.setattr(chunking, "_auto_candidates", lambda: [str(tmp_path / "missing")])
+    chunking._resolve.cache_clear()
+    assert chunking.get_token_counter() is approx_tokens and chunking.chunk_tokenizer() == "approx"
+    assert '"approx"' in record.read_text()
+    # A recorded tokenizer that is no longer on disk stops chunking instead of falling back
+    record.write_text('{"tokenizer": "%s"}' % (tmp_path / "gone"))
+    chunking._resolve.cache_clear()
+    with pytest.raises(RuntimeError):
+        chunking.get_token_counter()
+    chunking._resolve.cache_clear()
@@ -0,0 +1,110 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import circuit
+import main_graph as mg
+from circuit import CircuitBreaker, CircuitOpenError, DeadlineExceeded, RetryPolicy
+
+
+class HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"status {status}")
+        self.status_code = status
+        self.response = SimpleNamespace(status_code=status, headers=headers or {})
+
+
+def test_breaker_opens_on_error_rate_and_closes_after_probe(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit.time, "monotonic", lambda: now[0])
+    b = CircuitBreaker(window=60, min_calls=4, error_rate=0.5, cooldown=10)
+    for ok in (True, False, True):
+        assert b.allow(); b.record(ok)
+    assert b.state == "closed"
+    assert b.allow(); b.record(False)  # 2 of 4 failed
+    assert b.state == "open" and not b.allow()
+    now[0] += 10
+    assert b.allow() and not b.allow()  # one half-open probe at a time
+    b.record(False)
+    assert b.state == "open"
+    now[0] += 10
+    assert b.allow(); b.record(True)
+    assert b.state == "closed" and b.stats()["opens"] == 2 and b.stats()["calls_in_window"] == 0
+
+
+def test_retry_rules_per_error_class():
+    p = RetryPolicy()
+    waits = []
+    calls = {"n": 0}
+
+    def flaky(t):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise HTTPError(429, {"retry-after": "0.2"})
+        if calls["n"] == 2:
+            raise HTTPError(503)
+        return "ok"
+
+    assert circuit.call(flaky, CircuitBreaker(), p, sleep=waits.append) == "ok"
+    assert waits[0] == 0.2 and len(waits) == 2
+
+    def bad_request(t):
+        calls["n"] += 1
+        raise HTTPError(400)
+
+    calls["n"] = 0
+    b = CircuitBreaker(min_calls=1)
+    with pytest.raises(HTTPError):
+        circuit.call(bad_request, b, p, sleep=waits.append)
+    assert calls["n"] == 1 and b.state == "closed"  # not retried, not an outage
+
+    def broken(t):
+        raise ValueError("bad payload")
+
+    with pytest.raises(ValueError):
+        circuit.call(broken, b, p, sleep=waits.append)
+    assert b.state == "closed" and b.stats()["calls_in_window"] == 2
+    assert p.stats()["errors"] == {"rate_limit": 1, "server": 1, "client": 1, "unknown": 1}
+
+
+def test_deadline_caps_timeouts_and_stops_retries():
+    p = RetryPolicy()
+    seen = []
+
+    def slow(t):
+        seen.append(t)
+        raise HTTPError(429, {"retry-after": "5"})
+
+    with circuit.deadline(1.0):
+        with pytest.raises(HTTPError):
+            circuit.call(slow, CircuitBreaker(), p, timeout=30, sleep=lambda s: None)
+        with circuit.deadline(0.001):
+            time.sleep(0.01)
+            with pytest.raises(DeadlineExceeded):
+                circuit.call(slow, CircuitBreaker(), p, timeout=30)
+    assert len(seen) == 1 and seen[0] <= 1.0  # a 5s Retry-After does not fit in the deadline
+    assert circuit.remaining() is None
+
+
+def test_llm_calls_fail_fast_once_the_breaker_opens(monkeypatch):
+    calls = {"n": 0}
+
+    def create(**kw):
+        calls["n"] += 1
+        raise HTTPError(500)
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(mg, "_get_openai_client", lambda: fake)
+    monkeypatch.setattr(mg, "_breaker", CircuitBreaker(min_calls=3, cooldown=60))
+    monkeypatch.setattr(mg, "_retry", RetryPolicy({"server": (1, 0.0)}))
+    assert "LLM error" in mg.call_llm_json("x")["answer"]
+    assert mg.call_llm_json("x")["error"]
+    n = calls["n"]
+    t0 = time.time()
+    out = mg.call_llm_json("x")
+    assert out["answer"].startswith("LLM temporarily unavailable") and calls["n"] == n
+    assert time.time() - t0 < 0.1
+    assert mg.llm_circuit_stats()["state"] == "open"
+    monkeypatch.setenv("LLM_CIRCUIT_OPEN", "true")
+    assert mg.llm_circuit_stats()["state"] == "forced_open"
@@ -0,0 +1,46 @@
+from context_pack import TokenCounter, pack
+
+TC = TokenCounter("openai:gpt-4o-mini")
+
+
+def test_near_duplicates_are_dropped():
+    hits = [{"text": "the storage unit gate code is 5521"},
+            {"text": "The storage unit gate code is 5521."},
+            {"text": "roof repair budget is 4000"}]
+    ctx, st = pack(hits, 1000, TC)
+    assert ctx == "the storage unit gate code is 5521\n---\nroof repair budget is 4000"
+    assert st["duplicates"] == 1 and st["kept"] == 2
+
+
+def test_budget_skips_what_does_not_fit_and_cuts_an_oversized_first_hit():
+    big = "word " * 400
+    ctx, st = pack([{"text": "short fact"}, {"text": big}, {"text": "another short fact"}], 20, TC)
+    assert "short fact" in ctx and big.strip() not in ctx and st["skipped"] == 1
+    assert st["context_tokens"] <= 20
+    ctx, st = pack([{"text": big}], 20, TC)
+    assert st["truncated"] == 1 and TC.count(ctx) <= 20 and ctx
+
+
+def test_decide_prompt_is_packed_and_counted(monkeypatch):
+    import main_graph as mg
+    seen = []
+    monkeypatch.setattr(mg, "call_llm_json", lambda prompt: seen.append(prompt) or {"type": "FINAL", "answer": "ok"})
+    monkeypatch.setattr(mg, "CONTEXT_TOKEN_BUDGET", 30)
+    calls = mg.PROMPT_STATS["calls"]
+    ctx = [{"text": "alpha fact " * 5}, {"text": "alpha fact " * 5}, {"text": "beta " * 200}]
+    mg.decide_node({"goal": "what is alpha?", "context": ctx, "decision": {}, "log": []})
+    assert seen[0].count("alpha fact") == 5 and "beta" not in seen[0]
+    assert seen[0].startswith(mg.mentor_header()) and "GOAL: what is alpha?" in seen[0]
+    st = mg.prompt_stats()
+    assert st["calls"] == calls + 1 and st["last"]["duplicates"] == 1
+    assert st["last"]["prompt_tokens"] == mg._PROMPT_STATIC_TOKENS + st["last"]["context_tokens"] + TC.count("what is alpha?")
+
+
+def test_retrieve_over_fetches_for_the_packer(monkeypatch):
+    import main_graph as mg
+    seen = []
+    monkeypatch.delenv("RETRIEVE_K", raising=False)
+    monkeypatch.setenv("DISABLE_RETRIEVAL", "false")
+    monkeypatch.setattr(mg, "topk", lambda q, k, **kw: seen.append(k) or [])
+    mg.retrieve_node({"goal": "x", "context": [], "decision": {}, "log": []})
+    assert seen == [15]
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from doc_store import DocStore
+
+
+def test_zlib_round_trip_delete_and_stats(tmp_path):
+    s = DocStore(str(tmp_path / "docs.sqlite3"))
+    s.put_many({"a": "hello " * 200, "b": "wörld"})
+    assert s.get_many(["a", "b", "zz"]) == {"a": "hello " * 200, "b": "wörld"}
+    s.delete_many(["a"])
+    st = s.stats()
+    assert st["docs"] == 1 and st["codec"] == "zlib"
+    assert DocStore(str(tmp_path / "docs.sqlite3")).get_many(["b"]) == {"b": "wörld"}
+
+
+def test_zstd_dictionary_compresses_and_old_rows_still_read(tmp_path):
+    pytest.importorskip("zstandard")
+    path = str(tmp_path / "docs.sqlite3")
+    s = DocStore(path, codec="zstd")
+    s.put_many({"pre": "message before the dictionary"})
+    samples = [f"user {i} asked about the weekly budget review and grocery list {i * 7}" for i in range(500)]
+    assert s.train_dictionary(samples, size=4096) is not None
+    s.put_many({f"d{i}": t for i, t in enumerate(samples)})
+    again = DocStore(path, codec="zstd")
+    assert again.get_many(["pre", "d3"]) == {"pre": "message before the dictionary", "d3": samples[3]}
+    assert again.stats()["ratio"] > 1.5
+
+
+def test_payload_keeps_reference_and_topk_reads_only_final_hits(retrieval, monkeypatch):
+    mg = retrieval
+    for i in range(30):
+        mg.ingest(f"reminder {i} about the dentist appointment", src="notes")
+    pts, _ = mg._store.scroll(5)
+    assert all("chunk" not in p.payload and p.payload["doc"] == str(p.id) for p in pts)
+    fetched = []
+    real = mg._doc_store.get_many
+    monkeypatch.setattr(mg._doc_store, "get_many", lambda ids: fetched.extend(ids) or real(ids))
+    hits = mg.topk("dentist appointment", k=3)
+    assert len(hits) == 3 and all("dentist" in h["text"] for h in hits)
+    assert len(fetched) == 3
+
+
+def test_scopes_are_separate_and_legacy_rows_are_adopted(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "docs.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE docs (id TEXT PRIMARY KEY, codec TEXT, raw INTEGER, body BLOB)")
+    db.execute("INSERT INTO docs VALUES ('old', 'zlib', 3, ?)", (__import__("zlib").compress(b"old"),))
+    db.commit(); db.close()
+    v1 = DocStore(path, scope="jarvis_v1")
+    v2 = v1.scoped("jarvis_v2")
+    v2.put_many({"new": "fresh"})
+    assert v1.get_many(["old", "new"]) == {"old": "old"} and v2.get_many(["old", "new"]) == {"new": "fresh"}
+    v2.clear()
+    assert v1.get_many(["old"]) == {"old": "old"} and v2.stats()["docs"] == 0
+
+
+def test_in_memory_collection_keeps_its_texts_in_process(retrieval, tmp_path, monkeypatch):
+    mg = retrieval
+    path = str(tmp_path / "docs.sqlite3")
+    monkeypatch.setenv("DOC_STORE", "true")
+    monkeypatch.setenv("DOC_STORE_PATH", path)
+    monkeypatch.setattr(mg, "_doc_store", None)
+    mg.ingest("the spare key is under the blue flowerpot", src="notes")
+    # The collection dies with the process: its texts must not pile up in, or be deleted from, the shared file
+    assert mg._doc_store.path == ":memory:" and not os.path.exists(path)
+    assert "flowerpot" in mg.topk("spare key", k=1)[0]["text"]
+    # A persistent collection keeps its texts in the file
+    monkeypatch.setenv("QDRANT_PATH", str(tmp_path / "qdrant"))
+    monkeypatch.setattr(mg, "q", None)
+    monkeypatch.setattr(mg, "_store", None)
+    monkeypatch.setattr(mg, "_doc_store", None)
+    try:
+        mg.ingest("the spare key is under the blue flowerpot", src="notes")
+        assert mg._doc_store.path == path and DocStore(path, scope="jarvis_v1").stats()["docs"] == 1
+    finally:
+        mg.q.close()
@@ -0,0 +1,62 @@
+import numpy as np
+
+from embed_cache import EmbeddingCache, cache_key
+
+
+def _fake_encoder(calls):
+    def enc(texts):
+        calls.append(list(texts))
+        return np.asarray([[float(len(t)), 1.0, 0.0] for t in texts], dtype=np.float32)
+    return enc
+
+
+def test_normalized_text_shares_a_key():
+    assert cache_key("m", "hello   world ") == cache_key("m", "hello world")
+    assert cache_key("m", "hello") != cache_key("other-model", "hello")
+
+
+def test_memory_tier_hits_and_dedup_within_batch():
+    calls = []
+    c = EmbeddingCache("m", max_bytes=1024)
+    v1 = c.encode(["a", "bb", "a"], _fake_encoder(calls))
+    assert v1.shape == (3, 3)
+    assert calls == [["a", "bb"]]
+    c.encode(["bb"], _fake_encoder(calls))
+    assert len(calls) == 1
+    st = c.stats()
+    assert st["hits"] == 1 and st["misses"] == 2
+
+
+def test_lru_is_bounded_by_bytes():
+    c = EmbeddingCache("m", max_bytes=3 * 4 * 2)  # room for two 3-dim float32 vectors
+    c.encode(["a", "b", "c"], _fake_encoder([]))
+    assert c.stats()["mem_entries"] == 2
+    assert c.stats()["mem_bytes"] <= 24
+    # Entries own their memory: evicting one must not leave its batch matrix alive
+    assert all(v.base is None for v in c._lru.values())
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    calls = []
+    c1 = EmbeddingCache("m", disk_path=str(tmp_path), dim=3)
+    c1.encode(["persist me"], _fake_encoder(calls))
+    c2 = EmbeddingCache("m", disk_path=str(tmp_path), dim=3)
+    v = c2.encode(["persist me"], _fake_encoder(calls))
+    assert len(calls) == 1
+    assert c2.stats()["disk_hits"] == 1
+    assert np.allclose(v[0], [10.0, 1.0, 0.0])
+
+
+def test_disk_tier_shared_between_processes_stays_aligned(tmp_path):
+    from embed_cache import DiskTier
+    # Two tiers on one directory stand in for two worker processes
+    a, b = DiskTier(str(tmp_path), 3), DiskTier(str(tmp_path), 3)
+    a.put_many(["k1"], np.asarray([[1, 1, 1]], dtype=np.float32))
+    b.put_many(["k2", "k1"], np.asarray([[2, 2, 2], [9, 9, 9]], dtype=np.float32))
+    assert np.allclose(a.get("k2"), [2, 2, 2]) and np.allclose(b.get("k1"), [1, 1, 1])
+    # A writer that died mid-append leaves a torn tail; the next append cuts it off
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(b"\x00" * 6)
+    a.put_many(["k3"], np.asarray([[3, 3, 3]], dtype=np.float32))
+    c = DiskTier(str(tmp_path), 3)
+    assert len(c) == 3 and np.allclose(c.get("k3"), [3, 3, 3]) and np.allclose(c.get("k1"), [1, 1, 1])
@@ -0,0 +1,48 @@
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import FakeEmb
+from embed_server import EmbedServer, RemoteEmbedder, connect
+
+
+@pytest.fixture
+def server(tmp_path):
+    fake = FakeEmb()
+    fake.name = "fake-bow"
+    srv = EmbedServer(str(tmp_path / "e.sock"), fake, max_wait_ms=1)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield srv, fake
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_remote_embedder_matches_local_model(server):
+    srv, fake = server
+    remote = RemoteEmbedder(srv.server_address)
+    assert remote.name == "fake-bow" and remote.get_sentence_embedding_dimension() == fake.dim
+    texts = ["pay the bill", "call mum", "naïve café ünïcode"]
+    assert np.allclose(remote.encode(texts), fake.encode(texts), atol=1e-6)
+    assert remote.encode([]).shape == (0, fake.dim)
+
+
+def test_remote_embedder_is_shared_across_threads(server):
+    srv, fake = server
+    remote = RemoteEmbedder(srv.server_address)
+    out = {}
+    threads = [threading.Thread(target=lambda i=i: out.__setitem__(i, remote.encode([f"text {i}"])[0]))
+               for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(np.allclose(out[i], fake.encode([f"text {i}"])[0]) for i in range(8))
+
+
+def test_connect_falls_back_without_a_sidecar(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMBED_SOCKET", str(tmp_path / "missing.sock"))
+    assert connect() is None
+    monkeypatch.delenv("EMBED_SOCKET")
+    assert connect() is None
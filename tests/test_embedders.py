@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from conftest import FakeEmb
+from embedders import OnnxEmbedder, check_equivalence, get_embedder
+
+
+class _Noisy(FakeEmb):
+    """FakeEmb with small deterministic noise, standing in for a quantized export."""
+
+    def encode(self, texts, normalize_embeddings=True, **kw):
+        out = super().encode(texts, normalize_embeddings=False)
+        out = out + np.random.default_rng(0).normal(scale=0.01, size=out.shape).astype(np.float32)
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
+class _Reversed(FakeEmb):
+    def encode(self, texts, normalize_embeddings=True, **kw):
+        return super().encode(texts)[:, ::-1].copy()
+
+
+TEXTS = ["pay the electricity bill", "call mum on sunday", "roof repair budget", "dentist next month"]
+
+
+def test_equivalence_accepts_close_and_rejects_different_embedders():
+    same = check_equivalence(FakeEmb(), _Noisy(), TEXTS)
+    assert same["ok"] and same["min_cosine"] > 0.98 and same["neighbour_agreement"] == 1.0
+    assert not check_equivalence(FakeEmb(), _Reversed(), TEXTS)["ok"]
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_embedder("tensorflow")
+
+
+def test_cache_is_keyed_on_embedder_name(retrieval):
+    fake = retrieval.emb
+    fake.name = "bge-small+onnx-int8"
+    retrieval._ensure_retrieval_ready()
+    assert retrieval._embed_cache.model == "bge-small+onnx-int8"
+
+
+def test_onnx_backend_loads_export(tmp_path):
+    pytest.importorskip("onnxruntime")
+    with pytest.raises(Exception):
+        OnnxEmbedder(str(tmp_path))  # no export in an empty directory
@@ -0,0 +1,37 @@
+import time
+
+
+def _texts(hits):
+    return [h["text"] for h in hits]
+
+
+def test_thread_scope_isolates_history_but_keeps_shared(retrieval):
+    mg = retrieval
+    mg.ingest("my locker combination is 1234", src="chat", meta={"thread_id": "alice"})
+    mg.ingest("my locker combination is 9876", src="chat", meta={"thread_id": "bob"})
+    mg.ingest("locker rules: combinations reset monthly", src="notes")
+    got = _texts(mg.topk("locker combination", k=5, thread_id="alice"))
+    assert any("1234" in t for t in got)
+    assert any("rules" in t for t in got)
+    assert not any("9876" in t for t in got)
+    own = _texts(mg.topk("locker combination", k=5, thread_id="alice", include_shared=False))
+    assert own == ["my locker combination is 1234"]
+
+
+def test_source_and_time_filters(retrieval):
+    mg = retrieval
+    now = time.time()
+    mg.ingest("weekly budget review", src="notes", meta={"ts": now - 86400})
+    mg.ingest("weekly budget review done", src="chat", meta={"ts": now})
+    assert _texts(mg.topk("weekly budget", k=5, source="notes")) == ["weekly budget review"]
+    assert _texts(mg.topk("weekly budget", k=5, since=now - 60)) == ["weekly budget review done"]
+    assert _texts(mg.topk("weekly budget", k=5, until=now - 60)) == ["weekly budget review"]
+
+
+def test_retrieve_node_uses_configured_thread(retrieval, monkeypatch):
+    mg = retrieval
+    monkeypatch.delenv("DISABLE_RETRIEVAL", raising=False)
+    mg.ingest("favourite colour is teal", src="chat", meta={"thread_id": "t1"})
+    mg.ingest("favourite colour is amber", src="chat", meta={"thread_id": "t2"})
+    out = mg.retrieve_node({"goal": "favourite colour"}, {"configurable": {"thread_id": "t2"}})
+    assert _texts(out["context"]) == ["favourite colour is amber"]
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import main_graph as mg
+from hedge import Hedger
+
+
+def _warm(h, seconds=0.02, n=20):
+    for _ in range(n):
+        h.observe(seconds)
+
+
+def _slow_then_fast(log):
+    delays = iter([0.5, 0.01])
+
+    async def call():
+        d = next(delays)
+        log.append(("start", d))
+        try:
+            await asyncio.sleep(d)
+        except asyncio.CancelledError:
+            log.append(("cancelled", d))
+            raise
+        return d
+    return call
+
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    h = Hedger(max_rate=1.0)
+    assert asyncio.run(h.run(lambda: asyncio.sleep(0, "x"))) == ("x", False)  # no samples yet: no hedge
+    _warm(h)
+    log = []
+    out, hedged = asyncio.run(h.run(_slow_then_fast(log)))
+    assert out == 0.01 and hedged and ("cancelled", 0.5) in log
+    st = h.stats()
+    assert st["hedges_fired"] == 1 and st["hedge_wins"] == 1 and st["delay_ms"] >= 20
+
+
+def test_hedge_rate_is_capped_by_budget():
+    h = Hedger(max_rate=0.5, budget_usd=10.0, price_in=1.0, price_out=0.0)
+    _warm(h)
+    # $20 spent within the first hour projects far past a $10 month: no headroom for hedges
+    h.charge(SimpleNamespace(prompt_tokens=20_000_000, completion_tokens=0))
+    log = []
+    out, hedged = asyncio.run(h.run(_slow_then_fast(log)))
+    assert out == 0.5 and not hedged and len(log) == 1
+    assert h.stats()["suppressed_budget"] == 1 and h.stats()["rate_cap"] == 0.0
+    h2 = Hedger(max_rate=0.5)
+    _warm(h2)
+    for _ in range(2):
+        asyncio.run(h2.run(_slow_then_fast([])))
+    assert h2.stats()["hedges_fired"] == 1 and h2.stats()["suppressed_rate"] == 1
+
+
+def test_call_llm_json_hedges_when_enabled(monkeypatch):
+    calls = []
+
+    async def create(**kw):
+        n = len(calls)
+        calls.append(n)
+        await asyncio.sleep(0.5 if n == 0 else 0.01)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f'{{"answer": "{n}"}}'))],
+                               usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10))
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    h = Hedger(max_rate=1.0)
+    _warm(h)
+    monkeypatch.setattr(mg, "_hedger", h)
+    monkeypatch.setattr(mg, "_get_async_openai_client", lambda: fake)
+    monkeypatch.setenv("LLM_HEDGE", "true")
+    assert mg.call_llm_json("x") == {"answer": "1"}
+    st = mg.llm_hedge_stats()
+    assert st["enabled"] and st["hedge_wins"] == 1 and st["hedge_spend_usd"] > 0
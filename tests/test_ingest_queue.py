@@ -0,0 +1,68 @@
+import threading
+import time
+
+from ingest_queue import IngestQueue
+
+
+def test_worker_coalesces_pending_items():
+    batches = []
+    gate = threading.Event()
+
+    def sink(items):
+        gate.wait(1.0)
+        batches.append(list(items))
+
+    q = IngestQueue(sink, maxsize=100, batch_max=50)
+    for i in range(10):
+        assert q.submit(f"text {i}", src="test")
+    gate.set()
+    assert q.flush(timeout=2.0)
+    assert sum(len(b) for b in batches) == 10
+    # First item may go alone while the rest pile up; the remainder is coalesced
+    assert len(batches) <= 2
+    st = q.stats()
+    assert st["ingested"] == 10 and st["depth"] == 0
+
+
+def test_drop_policies_when_full():
+    gate = threading.Event()
+    q = IngestQueue(lambda items: gate.wait(1.0), maxsize=2, batch_max=1, policy="drop_new")
+    results = [q.submit(f"t{i}") for i in range(6)]
+    assert results.count(False) >= 1
+    assert q.stats()["dropped"] >= 1
+    gate.set()
+    assert q.close(timeout=2.0)
+    assert q.submit("after close") is False
+
+
+def test_sink_errors_are_counted_not_raised():
+    def sink(items):
+        raise RuntimeError("boom")
+
+    q = IngestQueue(sink, maxsize=10)
+    q.submit("x")
+    assert q.flush(timeout=2.0)
+    st = q.stats()
+    assert st["errors"] == 1 and "boom" in st["last_error"]
+
+
+def test_close_drains_and_joins_the_worker():
+    seen = []
+    q = IngestQueue(lambda items: seen.extend(items), maxsize=100, batch_max=4)
+    for i in range(10):
+        q.submit(f"t{i}")
+    assert q.close(timeout=2.0)
+    assert len(seen) == 10 and not q._worker.is_alive()
+    assert q.close(timeout=0.1)  # idempotent
+
+
+def test_close_reports_what_it_could_not_ingest():
+    gate = threading.Event()
+    q = IngestQueue(lambda items: gate.wait(2.0), maxsize=100, batch_max=1)
+    for i in range(5):
+        q.submit(f"t{i}")
+    time.sleep(0.05)  # the worker takes t0 into the sink and blocks there
+    assert not q.close(timeout=0.2)
+    assert q.stats()["dropped"] == 4
+    gate.set()
+    assert q.join(timeout=2.0) and q.stats()["ingested"] == 1
@@ -0,0 +1,28 @@
+import os
+
+from ingest_sync import sync_directory
+
+
+def test_sync_only_touches_the_diff(retrieval, tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("alpha " * 300)
+    (docs / "b.md").write_text("bravo " * 300)
+    manifest = str(tmp_path / "manifest.json")
+    count = lambda: retrieval.q.count(retrieval.COLL).count
+
+    first = sync_directory(str(docs), manifest_path=manifest)
+    assert first["added"] == 2 and first["new_chunks"] == count()
+
+    again = sync_directory(str(docs), manifest_path=manifest)
+    assert again["unchanged"] == 2 and again["new_chunks"] == 0
+
+    (docs / "a.md").write_text("alpha " * 100)
+    os.utime(docs / "a.md", (1, 1))
+    (docs / "b.md").unlink()
+    (docs / "c.md").write_text("charlie")
+    diff = sync_directory(str(docs), manifest_path=manifest)
+    assert (diff["added"], diff["changed"], diff["removed"]) == (1, 1, 1)
+    assert diff["deleted_points"] > 0
+    texts = {p.payload["chunk"] for p in retrieval._hydrate(retrieval.q.scroll(retrieval.COLL, limit=100)[0])}
+    assert texts == {("alpha " * 100).strip(), "charlie"}
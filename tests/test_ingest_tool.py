@@ -0,0 +1,34 @@
+def test_stream_ingest_batches_and_reports(retrieval, tmp_path):
+    f = tmp_path / "export.txt"
+    f.write_text("".join(f"line {i} of a long export\n" for i in range(2000)))
+    tool = retrieval.load_tool("ingest.source")
+    out = tool.run({"path": str(f), "stream": True, "batch_size": 8})
+    assert out["mode"] == "stream"
+    from chunking import chunk_text
+    expected = len(chunk_text(f.read_text(), "paragraph"))
+    assert out["chunks"] == expected and out["new_chunks"] == expected
+    assert out["batches"] == -(-expected // 8)
+    assert out["chunks_per_sec"] > 0
+    # Second pass finds every chunk already stored
+    again = tool.run({"path": str(f), "stream": True, "batch_size": 8})
+    assert again["new_chunks"] == 0
+
+
+def test_fixed_chunker_matches_legacy_slicing(tmp_path):
+    from chunking import iter_file_chunks
+    text = "abcdefghij\n" * 500
+    f = tmp_path / "t.txt"
+    f.write_text(text)
+    assert list(iter_file_chunks(str(f), "fixed")) == [text[i:i+1200] for i in range(0, len(text), 1200)]
+
+
+def test_bulk_ingest_directory(retrieval, tmp_path):
+    for i in range(5):
+        (tmp_path / f"note{i}.md").write_text(f"note number {i} " * 200)
+    (tmp_path / "skip.bin").write_bytes(b"\x00\x01")
+    tool = retrieval.load_tool("ingest.source")
+    out = tool.run({"path": str(tmp_path), "workers": 2, "batch_size": 4})
+    assert out["mode"] == "bulk", out
+    assert out["files"] == 5 and not out["errors"]
+    assert out["new_chunks"] == out["chunks"] == retrieval.q.count(retrieval.COLL).count
+    assert out["files_per_sec"] > 0
@@ -0,0 +1,40 @@
+from lexical_index import BM25Index, rrf_merge, tokenize
+
+
+def test_tokenize_keeps_joined_codes_and_parts():
+    toks = tokenize("Card 4417-1234 for Bob.")
+    assert "4417-1234" in toks and "4417" in toks and "1234" in toks and "bob" in toks
+
+
+def test_bm25_ranks_exact_token_and_filters():
+    idx = BM25Index()
+    idx.add("a", "the quick brown fox", {"thread_id": "t1"})
+    idx.add("b", "account 998877 belongs to Reif", {"thread_id": "t2"})
+    idx.add("c", "the lazy dog sleeps", {"thread_id": "t1"})
+    assert idx.search("998877", k=3)[0][0] == "b"
+    assert idx.search("998877", k=3, filt=lambda m: m.get("thread_id") == "t1") == []
+    idx.remove("b")
+    assert idx.search("998877") == []
+
+
+def test_persistence_round_trip(tmp_path):
+    path = str(tmp_path / "bm25.json.gz")
+    idx = BM25Index(path)
+    idx.add("x", "codeword albatross")
+    idx.save()
+    again = BM25Index(path)
+    assert len(again) == 1 and again.search("albatross")[0][0] == "x"
+
+
+def test_rrf_prefers_items_ranked_by_both():
+    fused = rrf_merge([["a", "b", "c"], ["c", "d"]])
+    assert fused[0][0] == "c"
+
+
+def test_hybrid_topk_recalls_exact_identifier(retrieval):
+    mg = retrieval
+    for i in range(40):
+        mg.ingest(f"note {i} about budgets groceries and weekly planning", src="notes")
+    mg.ingest("the storage unit gate code is 5521-9087", src="notes")
+    hits = mg.topk("5521-9087", k=5)
+    assert any("5521-9087" in h["text"] for h in hits)
@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+
+from llm_cache import LLMCache
+
+V1 = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+V1b = np.array([0.99, 0.1, 0.0], dtype=np.float32)
+V2 = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+
+
+def test_exact_and_semantic_levels_with_context_scope():
+    c = LLMCache(threshold=0.95)
+    c.put("m", "prompt A", {"answer": "a"}, "decide", "ctx1", V1, latency_ms=800)
+    assert c.get_exact("m", "prompt A") == {"answer": "a"}
+    assert c.get_exact("other-model", "prompt A") is None
+    assert c.get_semantic("m", "decide", "ctx1", V1b) == {"answer": "a"}
+    assert c.get_semantic("m", "decide", "ctx2", V1b) is None  # different retrieved context
+    assert c.get_semantic("m", "decide", "ctx1", V2) is None
+    st = c.stats()
+    assert st["exact_hits"] == 1 and st["semantic_hits"] == 1 and st["saved_ms"] == 1600
+
+
+def test_ttl_and_size_bound():
+    c = LLMCache(ttl=0.05, max_entries=3)
+    c.put("m", "old", {"n": 0})
+    time.sleep(0.1)
+    assert c.get_exact("m", "old") is None and c.stats()["expired"] == 1
+    c.ttl = 60
+    for i in range(5):
+        c.put("m", f"p{i}", {"n": i})
+        time.sleep(0.001)
+    c.get_exact("m", "p0")  # recently used survives
+    c.put("m", "p5", {"n": 5})
+    st = c.stats()
+    assert st["entries"] == 3 and st["evictions"] >= 3
+    assert c.get_exact("m", "p5") is not None
+
+
+def test_persists_across_restarts(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    LLMCache(path).put("m", "p", {"type": "FINAL", "answer": "kept"}, "decide", "f", V1)
+    assert LLMCache(path).get_semantic("m", "decide", "f", V1) == {"type": "FINAL", "answer": "kept"}
+
+
+def test_decide_node_reuses_final_answers_only(retrieval, monkeypatch, tmp_path):
+    mg = retrieval
+    monkeypatch.delenv("DISABLE_RETRIEVAL", raising=False)
+    monkeypatch.setattr(mg, "_llm_cache", LLMCache(threshold=0.8))
+    calls = []
+    reply = {"type": "FINAL", "answer": "Your locker code is 1234"}
+    monkeypatch.setattr(mg, "call_llm_json", lambda prompt: calls.append(prompt) or dict(reply))
+    ctx = [{"text": "locker code is 1234"}]
+    state = {"context": ctx, "decision": {}, "log": []}
+    assert mg.decide_node({**state, "goal": "what is my locker code"})["decision"] == reply
+    assert mg.decide_node({**state, "goal": "what is my locker code?"})["decision"] == reply
+    assert len(calls) == 1
+    # Same goal, different retrieved context: no reuse
+    mg.decide_node({**state, "goal": "what is my locker code", "context": [{"text": "locker code is 9999"}]})
+    assert len(calls) == 2
+    # Actions and failures are never cached
+    reply.update({"type": "ACT", "tool": "notify.owner", "args": {}})
+    mg.decide_node({**state, "goal": "ping the owner"})
+    mg.decide_node({**state, "goal": "ping the owner"})
+    assert len(calls) == 4
+    reply.clear(); reply.update({"type": "FINAL", "answer": "LLM error: boom", "error": True})
+    mg.decide_node({**state, "goal": "explain the roof budget"})
+    mg.decide_node({**state, "goal": "explain the roof budget"})
+    assert len(calls) == 6
+    st = mg.llm_cache_stats()
+    assert st["semantic_hits"] == 1 and st["hit_rate"] > 0
@@ -0,0 +1,80 @@
+import asyncio
+import importlib
+import time
+from types import SimpleNamespace
+
+import main_graph as mg
+import preflight
+
+
+def _completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+class _AsyncClient:
+    def __init__(self, delay=0.0, text='{"type": "FINAL", "answer": "pong"}'):
+        self.calls = []
+        async def create(**kw):
+            self.calls.append(kw)
+            await asyncio.sleep(delay)
+            return _completion(text)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+def test_sync_client_is_shared_and_configured(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("LLM_CONNECT_TIMEOUT_SEC", "2.5")
+    monkeypatch.setattr(mg, "_openai_client", None)
+    cli = mg._get_openai_client()
+    assert mg._get_openai_client() is cli
+    assert cli.max_retries == 0 and cli._client.timeout.connect == 2.5
+
+
+def test_async_calls_overlap_on_one_loop(monkeypatch):
+    fake = _AsyncClient(delay=0.2)
+    monkeypatch.setattr(mg, "_get_async_openai_client", lambda: fake)
+
+    async def many():
+        return await asyncio.gather(*[mg.acall_llm_json(f"q{i}") for i in range(20)])
+
+    t0 = time.time()
+    out = asyncio.run(many())
+    assert time.time() - t0 < 2.0  # 20 x 0.2s serially would be 4s
+    assert all(o == {"type": "FINAL", "answer": "pong"} for o in out) and len(fake.calls) == 20
+    assert fake.calls[0]["messages"][-1]["content"] == "q0"
+
+
+def test_async_client_is_per_event_loop(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+    async def get():
+        return mg._get_async_openai_client(), mg._get_async_openai_client()
+
+    a1, a2 = asyncio.run(get())
+    b1, _ = asyncio.run(get())
+    assert a1 is a2 and a1 is not b1
+
+
+def test_ainvoke_and_web_goal_use_async_path(monkeypatch):
+    # Reloading web_jarvis reruns preflight; its findings must not outlive this test
+    monkeypatch.setattr(preflight, "FATAL", [])
+    monkeypatch.setattr(preflight, "WARN", [])
+    monkeypatch.setenv("DISABLE_RETRIEVAL", "true")
+    monkeypatch.setenv("DISABLE_PREFLIGHT", "true")
+    monkeypatch.setenv("ECHO_MODE", "false")
+
+    async def fake(prompt):
+        return {"type": "FINAL", "answer": "async ok"}
+
+    monkeypatch.setattr(mg, "acall_llm_json", fake)
+    monkeypatch.setattr(mg, "call_llm_json", lambda prompt: {"type": "FINAL", "answer": "sync"})
+    state = {"goal": "hi", "context": [], "decision": {}, "log": []}
+    out = asyncio.run(mg.app.ainvoke(state, config={"configurable": {"thread_id": "async-t"}}))
+    assert out["decision"]["answer"] == "async ok"
+
+    web = importlib.reload(importlib.import_module("web_jarvis"))
+    sent = []
+    monkeypatch.setattr(web, "send_telegram_message", lambda text, chat_id=None: sent.append(text))
+    monkeypatch.setattr(web, "ingest_text", lambda *a, **kw: True)
+    asyncio.run_coroutine_threadsafe(web.aprocess_jarvis_goal("hi", "42"), web.aio_loop()).result(5)
+    assert any("async ok" in m for m in sent)
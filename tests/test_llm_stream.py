@@ -0,0 +1,83 @@
+import importlib
+import time
+from types import SimpleNamespace
+
+import main_graph as mg
+import preflight
+from llm_stream import DecisionStream
+
+
+def _feed(text, step=3):
+    ds, shown = DecisionStream(), []
+    for i in range(0, len(text), step):
+        out = ds.feed(text[i:i + step])
+        if out is not None:
+            shown.append(out)
+    return ds, shown
+
+
+def test_final_answer_is_decoded_incrementally():
+    ds, shown = _feed('{"type": "FINAL", "answer": "Line one\\nsays \\"hi\\" \\u00e9t\\u00e9"}')
+    assert ds.kind == "FINAL"
+    assert shown[-1] == 'Line one\nsays "hi" été'
+    # Every partial is a prefix of the final text: no half escapes ever shown
+    assert all(shown[-1].startswith(s) for s in shown) and len(shown) > 3
+
+
+def test_actions_never_show_text_and_plain_replies_do():
+    ds, shown = _feed('{"type": "ACT", "tool": "ingest.run", "args": {"answer": "x"}}')
+    assert ds.kind == "ACT" and shown == []
+    ds, shown = _feed('{"tool": "ingest.run", "answer": "x", "type": "ACT"}')
+    assert shown == []
+    ds, shown = _feed("Just a plain answer.")
+    assert ds.kind == "FINAL" and shown[-1] == "Just a plain answer."
+
+
+def _chunks(text):
+    for i in range(0, len(text), 4):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 4]))])
+
+
+def test_streamed_decide_edits_one_telegram_message(monkeypatch):
+    # Reloading web_jarvis reruns preflight; its findings must not outlive this test
+    monkeypatch.setattr(preflight, "FATAL", [])
+    monkeypatch.setattr(preflight, "WARN", [])
+    monkeypatch.setenv("DISABLE_RETRIEVAL", "true")
+    monkeypatch.setenv("DISABLE_PREFLIGHT", "true")
+    monkeypatch.setenv("ECHO_MODE", "false")
+    monkeypatch.setenv("TELEGRAM_STREAM", "true")
+    monkeypatch.setenv("TELEGRAM_EDIT_INTERVAL_SEC", "0")
+    monkeypatch.setenv("LLM_ASYNC", "false")
+    reply = '{"type": "FINAL", "answer": "Streaming works fine here."}'
+
+    def create(**kw):
+        if kw.get("stream"):
+            def gen():
+                for c in _chunks(reply):
+                    time.sleep(0.01)
+                    yield c
+            return gen()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"steps": []}'))])
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(mg, "_get_openai_client", lambda: fake)
+    web = importlib.reload(importlib.import_module("web_jarvis"))
+    posts, sent = [], []
+
+    def post(method, data):
+        posts.append((method, data))
+        return {"ok": True, "result": {"message_id": 7}}
+
+    monkeypatch.setattr(web, "TELEGRAM_TOKEN", "t")
+    monkeypatch.setattr(web, "_telegram_post", post)
+    monkeypatch.setattr(web, "send_telegram_message", lambda text, chat_id=None: sent.append(text))
+    monkeypatch.setattr(web, "ingest_text", lambda *a, **kw: True)
+    web.process_jarvis_goal("hi", "42")
+
+    methods = [m for m, _ in posts]
+    assert methods[0] == "sendMessage" and methods.count("sendMessage") == 1
+    assert posts[-1][0] == "editMessageText" and posts[-1][1]["message_id"] == 7
+    assert "Streaming works fine here." in posts[-1][1]["text"] and "Jarvis Complete" in posts[-1][1]["text"]
+    # Only the ack went through sendMessage-with-Markdown; the answer is the edited message
+    assert not any("Jarvis Complete" in m for m in sent)
+    assert web.METRICS["streamed"] == 1 and web.METRICS["stream_first_text_ms"] is not None
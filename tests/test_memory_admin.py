@@ -0,0 +1,67 @@
+import uuid
+
+from qdrant_client.http.models import PointStruct
+
+
+def test_reingest_is_idempotent_and_skips_encoding(retrieval):
+    mg = retrieval
+    assert mg.ingest("alpha beta gamma", src="file:a") == 1
+    calls = mg.emb.calls
+    assert mg.ingest("alpha beta gamma", src="file:a") == 0
+    assert mg.emb.calls == calls
+    assert mg.q.count(mg.COLL).count == 1
+    # Same text in another thread is a distinct point
+    assert mg.ingest("alpha beta gamma", src="file:a", meta={"thread_id": "t1"}) == 1
+
+
+def test_dedup_rekeys_legacy_points(retrieval):
+    mg = retrieval
+    mg._ensure_retrieval_ready()
+    vec = mg.emb.encode(["dup text"])[0].tolist()
+    legacy = [PointStruct(id=str(uuid.uuid4()), vector=vec, payload={"chunk": "dup text", "source": "chat"})
+              for _ in range(3)]
+    mg.q.upsert(collection_name=mg.COLL, points=legacy)
+
+    import memory_admin
+    dry = memory_admin.dedup(dry_run=True)
+    assert dry["deleted"] == 3 and mg.q.count(mg.COLL).count == 3
+    out = memory_admin.dedup()
+    assert out["rekeyed"] == 1 and out["unique"] == 1
+    assert mg.q.count(mg.COLL).count == 1
+    pts, _ = mg.q.scroll(collection_name=mg.COLL)
+    assert str(pts[0].id) == mg.point_id("chat", "dup text")
+
+
+def test_snapshot_round_trip_skips_reembedding(retrieval, tmp_path, monkeypatch):
+    mg = retrieval
+    import memory_admin
+    from qdrant_client import QdrantClient
+    from lexical_index import BM25Index
+    mg.ingest("the spare key is under the blue pot", src="notes", meta={"thread_id": "t1"})
+    mg.ingest("gym on tuesdays and thursdays", src="notes")
+    snap = str(tmp_path / "mem.npz")
+    assert memory_admin.export_snapshot(snap)["exported"] == 2
+
+    # Fresh process: empty collection, QDRANT_SNAPSHOT set -> loaded during readiness
+    monkeypatch.setattr(mg, "q", QdrantClient(":memory:"))
+    monkeypatch.setattr(mg, "_lexical", BM25Index())
+    monkeypatch.setenv("QDRANT_SNAPSHOT", snap)
+    calls = mg.emb.calls
+    mg._ensure_retrieval_ready()
+    assert mg.q.count(mg.COLL).count == 2
+    assert mg.storage_stats()["snapshot_points"] == 2
+    hits = mg.topk("spare key", k=1, thread_id="t1")
+    assert "blue pot" in hits[0]["text"]
+    assert mg.emb.calls == calls + 1  # only the query was encoded
+
+
+def test_path_store_survives_restart(retrieval, tmp_path, monkeypatch):
+    mg = retrieval
+    from qdrant_client import QdrantClient
+    monkeypatch.setattr(mg, "q", QdrantClient(path=str(tmp_path / "qdrant")))
+    mg.ingest("persisted memory", src="notes")
+    mg.q.close()
+    monkeypatch.setattr(mg, "q", QdrantClient(path=str(tmp_path / "qdrant")))
+    mg._ensure_retrieval_ready()
+    assert mg.q.count(mg.COLL).count == 1
+    mg.q.close()
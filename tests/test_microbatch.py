@@ -0,0 +1,60 @@
+import threading
+
+import numpy as np
+import pytest
+
+from microbatch import MicroBatcher
+
+
+def _encoder(calls):
+    def enc(texts):
+        calls.append(list(texts))
+        return np.asarray([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+    return enc
+
+
+def test_concurrent_calls_share_one_batch():
+    calls = []
+    b = MicroBatcher(_encoder(calls), max_batch=8, max_wait_ms=200)
+    out = {}
+    start = threading.Barrier(6)
+
+    def worker(i):
+        start.wait()
+        out[i] = b.encode(["x" * i])[0]
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(len(c) for c in calls) == 6 and len(calls) < 6
+    assert all(out[i][0] == i for i in range(6))
+    st = b.stats()
+    assert st["items"] == 6 and sum(st["batch_size_hist"].values()) == st["batches"]
+
+
+def test_max_batch_caps_batches_and_large_calls_go_direct():
+    calls = []
+    b = MicroBatcher(_encoder(calls), max_batch=4, max_wait_ms=50)
+    vecs = b.encode(["a", "bb", "ccc"])
+    assert vecs[:, 0].tolist() == [1.0, 2.0, 3.0]
+    assert all(len(c) <= 4 for c in calls)
+    b.encode(["a"] * 4)
+    assert calls[-1] == ["a"] * 4 and b.stats()["direct"] == 1
+
+
+def test_encode_errors_reach_every_caller():
+    def boom(texts):
+        raise RuntimeError("encoder down")
+    b = MicroBatcher(boom, max_batch=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        b.encode(["a"])
+    assert b.stats()["errors"] == 1
+
+
+def test_short_encoder_output_fails_callers_instead_of_hanging():
+    b = MicroBatcher(lambda texts: np.zeros((len(texts) - 1, 3), dtype=np.float32), max_batch=8, max_wait_ms=20)
+    with pytest.raises(ValueError, match=r"returned \d+ rows for \d+ texts"):
+        b.encode(["a", "b", "c"])
+    assert b.stats()["errors"] >= 1  # one batch, unless the three calls were split
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+import migrate
+from conftest import FakeEmb
+
+DOCS = [f"note {i}: the storage unit code is {1000 + i}" for i in range(7)]
+
+
+def _seed(mg):
+    for i, d in enumerate(DOCS):
+        mg.ingest(d, src="notes", meta={"thread_id": f"t{i % 2}"})
+
+
+def test_migrate_copies_and_swaps_alias(retrieval, tmp_path):
+    mg = retrieval
+    _seed(mg)
+    assert mg._store.resolve() == "jarvis_v1"
+    seen = []
+    out = migrate.migrate(batch=3, checkpoint=str(tmp_path / "m.json"), on_progress=seen.append)
+    assert out["swapped"] and out["previous"] == "jarvis_v1" and out["points"] == len(DOCS)
+    assert mg._store.resolve() == "jarvis_v2" and mg._store.count() == len(DOCS)
+    assert seen[0]["percent"] is not None and seen[-1]["pass"] == 2  # catch-up pass found nothing new
+    assert mg.topk("storage unit code 1003", k=1)[0]["text"] == DOCS[3]
+    # The next migration starts a fresh version
+    assert migrate.migrate(checkpoint=str(tmp_path / "m.json"))["target"] == "jarvis_v3"
+
+
+def test_interrupted_migration_resumes_from_checkpoint(retrieval, tmp_path, monkeypatch):
+    mg = retrieval
+    _seed(mg)
+    ckpt = str(tmp_path / "m.json")
+    real = migrate._copy
+    calls = {"n": 0}
+
+    def flaky(*a, **kw):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("worker restarted")
+        return real(*a, **kw)
+
+    monkeypatch.setattr(migrate, "_copy", flaky)
+    with pytest.raises(RuntimeError):
+        migrate.migrate(batch=3, checkpoint=ckpt)
+    assert migrate._load(ckpt)["scanned"] == 3 and mg._store.resolve() == "jarvis_v1"
+    monkeypatch.setattr(migrate, "_copy", real)
+    encoded = mg.emb.calls
+    out = migrate.migrate(batch=3, checkpoint=ckpt)
+    assert out["swapped"] and out["points"] == len(DOCS)
+    assert mg.emb.calls - encoded <= len(DOCS) - 3  # the first page was not re-embedded
+
+
+def test_migrate_to_new_model_with_other_dimension(retrieval, tmp_path, monkeypatch):
+    mg = retrieval
+    _seed(mg)
+    import embedders
+    new = FakeEmb(dim=8)
+    new.name = "fake-8"
+    monkeypatch.setattr(embedders, "get_embedder", lambda backend=None, model=None, remote=True: new)
+    monkeypatch.setattr(mg, "EMBED_MODEL", mg.EMBED_MODEL)
+    out = migrate.migrate(model="fake-8", checkpoint=str(tmp_path / "m.json"))
+    assert out["swapped"] and mg.emb is new and mg.EMBED_MODEL == "fake-8"
+    assert mg._store.client.get_collection("jarvis").config.params.vectors.size == 8
+    assert DOCS[5] in [h["text"] for h in mg.topk("storage unit code 1005", k=3)]
+
+
+def test_numpy_backend_swaps_directory_symlink(retrieval, tmp_path, monkeypatch):
+    mg = retrieval
+    base = str(tmp_path / "vectors")
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    monkeypatch.setenv("NUMPY_STORE_PATH", base)
+    _seed(mg)
+    out = migrate.migrate(checkpoint=str(tmp_path / "m.json"))
+    assert out["swapped"] and out["previous"] == base + ".v1"
+    assert os.path.islink(base) and os.readlink(base) == "vectors.v2"
+    assert mg._store.count() == len(DOCS)
+    assert mg.topk("storage unit code 1002", k=1)[0]["text"] == DOCS[2]
+    mg._store.close()
+
+
+def test_numpy_backend_migrates_twice(retrieval, tmp_path, monkeypatch):
+    mg = retrieval
+    base = str(tmp_path / "vectors")
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    monkeypatch.setenv("NUMPY_STORE_PATH", base)
+    _seed(mg)
+    migrate.migrate(checkpoint=str(tmp_path / "m.json"))
+    out = migrate.migrate(checkpoint=str(tmp_path / "m.json"))
+    assert out["target"] == base + ".v3" and out["previous"] == base + ".v2"
+    assert os.readlink(base) == "vectors.v3" and os.path.isdir(base + ".v2")
+    assert not os.path.exists(base + ".v2.v1") and not os.path.exists(base + ".v2.v3")
+    assert mg._store.count() == len(DOCS)
+    mg._store.close()
+
+
+def test_deletes_during_the_copy_are_applied_before_the_swap(retrieval, tmp_path, monkeypatch):
+    mg = retrieval
+    _seed(mg)
+    real = migrate._copy
+    forgotten = []
+
+    def copy_then_forget(*a, **kw):
+        n = real(*a, **kw)
+        if not forgotten:
+            # Forgotten after the first page was already copied
+            pid = mg.point_id("notes", DOCS[0], {"thread_id": "t0"})
+            forgotten.append(mg.delete_points([pid]))
+        return n
+
+    monkeypatch.setattr(migrate, "_copy", copy_then_forget)
+    out = migrate.migrate(batch=len(DOCS), checkpoint=str(tmp_path / "m.json"))
+    assert out["pruned"] == 1 and mg._store.count() == len(DOCS) - 1
+    assert DOCS[0] not in [h["text"] for h in mg.topk("storage unit code 1000", k=len(DOCS))]
@@ -0,0 +1,43 @@
+import time
+
+from query_cache import QueryCache, query_key
+
+
+def test_key_normalizes_query_and_ignores_unset_filters():
+    assert query_key("  Daily   Status ", 5, thread_id=None) == query_key("daily status", 5)
+    assert query_key("daily status", 5, thread_id="t1") != query_key("daily status", 5)
+
+
+def test_generation_ttl_and_size_bounds(monkeypatch):
+    c = QueryCache(max_entries=2, ttl=60)
+    c.put("a", [{"text": "x", "score": 1.0}])
+    assert c.get("a") == [{"text": "x", "score": 1.0}]
+    c.bump()
+    assert c.get("a") is None
+    c.put("a", []); c.put("b", []); c.put("c", [])
+    assert c.get("a") is None and c.stats()["evictions"] == 1
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert c.get("c") is None
+    st = c.stats()
+    assert st["hits"] == 1 and st["stale"] == 2
+
+
+def test_result_computed_before_a_write_is_not_cached():
+    c = QueryCache()
+    gen = c.generation
+    c.bump()
+    c.put("k", [{"text": "old"}], gen)
+    assert c.get("k") is None
+
+
+def test_topk_repeat_skips_search_until_ingest(retrieval):
+    mg = retrieval
+    mg.ingest("water the plants every morning", src="notes")
+    first = mg.topk("water plants", k=3)
+    calls = mg.emb.calls
+    assert mg.topk("Water  plants", k=3) == first
+    assert mg.emb.calls == calls
+    mg.ingest("water filter needs replacing", src="notes")
+    assert len(mg.topk("water plants", k=3)) == 2
+    assert mg.query_cache_stats()["hits"] == 1
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+
+@pytest.fixture
+def cold(tmp_path, monkeypatch):
+    import tiering
+    store = tiering.ColdStore(str(tmp_path / "cold"))
+    monkeypatch.setattr(tiering, "_cold", store)
+    return store
+
+
+def test_old_points_move_to_cold_and_stay_searchable(retrieval, cold):
+    mg = retrieval
+    import tiering
+    now = time.time()
+    mg.ingest("passport renewal done in march", src="notes", meta={"ts": now - 400 * 86400})
+    mg.ingest("car insurance renews next week", src="notes", meta={"ts": now})
+    out = tiering.run_tiering(max_hot_gb=1, archive_after_days=180)
+    assert out["archived_by_age"] == 1 and out["archived_by_budget"] == 0
+    assert mg._store.count() == 1 and out["cold"]["segments"] == 1
+    assert not any("passport" in h["text"] for h in mg.topk("passport renewal", k=5))
+    hits = mg.topk("passport renewal", k=5, include_cold=True)
+    assert "passport" in hits[0]["text"]
+
+
+def test_budget_quantizes_then_evicts_oldest(retrieval, cold, tmp_path, monkeypatch):
+    mg = retrieval
+    import tiering
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    monkeypatch.setenv("NUMPY_STORE_PATH", str(tmp_path / "vec"))
+    now = time.time()
+    mg.ingest_batch([(f"entry {i} about errands", "notes", {"ts": now - i}) for i in range(50)])
+    per_point = mg._store.bytes_per_vector + 60
+    dry = tiering.run_tiering(max_hot_gb=30 * per_point / tiering.GB, dry_run=True)
+    assert dry["quantized"] and mg._store.dtype.name == "float32" and mg._store.count() == 50
+    out = tiering.run_tiering(max_hot_gb=30 * per_point / tiering.GB)
+    assert out["quantized"] and mg._store.dtype.name == "int8"
+    assert out["hot_bytes_after"] <= 0.9 * out["budget_bytes"]
+    assert out["archived_by_budget"] == 50 - mg._store.count() > 0
+    # The newest entries are the ones kept hot
+    assert mg._store.retrieve([mg.point_id("notes", "entry 0 about errands")])
+
+
+def test_archive_tool_dry_run_reports_without_moving(retrieval, cold):
+    mg = retrieval
+    mg.ingest("ancient note", src="notes", meta={"ts": 0.0})
+    out = mg.load_tool("archive.data").run({"dry_run": True, "tag": "q3"})
+    assert out["archived_tag"] == "q3" and out["archived_by_age"] == 1
+    assert mg._store.count() == 1 and out["cold"]["segments"] == 0
+
+
+def test_points_without_ts_are_not_archived_by_age(retrieval, cold):
+    mg = retrieval
+    import tiering
+    from vector_store import Point
+    mg.ingest("fresh note", src="notes")
+    mg._ensure_retrieval_ready()
+    # A memory written before ingest stamped a ts: the baseline payload
+    legacy = "legacy memory about the boiler"
+    mg._write_points([Point(id=mg.point_id("adhoc", legacy), vector=mg._encode([legacy])[0].tolist(),
+                            payload={"chunk": legacy, "source": "adhoc"})])
+    out = tiering.run_tiering(max_hot_gb=1, archive_after_days=0.0001, now=time.time() + 3600)
+    assert out["undated"] == 1 and out["archived_by_age"] == 1  # only the dated note
+    assert mg._store.retrieve([mg.point_id("adhoc", legacy)])
+    # Under budget pressure an older dated point goes before it
+    mg.ingest("older dated note", src="notes", meta={"ts": time.time() - 100})
+    hot = tiering.run_tiering(max_hot_gb=1e-12, archive_after_days=1e6, dry_run=True)["hot_bytes_before"]
+    budget_gb = 0.75 * hot / tiering.policy()["target"] / tiering.GB
+    out = tiering.run_tiering(max_hot_gb=budget_gb, archive_after_days=1e6)
+    assert out["archived_by_budget"] == 1 and mg._store.retrieve([mg.point_id("adhoc", legacy)])
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from vector_store import NumpyStore, Point, QdrantStore
+
+
+def _points(n, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    vecs = rng.normal(size=(n, dim)).astype(np.float32)
+    return [Point(id=f"p{i}", vector=vecs[i].tolist(),
+                  payload={"chunk": f"c{i}", "thread_id": "a" if i % 2 else "", "ts": float(i)})
+            for i in range(n)], vecs
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_exact_topk_matches_brute_force(dtype):
+    pts, vecs = _points(500)
+    s = NumpyStore(None, 8, dtype)
+    s.upsert(pts)
+    qv = vecs[7]
+    unit = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+    want = [f"p{i}" for i in np.argsort(-(unit @ (qv / np.linalg.norm(qv))))[:5]]
+    assert [h.id for h in s.search(qv.tolist(), 5)] == want
+
+
+def test_filters_delete_and_upsert_replace():
+    pts, vecs = _points(50)
+    s = NumpyStore(None, 8)
+    s.upsert(pts)
+    got = s.search(vecs[3].tolist(), 50, {"thread_id": "a", "include_shared": False})
+    assert got and all(int(h.id[1:]) % 2 for h in got)
+    got = s.search(vecs[3].tolist(), 50, {"since": 10.0, "until": 19.0})
+    assert sorted(int(h.id[1:]) for h in got) == list(range(10, 20))
+    s.delete(["p3"])
+    assert "p3" not in [h.id for h in s.search(vecs[3].tolist(), 5)]
+    s.upsert([Point(id="p4", vector=vecs[3].tolist(), payload={"chunk": "moved"})])
+    assert s.count() == 49
+    assert s.search(vecs[3].tolist(), 1)[0].payload["chunk"] == "moved"
+
+
+def test_persistence_reopen_scroll_and_compact(tmp_path):
+    pts, vecs = _points(40)
+    s = NumpyStore(str(tmp_path), 8)
+    assert s.ensure(8) is True
+    s.upsert(pts)
+    s.delete([f"p{i}" for i in range(10)])
+    s.upsert([Point(id="p20", vector=vecs[0].tolist(), payload={"chunk": "new"})])
+    again = NumpyStore(str(tmp_path), 8)
+    assert again.ensure(8) is False and again.count() == 30
+    assert again.retrieve(["p20"])[0].payload["chunk"] == "new"
+    again.compact()
+    seen, off = [], None
+    while True:
+        batch, off = again.scroll(7, off, with_vectors=True)
+        seen += batch
+        if off is None:
+            break
+    assert len(seen) == 30 and len(seen[0].vector) == 8
+    assert NumpyStore(str(tmp_path), 8).count() == 30
+
+
+def test_numpy_backend_behind_ingest_and_topk(retrieval, tmp_path, monkeypatch):
+    mg = retrieval
+    monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+    monkeypatch.setenv("NUMPY_STORE_PATH", str(tmp_path / "vec"))
+    mg.ingest("pick up dry cleaning friday", src="chat", meta={"thread_id": "t1"})
+    mg.ingest("pick up groceries saturday", src="chat", meta={"thread_id": "t2"})
+    assert mg.storage_stats()["backend"] == "numpy"
+    hits = mg.topk("pick up", k=5, thread_id="t1")
+    assert [h["text"] for h in hits] == ["pick up dry cleaning friday"]
+    assert mg.ingest("pick up dry cleaning friday", src="chat", meta={"thread_id": "t1"}) == 0
+
+
+def test_qdrant_quantize_moves_originals_to_disk_and_accounts_for_them():
+    cfg = SimpleNamespace(params=SimpleNamespace(vectors=SimpleNamespace(size=384, on_disk=None)),
+                          quantization_config=None)
+    calls = []
+
+    def update_collection(**kw):
+        calls.append(kw)
+        cfg.quantization_config = kw["quantization_config"]
+        return True
+
+    client = SimpleNamespace(get_collection=lambda name: SimpleNamespace(config=cfg),
+                             update_collection=update_collection)
+    s = QdrantStore(client, "c")
+    s.resolve = lambda: "c_v1"
+    assert s.bytes_per_vector == 384 * 4
+    assert s.quantize()
+    assert calls[0]["collection_name"] == "c_v1" and calls[0]["vectors_config"][""].on_disk
+    # Until the server has moved the originals to disk, both copies are in RAM
+    assert s.bytes_per_vector == 384 * 4 + 384 + 4
+    cfg.params.vectors.on_disk = True
+    assert s.bytes_per_vector == 384 + 4
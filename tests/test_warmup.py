@@ -0,0 +1,101 @@
+import importlib
+import time
+
+import pytest
+
+import preflight
+import warmup
+
+
+@pytest.fixture
+def wu():
+    importlib.reload(warmup)
+    yield warmup
+    importlib.reload(warmup)
+
+
+def test_runs_once_and_times_components(wu):
+    calls = []
+    steps = [("a", lambda: calls.append("a")), ("b", lambda: calls.append("b"))]
+    assert wu.start(steps, background=False)
+    assert not wu.start(steps, background=False)
+    st = wu.status()
+    assert calls == ["a", "b"] and st["status"] == "ready" and st["ready"]
+    assert set(st["components"]) == {"a", "b"} and all(c["ok"] and c["ms"] >= 0 for c in st["components"].values())
+
+
+def test_failed_component_degrades_but_does_not_block(wu):
+    def boom():
+        raise RuntimeError("model download failed")
+    wu.start([("embedder", boom), ("llm_client", lambda: None)], background=False)
+    st = wu.status()
+    assert st["status"] == "degraded" and not st["ready"] and st["failed"] == ["embedder"]
+    assert wu.is_ready()  # requests no longer wait for it
+    assert st["components"]["embedder"]["error"] == "model download failed" and st["components"]["llm_client"]["ok"]
+
+
+def test_messages_during_warmup_are_queued_then_drained(wu):
+    gate, seen = [], []
+    wu.start([("slow", lambda: [time.sleep(0.01) for _ in range(500) if not gate])])
+    assert not wu.is_ready()
+    assert wu.defer(seen.append, "hello")
+    gate.append(1)
+    assert wu.wait(5)
+    t0 = time.time()
+    while not seen and time.time() - t0 < 2:
+        time.sleep(0.01)
+    assert seen == ["hello"] and wu.status()["drained"] == 1
+    assert not wu.defer(seen.append, "after")  # no warm-up running: caller handles it directly
+
+
+def test_ready_endpoint(monkeypatch, wu):
+    # Reloading web_jarvis reruns preflight; its findings must not outlive this test
+    monkeypatch.setattr(preflight, "FATAL", [])
+    monkeypatch.setattr(preflight, "WARN", [])
+    monkeypatch.setenv("DISABLE_PREFLIGHT", "true")
+    mod = importlib.reload(importlib.import_module("web_jarvis"))
+    client = mod.flask_app.test_client()
+    wu.STATE["status"] = "warming"
+    assert client.get("/ready").status_code == 503
+    wu.STATE.update({"status": "ready", "components": {"embedder": {"ok": True, "ms": 12.5}}})
+    r = client.get("/ready")
+    assert r.status_code == 200 and r.get_json()["components"]["embedder"]["ms"] == 12.5
+    wu.STATE.update({"status": "degraded", "components": {"embedder": {"ok": False, "error": "no model", "ms": 3.0}}})
+    r = client.get("/ready")
+    assert r.status_code == 503 and r.get_json()["failed"] == ["embedder"]
+    assert r.get_json()["components"]["embedder"]["error"] == "no model"
+
+
+def test_default_steps_warm_retrieval(retrieval, monkeypatch, wu):
+    monkeypatch.delenv("DISABLE_RETRIEVAL", raising=False)
+    monkeypatch.setattr(retrieval, "_openai_client", None)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    wu.start(background=False)
+    comps = wu.status()["components"]
+    assert [c for c in comps] == ["embedder", "retrieval", "encode_search", "llm_client", "graph"]
+    assert all(comps[c]["ok"] for c in ("embedder", "retrieval", "encode_search", "graph")), comps
+    assert retrieval._store is not None and retrieval.emb.calls == 1
+
+
+def test_llm_client_step_needs_a_key(monkeypatch, wu):
+    monkeypatch.setenv("DISABLE_RETRIEVAL", "true")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert [name for name, _ in wu.default_steps()] == ["graph"]
+
+
+def test_failed_component_is_retried_until_it_recovers(monkeypatch, wu):
+    monkeypatch.setattr(wu, "RECHECK_SEC", 0.0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("not yet")
+    wu.start([("embedder", flaky)], background=False)
+    assert not wu.status()["ready"]  # also kicks off the retry
+    t0 = time.time()
+    while not wu.status()["ready"] and time.time() - t0 < 2:
+        time.sleep(0.01)
+    st = wu.status()
+    assert st["ready"] and st["status"] == "ready" and st["failed"] == []
+    assert st["components"]["embedder"]["recovered"] and len(attempts) == 2
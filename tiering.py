@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import glob
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vector_store import Point, payload_predicate
+
+COLD_DIR = os.getenv("TIER_COLD_DIR", os.path.join(".jarvis", "cold"))
+GB = 1024 ** 3
+LAST: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def policy() -> Dict[str, Any]:
+    """Hot-tier budget and archive age from the manifesto's data_policy (TIER_* env overrides)."""
+    import main_graph as mg
+    dp = (mg.M.get("guardrails") or {}).get("data_policy") or {}
+    return {
+        "max_hot_gb": float(os.getenv("TIER_MAX_HOT_GB", dp.get("max_hot_vector_gb", 1))),
+        "archive_after_days": float(os.getenv("TIER_ARCHIVE_AFTER_DAYS", dp.get("archive_after_days", 180))),
+        "quantize_at": float(os.getenv("TIER_QUANTIZE_AT", "0.8")),
+        "target": float(os.getenv("TIER_TARGET", "0.9")),
+    }
+
+
+class ColdStore:
+    """Archived points on local disk (stand-in for the B2 bucket the manifesto names).
+
+    Each archive run writes compressed ``.npz`` segments of IDs, float16 vectors
+    and JSON payloads. Nothing is held in memory; ``search`` streams the
+    segments, so cold recall costs a scan only when asked for.
+    """
+
+    def __init__(self, path: str = COLD_DIR):
+        self.path = path
+
+    def segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.path, "*.npz")))
+
+    def add(self, points: List[Any], label: str = "archived") -> Optional[str]:
+        if not points:
+            return None
+        os.makedirs(self.path, exist_ok=True)
+        vecs = np.asarray([p.vector for p in points], dtype=np.float32)
+        vecs /= np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+        tag = re.sub(r"[^\w.-]", "_", label)
+        seg = os.path.join(self.path, f"{time.time_ns()}-{tag}.npz")
+        tmp = seg[:-4] + ".tmp.npz"
+        np.savez_compressed(
+            tmp,
+            ids=np.array([str(p.id) for p in points], dtype=str),
+            vectors=vecs.astype(np.float16),
+            payloads=np.frombuffer(json.dumps([p.payload or {} for p in points]).encode("utf-8"), dtype=np.uint8),
+        )
+        os.replace(tmp, seg)
+        return seg
+
+    def search(self, vector: List[float], k: int, filt: Optional[Dict[str, Any]] = None) -> List[Point]:
+        v = np.asarray(vector, dtype=np.float32)
+        v /= max(float(np.linalg.norm(v)), 1e-12)
+        pred = payload_predicate(**(filt or {}))
+        best: List[Tuple[float, str, Dict[str, Any]]] = []
+        for seg in self.segments():
+            with np.load(seg, allow_pickle=False) as z:
+                ids = z["ids"]
+                payloads = json.loads(z["payloads"].tobytes().decode("utf-8"))
+                scores = z["vectors"].astype(np.float32) @ v
+            keep = np.array([pred is None or pred(p) for p in payloads], dtype=bool)
+            for i in np.flatnonzero(keep)[np.argsort(-scores[keep])[:k]]:
+                best.append((float(scores[i]), str(ids[i]), payloads[i]))
+            best = sorted(best, key=lambda t: t[0], reverse=True)[:k]
+        return [Point(id=pid, payload=pl, score=s) for s, pid, pl in best]
+
+    def stats(self) -> Dict[str, Any]:
+        segs = self.segments()
+        return {"segments": len(segs), "bytes": sum(os.path.getsize(s) for s in segs)}
+
+
+_cold: Optional[ColdStore] = None
+
+
+def cold_store() -> ColdStore:
+    global _cold
+    if _cold is None:
+        _cold = ColdStore(COLD_DIR)
+    return _cold
+
+
+def _scan(store: Any, batch: int = 1024) -> Tuple[List[Tuple[Optional[float], str, int]], int]:
+    """(ts or None, id, payload bytes) for every hot point, plus total payload bytes."""
+    rows: List[Tuple[Optional[float], str, int]] = []
+    total = 0
+    offset = None
+    while True:
+        pts, offset = store.scroll(batch, offset, with_vectors=False)
+        for p in pts:
+            pl = p.payload or {}
+            size = len(json.dumps(pl))
+            total += size
+            ts = pl.get("ts")
+            rows.append((float(ts) if isinstance(ts, (int, float)) else None, str(p.id), size))
+        if offset is None:
+            break
+    return rows, total
+
+
+def run_tiering(max_hot_gb: Optional[float] = None, archive_after_days: Optional[float] = None,
+                dry_run: bool = False, label: str = "archived", now: Optional[float] = None,
+                batch: int = 1024) -> Dict[str, Any]:
+    """Keep the hot tier within budget.
+
+    1. Measure the footprint (vectors at the store's bytes/vector plus payload JSON).
+    2. At ``quantize_at`` of the budget, switch the hot store to int8 vectors.
+    3. Move points older than ``archive_after_days`` to the cold store.
+    4. If still above ``target`` of the budget, move the oldest remaining points too.
+
+    Points without a ``ts`` (written before ingest stamped one) count as scanned
+    now: never archived by age, and only after all older points under budget.
+    """
+    import main_graph as mg
+    with _lock:
+        mg._ensure_retrieval_ready()
+        store = mg._store
+        pol = policy()
+        budget = (pol["max_hot_gb"] if max_hot_gb is None else max_hot_gb) * GB
+        days = pol["archive_after_days"] if archive_after_days is None else archive_after_days
+        now = time.time() if now is None else now
+        t0 = time.time()
+
+        scanned, payload_bytes = _scan(store, batch)  # type: ignore[arg-type]
+        rows = [(now if ts is None else ts, pid, size) for ts, pid, size in scanned]
+        bpv = store.bytes_per_vector  # type: ignore[union-attr]
+        hot = len(rows) * bpv + payload_bytes
+        st: Dict[str, Any] = {"points": len(rows), "hot_bytes_before": hot, "budget_bytes": int(budget),
+                              "quantized": False, "archived_by_age": 0, "archived_by_budget": 0, "dry_run": dry_run,
+                              "undated": sum(1 for ts, _, _ in scanned if ts is None)}
+        dim = mg.emb.get_sentence_embedding_dimension()  # type: ignore[union-attr]
+        if hot >= pol["quantize_at"] * budget and bpv > dim + 4:
+            st["quantized"] = dry_run or bool(store.quantize())  # type: ignore[union-attr]
+            if st["quantized"]:
+                bpv = dim + 4 if dry_run else store.bytes_per_vector  # type: ignore[union-attr]
+                hot = len(rows) * bpv + payload_bytes
+
+        rows.sort()
+        cutoff = now - days * 86400
+        move: List[str] = []
+        i = 0
+        while i < len(rows) and rows[i][0] < cutoff:
+            move.append(rows[i][1]); hot -= bpv + rows[i][2]; i += 1
+        st["archived_by_age"] = len(move)
+        while i < len(rows) and hot > pol["target"] * budget:
+            move.append(rows[i][1]); hot -= bpv + rows[i][2]; i += 1
+        st["archived_by_budget"] = len(move) - st["archived_by_age"]
+
+        if move and not dry_run:
+            cold = cold_store()
+            for j in range(0, len(move), batch):
+                ids = move[j:j + batch]
+                cold.add(mg._hydrate(store.retrieve(ids, with_payload=True, with_vectors=True)), label)  # type: ignore[union-attr]
+                mg.delete_points(ids)
+        st.update({"hot_bytes_after": hot, "hot_gb_after": round(hot / GB, 4),
+                   "cold": cold_store().stats(), "seconds": round(time.time() - t0, 3), "at": now})
+        if not dry_run:
+            LAST.clear(); LAST.update(st)
+        return st
+
+
+def tiering_stats() -> Dict[str, Any]:
+    return {"last_run": dict(LAST), "cold": cold_store().stats()}
@@ -1,12 +1,16 @@
 from typing import Dict, Any
 
 def run(args: Dict[str, Any]) -> Dict[str, Any]:
-    """Stub archive action: returns a count but does not alter storage on Heroku.
+    """Enforce the manifesto data_policy: quantize near max_hot_vector_gb, archive old points to cold storage.
 
-    Args: {"tag": "string"}
+    Args: {"tag": "string", "dry_run": bool, "max_hot_gb": number, "archive_after_days": number}
     """
+    from tiering import run_tiering
     tag = args.get("tag", "archived")
-    # In a real external Qdrant setup we would update payloads to include {"status": tag}
-    return {"archived_tag": tag, "note": "stubbed on Heroku"}
-
-
+    out = run_tiering(
+        max_hot_gb=args.get("max_hot_gb"),
+        archive_after_days=args.get("archive_after_days"),
+        dry_run=bool(args.get("dry_run", False)),
+        label=tag,
+    )
+    return {"archived_tag": tag, **out}
@@ -1,25 +1,94 @@
 import os
+import time
 from typing import Dict, Any
 
+from chunking import iter_file_chunks
+
+
+def _progress_printer(path: str, total_bytes: int, every_sec: float = 5.0):
+    last = [0.0]
+    def _report(st: Dict[str, Any]) -> None:
+        now = time.time()
+        if now - last[0] < every_sec:
+            return
+        last[0] = now
+        pct = 100.0 * st["bytes"] / total_bytes if total_bytes else 100.0
+        print(f"📥 ingest {path}: {min(pct, 100.0):.0f}% {st['chunks']} chunks, "
+              f"{st['chunks_per_sec']} chunks/s, {st['mb_per_sec']} MB/s")
+    return _report
+
+
+def _run_bulk(path: str, args: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    try:
+        import ingest_bulk
+        paths = ingest_bulk.expand_paths(path, args.get("pattern"))
+        if not paths:
+            return {"error": "not_found"}
+        small = [p for p in paths if os.path.getsize(p) <= threshold]
+        large = [p for p in paths if os.path.getsize(p) > threshold]
+        st = ingest_bulk.ingest_paths(
+            small,
+            workers=int(args["workers"]) if args.get("workers") else None,
+            batch_size=int(args.get("batch_size") or os.getenv("INGEST_BULK_BATCH", "128")),
+        )
+        # Oversized files would pin a worker's memory; stream them one by one instead
+        for p in large:
+            one = run({"path": p, "stream": True})
+            if "error" in one:
+                st["errors"].append(f"{p}: {one.get('detail', one['error'])}")
+                continue
+            for k in ("chunks", "new_chunks", "bytes"):
+                st[k] += one.get(k, 0)
+            st["files"] += 1
+        return {"ingested": path, "mode": "bulk", **st}
+    except Exception as e:
+        return {"error": "ingest_failed", "detail": str(e)}
+
+
 def run(args: Dict[str, Any]) -> Dict[str, Any]:
-    """Ingest a local text file into vector memory.
+    """Ingest a local text file, a directory or a glob into vector memory.
 
     Args:
-        args: {"path": "/absolute/or/relative/path"}
+        args: {"path": "file | dir | glob", "stream": bool, "batch_size": int,
+               "pattern": "**/*.md", "workers": int, "sync": bool}
+        Files above INGEST_STREAM_THRESHOLD_MB (default 16) are always streamed.
+        Directories and globs are bulk-ingested over a process pool; with
+        "sync" only files changed since the last sync are re-ingested.
     Returns:
-        {"ingested": path, "bytes": N}
+        {"ingested": path, "bytes": N, "new_chunks": M}  # unchanged chunks are skipped
+        Streaming adds chunks, seconds, chunks_per_sec and mb_per_sec; bulk adds
+        files and files_per_sec.
     """
     path = args.get("path")
     if not path:
         return {"error": "missing_path"}
+    threshold = float(os.getenv("INGEST_STREAM_THRESHOLD_MB", "16")) * 1024 * 1024
+    if args.get("sync"):
+        try:
+            from ingest_sync import sync_directory
+            return {"synced": path, "mode": "sync", **sync_directory(path, args.get("pattern"))}
+        except Exception as e:
+            return {"error": "sync_failed", "detail": str(e)}
+    if os.path.isdir(path) or any(ch in path for ch in "*?["):
+        return _run_bulk(path, args, threshold)
     if not os.path.exists(path):
         return {"error": "not_found"}
     try:
+        size = os.path.getsize(path)
+        src = f"file:{os.path.abspath(path)}"
+        if args.get("stream") or size > threshold:
+            from main_graph import ingest_stream
+            st = ingest_stream(
+                iter_file_chunks(path),
+                src=src,
+                batch_size=int(args.get("batch_size") or os.getenv("INGEST_STREAM_BATCH", "64")),
+                on_progress=_progress_printer(path, size),
+            )
+            return {"ingested": path, "mode": "stream", **st}
         from main_graph import ingest as _ingest
         with open(path, "r", encoding="utf-8", errors="ignore") as f:
             data = f.read()
-        _ingest(data, src=f"file:{os.path.abspath(path)}")
-        return {"ingested": path, "bytes": len(data)}
+        n = _ingest(data, src=src)
+        return {"ingested": path, "bytes": len(data), "new_chunks": n}
     except Exception as e:
         return {"error": "ingest_failed", "detail": str(e)}
-
@@ -0,0 +1,515 @@
+import os
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Payload fields retrieval filters on; Qdrant indexes them so filtered search scales with the match set
+PAYLOAD_INDEXES = {"thread_id": "keyword", "source": "keyword", "role": "keyword", "kind": "keyword", "ts": "float"}
+
+
+@dataclass
+class Point:
+    """Backend-neutral point; Qdrant's own records expose the same attributes."""
+    id: str
+    vector: Optional[List[float]] = None
+    payload: Dict[str, Any] = field(default_factory=dict)
+    score: float = 0.0
+
+
+def payload_predicate(thread_id: Optional[str] = None, source: Optional[str] = None,
+                      since: Optional[float] = None, until: Optional[float] = None,
+                      include_shared: bool = True) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Retrieval filters as a predicate over a payload; points without a thread are shared."""
+    if thread_id is None and source is None and since is None and until is None:
+        return None
+    def _ok(m: Dict[str, Any]) -> bool:
+        if thread_id is not None:
+            t = m.get("thread_id")
+            if not (str(t) == str(thread_id) if t not in (None, "") else include_shared):
+                return False
+        if source is not None and m.get("source") != source:
+            return False
+        if since is not None or until is not None:
+            ts = m.get("ts")
+            if ts is None or (since is not None and ts < since) or (until is not None and ts > until):
+                return False
+        return True
+    return _ok
+
+
+def qdrant_filter(thread_id: Optional[str] = None, source: Optional[str] = None,
+                  since: Optional[float] = None, until: Optional[float] = None,
+                  include_shared: bool = True):
+    """The same constraints as ``payload_predicate`` as a Qdrant ``Filter`` (None when unfiltered)."""
+    from qdrant_client.http.models import Filter, FieldCondition, MatchValue, Range, IsEmptyCondition, PayloadField
+    must: List[Any] = []
+    if thread_id is not None:
+        own = FieldCondition(key="thread_id", match=MatchValue(value=str(thread_id)))
+        if include_shared:
+            must.append(Filter(should=[own, IsEmptyCondition(is_empty=PayloadField(key="thread_id"))]))
+        else:
+            must.append(own)
+    if source is not None:
+        must.append(FieldCondition(key="source", match=MatchValue(value=source)))
+    if since is not None or until is not None:
+        must.append(FieldCondition(key="ts", range=Range(gte=since, lte=until)))
+    return Filter(must=must) if must else None
+
+
+class QdrantStore:
+    """Vector store over a Qdrant client (server, embedded path or in-memory)."""
+
+    name = "qdrant"
+
+    def __init__(self, client: Any, collection: str):
+        self.client = client
+        self.collection = collection
+
+    def ensure(self, dim: int) -> bool:
+        """Create the collection (and payload indexes) if missing; True when it was created.
+
+        A new collection is created as ``<name>_v1`` behind the alias ``<name>``, so a
+        migration can later repoint the alias (see ``point_alias``). A pre-existing
+        collection called ``<name>`` is used as is.
+        """
+        from qdrant_client.http.models import Distance, VectorParams
+        created = False
+        try:
+            have = [c.name for c in self.client.get_collections().collections]
+            if self.collection not in have and self.resolve() == self.collection:
+                self.create_version(f"{self.collection}_v1", dim)
+                self.point_alias(f"{self.collection}_v1")
+                created = True
+        except Exception as e:
+            print(f"Creating collection: {e}")
+            self.client.recreate_collection(self.collection, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+            created = True
+        self._ensure_payload_indexes()
+        return created
+
+    def create_version(self, name: str, dim: int) -> "QdrantStore":
+        """Create (or reuse) the physical collection ``name``; returns a store writing straight to it."""
+        from qdrant_client.http.models import Distance, VectorParams
+        if name not in [c.name for c in self.client.get_collections().collections]:
+            self.client.create_collection(name, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+        store = QdrantStore(self.client, name)
+        store._ensure_payload_indexes()
+        return store
+
+    def resolve(self) -> str:
+        """The physical collection behind this name (itself when it is not an alias)."""
+        try:
+            for a in self.client.get_aliases().aliases:
+                if a.alias_name == self.collection:
+                    return a.collection_name
+        except Exception:
+            pass
+        return self.collection
+
+    def point_alias(self, target: str) -> Optional[str]:
+        """Atomically repoint the alias at collection ``target``; returns the collection it left.
+
+        Qdrant applies the delete/create pair as one operation, so readers never see a
+        missing alias. A legacy collection that owns the name itself must be dropped
+        first (Qdrant cannot rename collections), which is the one non-atomic case.
+        """
+        from qdrant_client.http.models import (CreateAlias, CreateAliasOperation, DeleteAlias,
+                                               DeleteAliasOperation)
+        old: Optional[str] = self.resolve()
+        ops: List[Any] = []
+        if old != self.collection:
+            ops.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=self.collection)))
+        elif self.collection in [c.name for c in self.client.get_collections().collections]:
+            self.client.delete_collection(self.collection)
+        else:
+            old = None
+        ops.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=self.collection)))
+        self.client.update_collection_aliases(change_aliases_operations=ops)
+        return old
+
+    def _ensure_payload_indexes(self) -> None:
+        from qdrant_client.local.qdrant_local import QdrantLocal
+        if isinstance(getattr(self.client, "_client", None), QdrantLocal):
+            return  # the embedded client scans payloads anyway and warns on index creation
+        from qdrant_client.http.models import PayloadSchemaType
+        for name, schema in PAYLOAD_INDEXES.items():
+            try:
+                self.client.create_payload_index(collection_name=self.collection, field_name=name,
+                                                 field_schema=PayloadSchemaType(schema))
+            except Exception as e:
+                print(f"Payload index {name}: {e}")
+
+    def upsert(self, points: List[Point]) -> None:
+        from qdrant_client.http.models import PointStruct
+        self.client.upsert(collection_name=self.collection,
+                           points=[PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points])
+
+    def retrieve(self, ids: List[str], with_payload: bool = True, with_vectors: bool = False) -> List[Any]:
+        return self.client.retrieve(collection_name=self.collection, ids=ids,
+                                    with_payload=with_payload, with_vectors=with_vectors)
+
+    def delete(self, ids: List[str]) -> None:
+        from qdrant_client.http.models import PointIdsList
+        self.client.delete(collection_name=self.collection, points_selector=PointIdsList(points=ids))
+
+    def search(self, vector: List[float], limit: int, filt: Optional[Dict[str, Any]] = None) -> List[Any]:
+        return self.client.search(collection_name=self.collection, query_vector=vector,
+                                  query_filter=qdrant_filter(**(filt or {})), limit=limit)
+
+    def scroll(self, limit: int = 256, offset: Any = None, with_vectors: bool = False) -> Tuple[List[Any], Any]:
+        return self.client.scroll(collection_name=self.collection, limit=limit, offset=offset,
+                                  with_payload=True, with_vectors=with_vectors)
+
+    def count(self) -> int:
+        return self.client.count(collection_name=self.collection, exact=True).count
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """RAM per vector: float32, int8 plus a scale once quantized, or both while the originals stay in RAM."""
+        cfg = self.client.get_collection(self.collection).config
+        dim = cfg.params.vectors.size
+        if cfg.quantization_config is None:
+            return dim * 4
+        return dim + 4 if cfg.params.vectors.on_disk else dim * 4 + dim + 4
+
+    def quantize(self) -> bool:
+        """Enable int8 scalar quantization server-side and move the float32 originals to disk.
+
+        Without ``on_disk`` the originals would stay in RAM next to the int8 copy. The
+        embedded local client ignores both; returns whether it took effect.
+        """
+        from qdrant_client.http.models import (ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+                                               VectorParamsDiff)
+        cfg = ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+        return bool(self.client.update_collection(collection_name=self.resolve(), quantization_config=cfg,
+                                                  vectors_config={"": VectorParamsDiff(on_disk=True)}))
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class NumpyStore:
+    """Exact cosine search over a matrix of normalized vectors, no vector database needed.
+
+    With a ``path`` the matrix is an append-only raw file (``vectors.float32``,
+    ``vectors.float16`` or ``vectors.int8``) read through a memory map;
+    ``rows.jsonl`` holds the ``[id, payload]`` of each row and ``dead.txt`` the
+    row numbers that were deleted or superseded. Without a path everything stays
+    in RAM. Search is a single matrix-vector product over the rows that pass the
+    filter plus an ``argpartition`` for the top k.
+
+    ``int8`` is scalar quantization with one float32 scale per row
+    (``scales.float32``); an existing store keeps whatever dtype it was written in.
+    """
+
+    name = "numpy"
+
+    def __init__(self, path: Optional[str], dim: int, dtype: str = "float32"):
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.RLock()
+        self._n = 0
+        self._cap = 0
+        self._buf = np.zeros((0, dim), dtype=self.dtype)  # RAM mode only
+        self._mm: Optional[np.memmap] = None
+        self._ids: List[str] = []
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._row: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._ts = np.zeros(0, dtype=np.float64)
+        self._thread = np.zeros(0, dtype=object)
+        self._source = np.zeros(0, dtype=object)
+        self._scale = np.zeros(0, dtype=np.float32)  # int8 only
+        self._dead = 0
+        self._created = True
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for dt in ("float32", "float16", "int8"):
+                if os.path.exists(os.path.join(path, f"vectors.{dt}")):
+                    self.dtype = np.dtype(dt)
+            self._vec_path = os.path.join(path, f"vectors.{self.dtype.name}")
+            self._scale_path = os.path.join(path, "scales.float32")
+            self._rows_path = os.path.join(path, "rows.jsonl")
+            self._dead_path = os.path.join(path, "dead.txt")
+            if os.path.exists(self._rows_path):
+                self._created = False
+                self._load()
+
+    # storage
+
+    def _grow(self, need: int) -> None:
+        if need <= self._cap:
+            return
+        cap = max(need, self._cap * 2, 1024)
+        def _resize(a: np.ndarray, fill: Any) -> np.ndarray:
+            out = np.full((cap,) + a.shape[1:], fill, dtype=a.dtype)
+            out[:len(a)] = a
+            return out
+        self._alive = _resize(self._alive, False)
+        self._ts = _resize(self._ts, np.nan)
+        self._thread = _resize(self._thread, "")
+        self._source = _resize(self._source, "")
+        self._scale = _resize(self._scale, 0)
+        if not self.path:
+            self._buf = _resize(self._buf, 0)
+        self._cap = cap
+
+    def _matrix(self) -> np.ndarray:
+        if not self.path:
+            return self._buf[:self._n]
+        if self._mm is None or self._mm.shape[0] < self._n:
+            self._mm = np.memmap(self._vec_path, dtype=self.dtype, mode="r", shape=(self._n, self.dim)) if self._n else None
+        return self._mm[:self._n] if self._mm is not None else np.zeros((0, self.dim), dtype=self.dtype)
+
+    def _quantize(self, vecs: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Normalized float32 rows in the stored dtype, plus per-row scales for int8."""
+        if self.dtype != np.int8:
+            return vecs.astype(self.dtype), None
+        scale = np.abs(vecs).max(axis=1) / 127.0
+        scale[scale == 0] = 1.0
+        return np.round(vecs / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+    def _rows_f32(self, rows: np.ndarray) -> np.ndarray:
+        out = np.asarray(self._matrix()[rows], dtype=np.float32)
+        return out * self._scale[rows][:, None] if self.dtype == np.int8 else out
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.dim * self.dtype.itemsize + (4 if self.dtype == np.int8 else 0)
+
+    def _set_row(self, row: int, pid: str, payload: Dict[str, Any]) -> None:
+        old = self._row.get(pid)
+        if old is not None:
+            self._kill(old)
+        self._row[pid] = row
+        self._alive[row] = True
+        ts = payload.get("ts")
+        self._ts[row] = float(ts) if isinstance(ts, (int, float)) else np.nan
+        self._thread[row] = str(payload.get("thread_id") or "")
+        self._source[row] = str(payload.get("source") or "")
+
+    def _kill(self, row: int) -> None:
+        self._alive[row] = False
+        self._payloads[row] = None
+        self._dead += 1
+
+    def _load(self) -> None:
+        row_bytes = self.dtype.itemsize * self.dim
+        n_vec = os.path.getsize(self._vec_path) // row_bytes if os.path.exists(self._vec_path) else 0
+        rows: List[Tuple[str, Dict[str, Any]]] = []
+        good = 0
+        with open(self._rows_path, "rb") as f:
+            for line in f:
+                if len(rows) >= n_vec or not line.endswith(b"\n"):
+                    break
+                try:
+                    pid, payload = json.loads(line)
+                except ValueError:
+                    break
+                rows.append((pid, payload))
+                good += len(line)
+        # Drop the tail of a torn write so rows and vectors stay aligned for later appends
+        with open(self._rows_path, "r+b") as f:
+            f.truncate(good)
+        if os.path.exists(self._vec_path):
+            with open(self._vec_path, "r+b") as f:
+                f.truncate(len(rows) * row_bytes)
+        self._grow(len(rows))
+        if self.dtype == np.int8:
+            self._scale[:len(rows)] = np.fromfile(self._scale_path, dtype=np.float32, count=len(rows))
+            with open(self._scale_path, "r+b") as f:
+                f.truncate(len(rows) * 4)
+        for i, (pid, payload) in enumerate(rows):
+            self._ids.append(pid)
+            self._payloads.append(payload)
+            self._set_row(i, pid, payload)
+        self._n = len(rows)
+        if os.path.exists(self._dead_path):
+            with open(self._dead_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    row = int(line)
+                    if row < self._n and self._alive[row]:
+                        self._row.pop(self._ids[row], None)
+                        self._kill(row)
+
+    # VectorStore interface
+
+    def ensure(self, dim: int) -> bool:
+        if dim != self.dim:
+            raise ValueError(f"vector store has dim {self.dim}, embedder produces {dim}")
+        created, self._created = self._created, False
+        return created
+
+    def upsert(self, points: List[Point]) -> None:
+        if not points:
+            return
+        vecs = np.asarray([p.vector for p in points], dtype=np.float32).reshape(len(points), self.dim)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        vecs, scale = self._quantize(vecs / np.where(norms == 0, 1.0, norms))
+        with self._lock:
+            base = self._n
+            superseded = [self._row[str(p.id)] for p in points if str(p.id) in self._row]
+            self._grow(base + len(points))
+            if scale is not None:
+                self._scale[base:base + len(points)] = scale
+            if self.path:
+                if scale is not None:
+                    with open(self._scale_path, "ab") as f:
+                        f.write(scale.tobytes())
+                with open(self._vec_path, "ab") as f:
+                    f.write(vecs.tobytes())
+                with open(self._rows_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps([str(p.id), p.payload or {}]) + "\n" for p in points))
+                self._append_dead(superseded)
+            else:
+                self._buf[base:base + len(points)] = vecs
+            for i, p in enumerate(points):
+                self._ids.append(str(p.id))
+                self._payloads.append(dict(p.payload or {}))
+                self._set_row(base + i, str(p.id), p.payload or {})
+            self._n = base + len(points)
+
+    def _append_dead(self, rows: Iterable[int]) -> None:
+        rows = list(rows)
+        if rows and self.path:
+            with open(self._dead_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{r}\n" for r in rows))
+
+    def retrieve(self, ids: List[str], with_payload: bool = True, with_vectors: bool = False) -> List[Point]:
+        with self._lock:
+            rows = [(str(i), self._row[str(i)]) for i in ids if str(i) in self._row]
+            vecs = self._rows_f32(np.array([r for _, r in rows], dtype=np.int64)) if with_vectors and rows else None
+            return [Point(id=pid, payload=dict(self._payloads[r] or {}) if with_payload else {},
+                          vector=vecs[j].tolist() if vecs is not None else None)
+                    for j, (pid, r) in enumerate(rows)]
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            rows = [self._row.pop(str(i)) for i in ids if str(i) in self._row]
+            for r in rows:
+                self._kill(r)
+            self._append_dead(rows)
+            if self._dead > 1024 and self._dead > self._n // 2:
+                self.compact()
+
+    def _mask(self, thread_id: Optional[str] = None, source: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              include_shared: bool = True) -> np.ndarray:
+        n = self._n
+        m = self._alive[:n].copy()
+        if thread_id is not None:
+            th = self._thread[:n]
+            own = th == str(thread_id)
+            m &= (own | (th == "")) if include_shared else own
+        if source is not None:
+            m &= self._source[:n] == source
+        with np.errstate(invalid="ignore"):
+            if since is not None:
+                m &= self._ts[:n] >= since
+            if until is not None:
+                m &= self._ts[:n] <= until
+        return m
+
+    def _scores(self, mat: np.ndarray, v: np.ndarray, scale: Optional[np.ndarray] = None) -> np.ndarray:
+        if mat.dtype == np.float32:
+            return mat @ v
+        # No BLAS for half precision or int8: upcast in blocks to bound the temporary
+        out = np.empty(len(mat), dtype=np.float32)
+        for i in range(0, len(mat), 65536):
+            out[i:i + 65536] = mat[i:i + 65536].astype(np.float32) @ v
+        return out * scale if scale is not None else out
+
+    def search(self, vector: List[float], limit: int, filt: Optional[Dict[str, Any]] = None) -> List[Point]:
+        v = np.asarray(vector, dtype=np.float32)
+        nv = np.linalg.norm(v)
+        v = v / nv if nv else v
+        with self._lock:
+            if not self._n or limit <= 0:
+                return []
+            idx = np.flatnonzero(self._mask(**(filt or {})))
+            if not len(idx):
+                return []
+            mat = self._matrix()
+            # Dense scan when most rows qualify; otherwise gather only the matching rows
+            scale = self._scale[:self._n] if self.dtype == np.int8 else None
+            if len(idx) == self._n:
+                scores = self._scores(mat, v, scale)
+            elif len(idx) * 2 >= self._n:
+                scores = self._scores(mat, v, scale)[idx]
+            else:
+                scores = self._scores(mat[idx], v, scale[idx] if scale is not None else None)
+            k = min(limit, len(idx))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [Point(id=self._ids[idx[j]], payload=dict(self._payloads[idx[j]] or {}), score=float(scores[j]))
+                    for j in top]
+
+    def scroll(self, limit: int = 256, offset: Any = None, with_vectors: bool = False) -> Tuple[List[Point], Any]:
+        with self._lock:
+            start = int(offset or 0)
+            live = np.flatnonzero(self._alive[start:self._n]) + start
+            rows = live[:limit]
+            vecs = self._rows_f32(rows) if with_vectors and len(rows) else None
+            out = [Point(id=self._ids[r], payload=dict(self._payloads[r] or {}),
+                         vector=vecs[j].tolist() if vecs is not None else None) for j, r in enumerate(rows)]
+            return out, (int(live[limit]) if len(live) > limit else None)
+
+    def count(self) -> int:
+        return len(self._row)
+
+    def compact(self, dtype: Optional[str] = None) -> None:
+        """Rewrite storage without dead rows, optionally converting to another dtype."""
+        with self._lock:
+            live = np.flatnonzero(self._alive[:self._n])
+            vecs = self._rows_f32(live) if len(live) else np.zeros((0, self.dim), dtype=np.float32)
+            ids = [self._ids[r] for r in live]
+            payloads = [self._payloads[r] or {} for r in live]
+            old_vec_path = self._vec_path if self.path else None
+            if dtype:
+                self.dtype = np.dtype(dtype)
+            mat, scale = self._quantize(vecs)
+            if self.path:
+                self._mm = None
+                self._vec_path = os.path.join(self.path, f"vectors.{self.dtype.name}")
+                files = [(self._vec_path, mat.tobytes()),
+                         (self._rows_path, "".join(json.dumps([i, p]) + "\n" for i, p in zip(ids, payloads)).encode("utf-8")),
+                         (self._dead_path, b"")]
+                if scale is not None:
+                    files.append((self._scale_path, scale.tobytes()))
+                for dst, data in files:
+                    with open(dst + ".tmp", "wb") as f:
+                        f.write(data)
+                for dst, _ in files:
+                    os.replace(dst + ".tmp", dst)
+                if old_vec_path != self._vec_path:
+                    os.remove(old_vec_path)  # type: ignore[arg-type]
+                    if scale is None and os.path.exists(self._scale_path):
+                        os.remove(self._scale_path)
+            self._n = self._cap = self._dead = 0
+            self._ids, self._payloads, self._row = [], [], {}
+            for a in ("_alive", "_ts", "_thread", "_source", "_scale"):
+                setattr(self, a, getattr(self, a)[:0])
+            self._buf = np.zeros((0, self.dim), dtype=self.dtype)
+            self._grow(len(ids))
+            if scale is not None:
+                self._scale[:len(ids)] = scale
+            if not self.path:
+                self._buf[:len(ids)] = mat
+            for i, (pid, payload) in enumerate(zip(ids, payloads)):
+                self._ids.append(pid)
+                self._payloads.append(payload)
+                self._set_row(i, pid, payload)
+            self._n = len(ids)
+
+    def quantize(self) -> bool:
+        """Convert to int8 scalar quantization in place (about 4x smaller than float32)."""
+        if self.dtype != np.int8:
+            self.compact("int8")
+        return True
+
+    def close(self) -> None:
+        self._mm = None
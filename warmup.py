@@ -0,0 +1,142 @@
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_lock = threading.Lock()
+_ready = threading.Event()
+_pending: List[Tuple[Callable[..., Any], tuple]] = []
+_steps: Dict[str, Callable[[], Any]] = {}
+# Failed components are retried (off the request path) at most this often while status() is polled
+RECHECK_SEC = float(os.getenv("WARMUP_RECHECK_SEC", "30"))
+_recheck = {"at": 0.0, "running": False}
+STATE: Dict[str, Any] = {"status": "idle", "started_at": None, "total_ms": None, "components": {},
+                         "queued": 0, "drained": 0}
+
+
+def default_steps() -> List[Tuple[str, Callable[[], Any]]]:
+    """What the first request would otherwise pay for, in dependency order."""
+    import main_graph as mg
+    steps: List[Tuple[str, Callable[[], Any]]] = []
+    if os.getenv("DISABLE_RETRIEVAL", "false").lower() != "true":
+        def _search() -> None:
+            v = mg._encode_raw(["warm-up"])[0]
+            mg._store.search(list(map(float, v)), 1)  # type: ignore[union-attr]
+        steps += [
+            ("embedder", mg._ensure_embedder),
+            ("retrieval", mg._ensure_retrieval_ready),
+            ("encode_search", _search),
+        ]
+    # Without a key (echo / no-LLM deployments) the client can never be built and is not needed
+    if os.getenv("OPENAI_API_KEY"):
+        steps.append(("llm_client", mg._get_openai_client))
+    steps.append(("graph", mg.app.get_graph))
+    return steps
+
+
+def start(steps: Optional[List[Tuple[str, Callable[[], Any]]]] = None, background: bool = True) -> bool:
+    """Run the warm-up once per process; later calls are no-ops and return False."""
+    with _lock:
+        if STATE["status"] != "idle":
+            return False
+        STATE.update({"status": "warming", "started_at": time.time()})
+    if background:
+        threading.Thread(target=_run, args=(steps,), name="warmup", daemon=True).start()
+    else:
+        _run(steps)
+    return True
+
+
+def _run(steps: Optional[List[Tuple[str, Callable[[], Any]]]]) -> None:
+    t0 = time.time()
+    failed = False
+    try:
+        steps = default_steps() if steps is None else steps
+    except Exception as e:
+        steps = []
+        failed = True
+        STATE["components"]["setup"] = {"ok": False, "ms": 0.0, "error": str(e)}
+    _steps.update(dict(steps))
+    for name, fn in steps:
+        t1 = time.time()
+        comp: Dict[str, Any] = {"ok": True}
+        try:
+            fn()
+        except Exception as e:
+            # Not fatal: the lazy path retries on first use
+            comp = {"ok": False, "error": str(e)}
+            failed = True
+        comp["ms"] = round((time.time() - t1) * 1000.0, 1)
+        STATE["components"][name] = comp
+    with _lock:
+        STATE["status"] = "degraded" if failed else "ready"
+        STATE["total_ms"] = round((time.time() - t0) * 1000.0, 1)
+        queued = list(_pending)
+        _pending.clear()
+        _ready.set()
+    for fn, args in queued:
+        STATE["drained"] += 1
+        threading.Thread(target=fn, args=args, daemon=True).start()
+
+
+def defer(fn: Callable[..., Any], *args: Any) -> bool:
+    """Queue ``fn(*args)`` until warm-up finishes. False means no warm-up is running: call it now."""
+    with _lock:
+        if STATE["status"] != "warming":
+            return False
+        _pending.append((fn, args))
+        STATE["queued"] += 1
+        return True
+
+
+def wait(timeout: Optional[float] = None) -> bool:
+    """Block until warm-up is over (immediately if it never started)."""
+    if STATE["status"] == "idle":
+        return True
+    return _ready.wait(timeout)
+
+
+def is_ready() -> bool:
+    return STATE["status"] != "warming"
+
+
+def _retry_failed() -> None:
+    """Re-run the steps that failed; a component that now works (e.g. after the lazy path recovered it) is cleared."""
+    try:
+        with _lock:
+            failed = [k for k, c in STATE["components"].items() if not c.get("ok") and k in _steps]
+        for name in failed:
+            t1 = time.time()
+            try:
+                _steps[name]()
+                comp: Dict[str, Any] = {"ok": True, "recovered": True}
+            except Exception as e:
+                comp = {"ok": False, "error": str(e)}
+            comp["ms"] = round((time.time() - t1) * 1000.0, 1)
+            with _lock:
+                STATE["components"][name] = comp
+        with _lock:
+            if STATE["status"] == "degraded" and all(c.get("ok") for c in STATE["components"].values()):
+                STATE["status"] = "ready"
+    finally:
+        _recheck["running"] = False
+
+
+def status() -> Dict[str, Any]:
+    """Warm-up state; ``ready`` only once every component warmed (or no warm-up was run).
+
+    While degraded, each call may start a background retry of the failed
+    components (at most every RECHECK_SEC), so readiness comes back once they work.
+    """
+    with _lock:
+        if STATE["status"] == "degraded" and not _recheck["running"] \
+                and time.time() - _recheck["at"] >= RECHECK_SEC:
+            _recheck.update({"at": time.time(), "running": True})
+            threading.Thread(target=_retry_failed, name="warmup-recheck", daemon=True).start()
+        st = dict(STATE)
+        st["components"] = {k: dict(v) for k, v in STATE["components"].items()}
+        st["pending"] = len(_pending)
+    # Degraded still serves requests (the lazy path retries), but should not pass a readiness probe
+    st["ready"] = st["status"] in ("idle", "ready")
+    st["failed"] = [k for k, c in st["components"].items() if not c.get("ok")]
+    return st
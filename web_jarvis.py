@@ -1,22 +1,43 @@
 import os
 import json
+import asyncio
 import requests
 import threading
 import time
+_BOOT_T0 = time.time()
 from flask import Flask, request, jsonify
 from main_graph import app as jarvis_app, State
-from main_graph import ingest as ingest_text
+from main_graph import ingest_async as ingest_text, embed_cache_stats, embed_batch_stats, query_cache_stats, storage_stats, prompt_stats, llm_cache_stats
+from main_graph import _ensure_retrieval_ready, STREAM_CALLBACK, llm_circuit_stats, llm_hedge_stats
+import circuit
+import ingest_queue
+import tiering
+import warmup
+import migrate
 import preflight
 
 flask_app = Flask(__name__)
 preflight.ensure()
-METRICS = {"started_at": time.time(), "decisions": 0, "actions": 0, "errors": 0, "last_error": ""}
+METRICS = {"started_at": time.time(), "decisions": 0, "actions": 0, "errors": 0, "last_error": "",
+           "streamed": 0, "stream_first_text_ms": None}
 MONITOR_ENABLED = os.getenv("MONITOR_ENABLED", "false").lower() == "true"
 MONITOR_INTERVAL = int(os.getenv("MONITOR_INTERVAL_SEC", "60"))
 MONITOR_FAIL_THRESHOLD = int(os.getenv("MONITOR_FAIL_THRESHOLD", "2"))
 _monitor_fail_count = 0
 ECHO_MODE = os.getenv("ECHO_MODE", "false").lower() == "true"
+SYNC_DIRS = [d.strip() for d in os.getenv("SYNC_DIRS", "").split(",") if d.strip()]
+SYNC_INTERVAL = int(os.getenv("SYNC_INTERVAL_SEC", "900"))
+TIERING_INTERVAL = int(os.getenv("TIERING_INTERVAL_SEC", "0"))
 API_TOKEN = os.getenv("API_TOKEN", "").strip()
+WARMUP_ON_BOOT = os.getenv("WARMUP_ON_BOOT", "true").lower() == "true"
+WARMUP_WAIT_SEC = float(os.getenv("WARMUP_WAIT_SEC", "30"))
+# Background goals run as coroutines on one event loop instead of a thread each
+LLM_ASYNC = os.getenv("LLM_ASYNC", "true").lower() == "true"
+# Whole PLAN -> DECIDE run, LLM retries included, must finish within this
+GRAPH_DEADLINE_SEC = float(os.getenv("GRAPH_DEADLINE_SEC", "60"))
+# Show the FINAL answer while DECIDE is still generating, by editing one Telegram message
+TELEGRAM_STREAM = os.getenv("TELEGRAM_STREAM", "false").lower() == "true"
+TELEGRAM_EDIT_INTERVAL = float(os.getenv("TELEGRAM_EDIT_INTERVAL_SEC", "1.0"))
 
 # Telegram Bot Configuration and Auth
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -46,6 +67,102 @@ def send_telegram_message(text, chat_id=None):
         print(f"Error sending Telegram message: {e}")
         return {"error": str(e)}
 
+def _telegram_post(method, data):
+    try:
+        return requests.post(f"{TELEGRAM_API_URL}/{method}", json=data, timeout=10).json()
+    except Exception as e:
+        print(f"Error calling Telegram {method}: {e}")
+        return {"error": str(e)}
+
+def edit_telegram_message(chat_id, message_id, text, parse_mode="Markdown"):
+    """Replace the text of a message the bot sent earlier"""
+    if not TELEGRAM_TOKEN:
+        return {"error": "No Telegram token configured"}
+    data = {"chat_id": chat_id, "message_id": message_id, "text": text[:4000]}
+    if parse_mode:
+        data["parse_mode"] = parse_mode
+    return _telegram_post("editMessageText", data)
+
+class TelegramStreamer:
+    """One Telegram message that follows a streamed answer.
+
+    ``update`` only records the latest text; a worker thread posts it (sendMessage
+    first, then editMessageText) at most once per ``interval`` seconds, so the LLM
+    stream never waits on Telegram or runs into its edit rate limits. Partial text
+    goes out without parse mode, since Telegram rejects half a Markdown entity.
+    """
+
+    def __init__(self, chat_id, interval=None):
+        self.chat_id = chat_id
+        self.interval = TELEGRAM_EDIT_INTERVAL if interval is None else interval
+        self.message_id = None
+        self.first_text_ms = None
+        self._t0 = time.time()
+        self._text = self._sent = None
+        self._done = False
+        self._cv = threading.Condition()
+        self._thread = None
+
+    def update(self, text):
+        with self._cv:
+            self._text = text
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telegram-stream", daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def _run(self):
+        last = 0.0
+        while True:
+            with self._cv:
+                while not self._done and (self._text == self._sent or time.time() < last + self.interval):
+                    self._cv.wait(None if self._text == self._sent else last + self.interval - time.time())
+                if self._done:
+                    return
+                text = self._sent = self._text
+            self._post(text + " ▍")
+            last = time.time()
+
+    def _post(self, text):
+        if self.message_id is None:
+            r = _telegram_post("sendMessage", {"chat_id": self.chat_id, "text": text[:4000]})
+            self.message_id = (r.get("result") or {}).get("message_id") if isinstance(r, dict) else None
+            if self.message_id is not None:
+                self.first_text_ms = round((time.time() - self._t0) * 1000.0, 1)
+        else:
+            edit_telegram_message(self.chat_id, self.message_id, text, parse_mode=None)
+
+    def stop(self):
+        with self._cv:
+            self._done = True
+            self._cv.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=15)
+
+    def finish(self, response):
+        """Put the final response in the streamed message; False when nothing was streamed."""
+        self.stop()
+        if self.message_id is None:
+            return False
+        r = edit_telegram_message(self.chat_id, self.message_id, response)
+        if not r.get("ok") and "not modified" not in str(r.get("description", "")):
+            # Markdown the answer happens to break is still worth showing as plain text
+            edit_telegram_message(self.chat_id, self.message_id, response, parse_mode=None)
+        METRICS["streamed"] += 1
+        METRICS["stream_first_text_ms"] = self.first_text_ms
+        return True
+
+def _stream_start(chat_id):
+    if not (TELEGRAM_STREAM and TELEGRAM_TOKEN):
+        return None, None
+    streamer = TelegramStreamer(chat_id)
+    return streamer, STREAM_CALLBACK.set(streamer.update)
+
+def _stream_stop(streamer, token):
+    if streamer is not None:
+        STREAM_CALLBACK.reset(token)
+        streamer.stop()
+
 def reset_telegram_webhook():
     if not TELEGRAM_TOKEN:
         return
@@ -100,85 +217,155 @@ def _monitor_loop():
                 pass
         time.sleep(MONITOR_INTERVAL)
 
+def _sync_loop():
+    from ingest_sync import sync_directory
+    print(f"🔄 Sync loop starting for: {', '.join(SYNC_DIRS)}")
+    while True:
+        for d in SYNC_DIRS:
+            try:
+                st = sync_directory(d)
+                METRICS.setdefault("sync", {})[d] = {k: st[k] for k in ("added", "changed", "removed", "new_chunks", "seconds")}
+                METRICS["sync_last_run"] = time.time()
+            except Exception as e:
+                METRICS["last_error"] = f"sync: {e}"
+        time.sleep(SYNC_INTERVAL)
+
+def _tiering_loop():
+    while True:
+        time.sleep(TIERING_INTERVAL)
+        try:
+            tiering.run_tiering()
+        except Exception as e:
+            METRICS["last_error"] = f"tiering: {e}"
+
+def _begin_goal(goal, chat_id):
+    """Acknowledge and remember the message; False when echo mode already answered it."""
+    # Send acknowledgment
+    send_telegram_message(f"🤖 *Jarvis Processing:* {goal}", chat_id)
+    # Ingest user message into memory (queued; off the response path)
+    try:
+        ingest_text(goal, src="chat", meta={"thread_id": str(chat_id), "role": "user", "kind": "user", "ts": time.time()})
+    except Exception:
+        pass
+
+    # Fast-path echo for Hello-World validation
+    if ECHO_MODE:
+        send_telegram_message(f"👋 Hello! You said: {goal}", chat_id)
+        return False
+    return True
+
+def _goal_run(goal, chat_id):
+    # Provide a checkpointer thread_id using the Telegram chat as the thread key
+    state = State(goal=goal, context=[], decision={}, log=[])
+    return state, {"configurable": {"thread_id": str(chat_id), "checkpoint_ns": "telegram"}}
+
+def _finish_goal(result, chat_id, streamer=None):
+    # Format response
+    decision = result.get("decision", {})
+    decision_type = decision.get("type", "UNKNOWN")
+    
+    if decision_type == "FINAL":
+        answer = decision.get("answer", "Task completed")
+        response = f"✅ *Jarvis Complete*\n\n{answer}"
+    elif decision_type == "ACT":
+        tool = decision.get("tool", "unknown")
+        response = f"⚡ *Jarvis Action:* {tool}\n\nExecuting your request..."
+    else:
+        response = f"🔄 *Jarvis Status:* {decision_type}\n\nProcessing your goal..."
+    
+    # Add log info if available
+    logs = result.get("log", [])
+    if logs:
+        response += f"\n\n📋 *Actions taken:* {len(logs)}"
+    
+    # Ingest assistant response into memory
+    try:
+        answer_text = None
+        if decision_type == "FINAL":
+            answer_text = decision.get("answer")
+        if answer_text:
+            ingest_text(answer_text, src="chat", meta={"thread_id": str(chat_id), "role": "assistant", "kind": "assistant", "ts": time.time()})
+    except Exception:
+        pass
+
+    # Update metrics and send result back to Telegram
+    METRICS["decisions"] += 1
+    if logs:
+        METRICS["actions"] += len(logs)
+    if streamer is None or not streamer.finish(response):
+        send_telegram_message(response, chat_id)
+
+def _goal_failed(e, chat_id):
+    error_msg = f"❌ *Error processing goal:*\n{str(e)}"
+    METRICS["errors"] += 1
+    METRICS["last_error"] = str(e)
+    try:
+        send_telegram_message(error_msg, chat_id)
+    except Exception:
+        pass
+
 def process_jarvis_goal(goal, chat_id):
     """Process goal through Jarvis and send result via Telegram"""
     try:
-        # Send acknowledgment
-        send_telegram_message(f"🤖 *Jarvis Processing:* {goal}", chat_id)
-        # Ingest user message into memory
-        try:
-            from main_graph import ingest as _ingest
-            _ingest(goal, src="chat", meta={"thread_id": str(chat_id), "role": "user", "kind": "user", "ts": time.time()})
-        except Exception:
-            pass
-        # Ingest user message for memory (thread-scoped)
-        try:
-            ingest_text(f"user[{chat_id}]: {goal}", src="chat-user")
-        except Exception:
-            pass
-
-        # Fast-path echo for Hello-World validation
-        if ECHO_MODE:
-            send_telegram_message(f"👋 Hello! You said: {goal}", chat_id)
+        if not _begin_goal(goal, chat_id):
             return
-        
         # Execute through Jarvis LangGraph
-        state = State(goal=goal, context=[], decision={}, log=[])
-        # Provide a checkpointer thread_id using the Telegram chat as the thread key
-        result = jarvis_app.invoke(
-            state,
-            config={"configurable": {"thread_id": str(chat_id), "checkpoint_ns": "telegram"}}
-        )
-        
-        # Format response
-        decision = result.get("decision", {})
-        decision_type = decision.get("type", "UNKNOWN")
-        
-        if decision_type == "FINAL":
-            answer = decision.get("answer", "Task completed")
-            response = f"✅ *Jarvis Complete*\n\n{answer}"
-        elif decision_type == "ACT":
-            tool = decision.get("tool", "unknown")
-            response = f"⚡ *Jarvis Action:* {tool}\n\nExecuting your request..."
-        else:
-            response = f"🔄 *Jarvis Status:* {decision_type}\n\nProcessing your goal..."
-        
-        # Add log info if available
-        logs = result.get("log", [])
-        if logs:
-            response += f"\n\n📋 *Actions taken:* {len(logs)}"
-        
-        # Ingest assistant response into memory
+        state, config = _goal_run(goal, chat_id)
+        streamer, token = _stream_start(chat_id)
         try:
-            answer_text = None
-            if decision_type == "FINAL":
-                answer_text = decision.get("answer")
-            if answer_text:
-                from main_graph import ingest as _ingest
-                _ingest(answer_text, src="chat", meta={"thread_id": str(chat_id), "role": "assistant", "kind": "assistant", "ts": time.time()})
-        except Exception:
-            pass
+            with circuit.deadline(GRAPH_DEADLINE_SEC):
+                result = jarvis_app.invoke(state, config=config)
+        finally:
+            _stream_stop(streamer, token)
+        _finish_goal(result, chat_id, streamer)
+    except Exception as e:
+        _goal_failed(e, chat_id)
 
-        # Update metrics and send result back to Telegram
-        METRICS["decisions"] += 1
-        if logs:
-            METRICS["actions"] += len(logs)
-        send_telegram_message(response, chat_id)
-        # Ingest assistant answer for memory (thread-scoped)
+async def aprocess_jarvis_goal(goal, chat_id):
+    """``process_jarvis_goal`` on the shared event loop: the LLM wait holds no thread."""
+    try:
+        if not await asyncio.to_thread(_begin_goal, goal, chat_id):
+            return
+        state, config = _goal_run(goal, chat_id)
+        streamer, token = _stream_start(chat_id)
         try:
-            if decision_type == "FINAL":
-                ingest_text(f"assistant[{chat_id}]: {decision.get('answer','')}\nctx: {state.get('context',[])}", src="chat-assistant")
-        except Exception:
-            pass
-        
+            with circuit.deadline(GRAPH_DEADLINE_SEC):
+                result = await jarvis_app.ainvoke(state, config=config)
+        finally:
+            if streamer is not None:
+                STREAM_CALLBACK.reset(token)
+                await asyncio.to_thread(streamer.stop)
+        await asyncio.to_thread(_finish_goal, result, chat_id, streamer)
     except Exception as e:
-        error_msg = f"❌ *Error processing goal:*\n{str(e)}"
-        METRICS["errors"] += 1
-        METRICS["last_error"] = str(e)
+        await asyncio.to_thread(_goal_failed, e, chat_id)
+
+_aio_loop = None
+_aio_lock = threading.Lock()
+
+def aio_loop():
+    """Process-wide event loop (in a daemon thread) that runs goals concurrently."""
+    global _aio_loop
+    with _aio_lock:
+        if _aio_loop is None:
+            _aio_loop = asyncio.new_event_loop()
+            threading.Thread(target=_aio_loop.run_forever, name="jarvis-aio", daemon=True).start()
+    return _aio_loop
+
+def _run_goal(goal, chat_id):
+    if LLM_ASYNC:
+        asyncio.run_coroutine_threadsafe(aprocess_jarvis_goal(goal, chat_id), aio_loop())
+    else:
+        threading.Thread(target=process_jarvis_goal, args=(goal, chat_id), daemon=True).start()
+
+def dispatch_goal(goal, chat_id):
+    """Process a goal in the background; while warm-up runs it waits in the warm-up queue instead."""
+    if warmup.defer(_run_goal, goal, chat_id):
         try:
-            send_telegram_message(error_msg, chat_id)
+            send_telegram_message("⏳ Starting up; your message is queued and will be answered shortly.", chat_id)
         except Exception:
             pass
+        return
+    _run_goal(goal, chat_id)
 
 def get_telegram_updates(offset: int | None = None, timeout_seconds: int = 50):
     """Get new messages from Telegram"""
@@ -236,11 +423,7 @@ def telegram_bot_polling():
                         cmd = cmd[len("/goal "):].strip()
                     # Process in background thread
                     print(f"📨 Received goal: {cmd}")
-                    threading.Thread(
-                        target=process_jarvis_goal,
-                        args=(cmd, chat_id),
-                        daemon=True
-                    ).start()
+                    dispatch_goal(cmd, chat_id)
             if last_update_id is not None:
                 offset = last_update_id + 1
             
@@ -264,6 +447,23 @@ if TELEGRAM_TOKEN and TELEGRAM_CHAT_ID:
     if MONITOR_ENABLED:
         threading.Thread(target=_monitor_loop, daemon=True).start()
 
+# Optional periodic directory sync into memory
+if SYNC_DIRS:
+    threading.Thread(target=_sync_loop, daemon=True).start()
+
+# Optional periodic enforcement of the hot-memory budget and archive age
+if TIERING_INTERVAL > 0:
+    threading.Thread(target=_tiering_loop, daemon=True).start()
+
+# Warm-up: load the embedder, connect the store (and QDRANT_SNAPSHOT), run a dummy encode/search and
+# create the LLM client now rather than on the first question
+if WARMUP_ON_BOOT:
+    warmup.start()
+elif os.getenv("QDRANT_SNAPSHOT", "").strip():
+    threading.Thread(target=_ensure_retrieval_ready, daemon=True).start()
+
+METRICS["boot_ms"] = round((time.time() - _BOOT_T0) * 1000.0, 1)
+
 # Minimal web server for Heroku health checks and (optional) Telegram webhook
 @flask_app.route('/')
 def home():
@@ -289,7 +489,7 @@ def telegram_webhook(token: str):
             if run_sync:
                 process_jarvis_goal(text, chat_id)
             else:
-                threading.Thread(target=process_jarvis_goal, args=(text, chat_id), daemon=True).start()
+                dispatch_goal(text, chat_id)
         return jsonify({"ok": True})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
@@ -300,9 +500,25 @@ def health():
         "status": "healthy", 
         "service": "jarvis-telegram-bot",
         "telegram_configured": bool(TELEGRAM_TOKEN and TELEGRAM_CHAT_ID),
-        "metrics": METRICS
+        "metrics": METRICS,
+        "ingest_queue": ingest_queue.stats(),
+        "embed_cache": embed_cache_stats(),
+        "embed_batching": embed_batch_stats(),
+        "query_cache": query_cache_stats(),
+        "storage": storage_stats(),
+        "tiering": tiering.tiering_stats(),
+        "migration": dict(migrate.PROGRESS),
+        "prompt": prompt_stats(),
+        "llm_cache": llm_cache_stats(),
+        "llm_circuit": llm_circuit_stats(),
+        "llm_hedge": llm_hedge_stats(),
     })
 
+@flask_app.route('/ready')
+def ready():
+    st = warmup.status()
+    return jsonify(st), (200 if st["ready"] else 503)
+
 # Simple authenticated HTTP API to ask Jarvis questions
 @flask_app.route('/api/chat', methods=['POST'])
 def api_chat():
@@ -318,17 +534,18 @@ def api_chat():
     try:
         # Ingest user message into memory (optional)
         try:
-            ingest_text(text, src="api-user")
-            from main_graph import ingest as _ingest
-            _ingest(text, src="chat", meta={"thread_id": thread_id, "role": "user", "kind": "user", "ts": time.time()})
+            ingest_text(text, src="chat", meta={"thread_id": thread_id, "role": "user", "kind": "user", "ts": time.time()})
         except Exception:
             pass
+        # A request during warm-up waits for it (bounded) instead of racing it for the same locks
+        warmup.wait(WARMUP_WAIT_SEC)
         # Build state and invoke graph
         state: State = {"goal": text, "context": [], "decision": {}, "log": []}
-        result = jarvis_app.invoke(
-            state,
-            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": "api"}}
-        )
+        with circuit.deadline(GRAPH_DEADLINE_SEC):
+            result = jarvis_app.invoke(
+                state,
+                config={"configurable": {"thread_id": thread_id, "checkpoint_ns": "api"}}
+            )
         decision = result.get("decision", {})
         logs = result.get("log", [])
         METRICS["decisions"] += 1